@@ -0,0 +1,53 @@
+"""
+Peak memory and time to answer a 100k-entry batch.
+
+Compares the dict path (`Registrator.dispatch` then encode the list of response dicts) against
+`Registrator.dispatch_bytes` which encodes the slotted result objects directly.
+
+    $ PYTHONPATH=. python benchmarks/batch_memory.py
+"""
+
+import json
+import tracemalloc
+from time import perf_counter
+
+from json_rpc import Registrator
+from json_rpc.codec import default_codec
+
+
+SIZE = 100000
+
+app = Registrator()
+
+
+@app.register
+def plus(x, y):
+    return x + y
+
+
+def measure(label, function):
+    tracemalloc.start()
+    start = perf_counter()
+    function()
+    took = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<16} peak {peak / 2 ** 20:>8.1f} MiB  {took * 1000:>8.1f} ms')
+
+
+def main():
+    batch = [{'jsonrpc': '2.0', 'method': 'plus', 'params': [i, i], 'id': i} for i in range(SIZE)]
+    raw = json.dumps(batch).encode()
+    print(f'codec: {default_codec.name}, batch: {SIZE}')
+
+    print('end to end')
+    measure('dict path', lambda: default_codec.dumps(app.dispatch(default_codec.loads(raw))))
+    measure('dispatch_bytes', lambda: app.dispatch_bytes(raw))
+
+    print('responses only (decoded request is excluded)')
+    measure('dict path', lambda: default_codec.dumps(app.dispatch(batch)))
+    measure('result objects', lambda: app._encode(app._evaluator.evaluate(batch)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Per-call overhead of parameter checking.
+
+Compares the former `inspect.signature` based check which was done on every request against the descriptor which
+is compiled once when the method is registered.
+
+    $ PYTHONPATH=. python benchmarks/descriptor.py
+"""
+
+from inspect import signature
+from timeit import repeat
+
+from json_rpc import Registrator
+from json_rpc._descriptor import MethodDescriptor
+
+
+def plus(x, y):
+    return x + y
+
+
+def signature_check(params):
+    parameter_spec = signature(plus).parameters
+    if isinstance(params, list):
+        return len(params) == len(parameter_spec)
+    return set(params.keys()) == set(parameter_spec.keys())
+
+
+descriptor = MethodDescriptor('plus', plus)
+
+
+def descriptor_check(params):
+    if isinstance(params, list):
+        return descriptor.accepts_positional(params)
+    return descriptor.accepts_named(params)
+
+
+app = Registrator()
+app.register(plus)
+
+POSITIONAL = {'jsonrpc': '2.0', 'method': 'plus', 'params': [1, 2], 'id': 1}
+NAMED = {'jsonrpc': '2.0', 'method': 'plus', 'params': {'x': 1, 'y': 2}, 'id': 1}
+
+
+def best(stmt, number=100000):
+    return min(repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    cases = [
+        ('signature check (positional)', lambda: signature_check([1, 2])),
+        ('descriptor check (positional)', lambda: descriptor_check([1, 2])),
+        ('signature check (named)', lambda: signature_check({'x': 1, 'y': 2})),
+        ('descriptor check (named)', lambda: descriptor_check({'x': 1, 'y': 2})),
+        ('Registrator.dispatch (positional)', lambda: app.dispatch(POSITIONAL)),
+        ('Registrator.dispatch (named)', lambda: app.dispatch(NAMED)),
+    ]
+    for label, stmt in cases:
+        print(f'{label:<36} {best(stmt):>10.1f} ns/call')
+
+
+if __name__ == '__main__':
+    main()
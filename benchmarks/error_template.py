@@ -0,0 +1,45 @@
+"""
+Cost of encoding error responses.
+
+Compares the dict path (`Fail.to_response` then encode) against the pre-encoded templates which only encode `id`,
+and a method-not-found flood through `Registrator.dispatch_bytes`.
+
+    $ PYTHONPATH=. python benchmarks/error_template.py
+"""
+
+import json
+from timeit import repeat
+
+from json_rpc import Registrator
+from json_rpc.codec import default_codec
+from json_rpc.variants import ErrorCode, Fail
+
+
+app = Registrator()
+
+NOT_FOUND = json.dumps({'jsonrpc': '2.0', 'method': 'missing', 'params': [], 'id': 1}).encode()
+NOT_FOUND_BATCH = json.dumps([
+    {'jsonrpc': '2.0', 'method': 'missing', 'params': [], 'id': i} for i in range(1000)
+]).encode()
+
+
+def best(stmt, number):
+    return min(repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    dumps = default_codec.dumps
+    print(f'codec: {default_codec.name}')
+
+    cases = [
+        ('dict path', lambda: dumps(Fail(1, ErrorCode.METHOD_NOT_FOUND, '').to_response()), 100000),
+        ('template', lambda: Fail(1, ErrorCode.METHOD_NOT_FOUND, '').to_bytes(dumps), 100000),
+        ('dispatch_bytes (single)', lambda: app.dispatch_bytes(NOT_FOUND), 100000),
+        ('dispatch_bytes (1000 batch)', lambda: app.dispatch_bytes(NOT_FOUND_BATCH), 100),
+    ]
+    for label, stmt, number in cases:
+        print(f'{label:<30} {best(stmt, number):>12.1f} ns/call')
+
+
+if __name__ == '__main__':
+    main()
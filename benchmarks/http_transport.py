@@ -0,0 +1,123 @@
+"""
+Load generation against the HTTP transports.
+
+Each server runs in its own process serving the same `Registrator`.  The client opens `CONNECTIONS` keep-alive
+connections and sends `REQUESTS` requests on each, one by one and then pipelined.
+
+    $ PYTHONPATH=. python benchmarks/http_transport.py
+"""
+
+import asyncio
+import json
+import multiprocessing
+import socket
+from time import perf_counter
+
+from json_rpc import Registrator
+from json_rpc.server.aio import serve
+
+
+CONNECTIONS = 32
+REQUESTS = 500
+
+app = Registrator()
+
+
+@app.register
+def plus(x, y):
+    return x + y
+
+
+BODY = json.dumps({'jsonrpc': '2.0', 'method': 'plus', 'params': [1, 2], 'id': 1}).encode()
+REQUEST = b'POST /rpc HTTP/1.1\r\nHost: bench\r\nContent-Length: %d\r\n\r\n%s' % (len(BODY), BODY)
+
+
+def _listen():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(1024)
+    return sock
+
+
+def run_aio(sock):
+    async def main():
+        server = await serve(app, sock=sock, path='/rpc')
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def run_tornado(sock):
+    import tornado.httpserver
+    import tornado.ioloop
+    import tornado.web
+    from json_rpc.server.http import create_handler
+
+    sock.setblocking(False)
+
+    async def main():
+        application = tornado.web.Application([(r'/rpc', create_handler(tornado.web.RequestHandler, app))])
+        server = tornado.httpserver.HTTPServer(application)
+        server.add_sockets([sock])
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':')[1])
+    await reader.readexactly(length)
+
+
+async def _connection(port, pipelined):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    if pipelined:
+        writer.write(REQUEST * REQUESTS)
+        for _ in range(REQUESTS):
+            await _read_response(reader)
+    else:
+        for _ in range(REQUESTS):
+            writer.write(REQUEST)
+            await _read_response(reader)
+    writer.close()
+
+
+async def load(port, pipelined):
+    start = perf_counter()
+    await asyncio.gather(*[_connection(port, pipelined) for _ in range(CONNECTIONS)])
+    return CONNECTIONS * REQUESTS / (perf_counter() - start)
+
+
+def bench(label, target):
+    sock = _listen()
+    port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=target, args=(sock,), daemon=True)
+    process.start()
+    try:
+        asyncio.run(load(port, False))  # warm up
+        sequential = asyncio.run(load(port, False))
+        pipelined = asyncio.run(load(port, True))
+        print(f'{label:<24} {sequential:>10.0f} req/s  pipelined {pipelined:>10.0f} req/s')
+    finally:
+        process.terminate()
+        process.join()
+        sock.close()
+
+
+def main():
+    print(f'{CONNECTIONS} connections x {REQUESTS} requests')
+    bench('json_rpc.server.aio', run_aio)
+    try:
+        import tornado  # noqa: F401
+    except ImportError:
+        print('tornado is not installed, skipped')
+    else:
+        bench('json_rpc.server.http', run_tornado)
+
+
+if __name__ == '__main__':
+    main()
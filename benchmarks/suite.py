@@ -0,0 +1,372 @@
+"""
+Benchmark suite of the hot paths.
+
+Every case is measured `REPEAT` times and the best run is reported as nanoseconds per operation, which is a request
+or an entry of a batch request.  The results are written as JSON, and compared with a baseline to find regressions.
+
+    $ PYTHONPATH=. python benchmarks/suite.py
+    $ PYTHONPATH=. python benchmarks/suite.py --output result.json --baseline benchmarks/baseline.json
+    $ PYTHONPATH=. python benchmarks/suite.py --filter batch --save-baseline
+
+The exit status is 1 when a case is slower than the baseline by more than `--threshold`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from time import perf_counter
+
+from json_rpc import Registrator, register, rpc_dispatcher
+from json_rpc.server.aio import serve
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+REPEAT = 5
+BATCH_SIZE = 1000
+HTTP_REQUESTS = 500
+
+CASES = []
+
+
+def case(name, unit='request', number=10000):
+    """
+    Register a case.  The decorated function sets up and returns a callable which runs `number` operations.
+    """
+    def decorate(setup):
+        CASES.append((name, unit, number, setup))
+        return setup
+    return decorate
+
+
+app = Registrator()
+
+
+@app.register
+def plus(x, y):
+    return x + y
+
+
+@app.register('validated_plus', validate=True)
+def validated_plus(x: int, y: int) -> int:
+    return x + y
+
+
+@app.register
+async def async_plus(x, y):
+    await asyncio.sleep(0)
+    return x + y
+
+
+@app.register
+def rows(n):
+    for i in range(n):
+        yield {'id': i, 'name': 'row'}
+
+
+@register
+def legacy_plus(x, y):
+    return x + y
+
+
+def _request(method, params, id=1):
+    return {'jsonrpc': '2.0', 'method': method, 'params': params, 'id': id}
+
+
+def _batch(method, params):
+    return [_request(method, params, i) for i in range(1, BATCH_SIZE + 1)]
+
+
+def _loop_of(function):
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(function())
+
+
+@case('startup.import', unit='process', number=10)
+def _():
+    command = [sys.executable, '-c', 'import json_rpc']
+    return lambda: [subprocess.run(command, check=True) for _ in range(10)]
+
+
+@case('dispatch.positional.rpc_dispatcher')
+def _():
+    request = _request('legacy_plus', [1, 2])
+    return lambda: [rpc_dispatcher(request) for _ in range(10000)]
+
+
+@case('dispatch.positional.registrator')
+def _():
+    request = _request('plus', [1, 2])
+    return lambda: [app.dispatch(request) for _ in range(10000)]
+
+
+@case('dispatch.named.rpc_dispatcher')
+def _():
+    request = _request('legacy_plus', {'x': 1, 'y': 2})
+    return lambda: [rpc_dispatcher(request) for _ in range(10000)]
+
+
+@case('dispatch.named.registrator')
+def _():
+    request = _request('plus', {'x': 1, 'y': 2})
+    return lambda: [app.dispatch(request) for _ in range(10000)]
+
+
+@case('dispatch.validated.registrator')
+def _():
+    request = _request('validated_plus', [1, 2])
+    return lambda: [app.dispatch(request) for _ in range(10000)]
+
+
+@case('dispatch.validated_named.registrator')
+def _():
+    request = _request('validated_plus', {'x': 1, 'y': 2})
+    return lambda: [app.dispatch(request) for _ in range(10000)]
+
+
+@case('dispatch.bytes.registrator')
+def _():
+    raw = json.dumps(_request('plus', [1, 2])).encode()
+    return lambda: [app.dispatch_bytes(raw) for _ in range(10000)]
+
+
+@case('batch.rpc_dispatcher', unit='entry', number=BATCH_SIZE * 10)
+def _():
+    request = _batch('legacy_plus', [1, 2])
+    return lambda: [rpc_dispatcher(request) for _ in range(10)]
+
+
+@case('batch.registrator', unit='entry', number=BATCH_SIZE * 10)
+def _():
+    request = _batch('plus', [1, 2])
+    return lambda: [app.dispatch(request) for _ in range(10)]
+
+
+@case('batch.bytes.registrator', unit='entry', number=BATCH_SIZE * 10)
+def _():
+    raw = json.dumps(_batch('plus', [1, 2])).encode()
+    return lambda: [app.dispatch_bytes(raw) for _ in range(10)]
+
+
+@case('async.gather.registrator', unit='entry', number=BATCH_SIZE * 10)
+def _():
+    request = _batch('async_plus', [1, 2])
+
+    async def run():
+        for _ in range(10):
+            await app.dispatch_async(request)
+
+    return _loop_of(run)
+
+
+@case('errors.rpc_dispatcher', unit='entry', number=BATCH_SIZE * 10)
+def _():
+    request = _batch('unknown', [1, 2])
+    return lambda: [rpc_dispatcher(request) for _ in range(10)]
+
+
+@case('errors.registrator', unit='entry', number=BATCH_SIZE * 10)
+def _():
+    request = _batch('unknown', [1, 2])
+    return lambda: [app.dispatch(request) for _ in range(10)]
+
+
+@case('errors.bytes.registrator', unit='entry', number=BATCH_SIZE * 10)
+def _():
+    raw = json.dumps(_batch('unknown', [1, 2])).encode()
+    return lambda: [app.dispatch_bytes(raw) for _ in range(10)]
+
+
+@case('stream.generator.registrator', unit='item', number=BATCH_SIZE * 100)
+def _():
+    raw = json.dumps(_request('rows', [BATCH_SIZE * 10])).encode()
+
+    async def run():
+        for _ in range(10):
+            async for _ in await app.dispatch_stream_async(raw, chunk_size=16 * 1024):
+                pass
+
+    return _loop_of(run)
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':')[1])
+    await reader.readexactly(length)
+
+
+def _http_round_trips(start_server, method):
+    """
+    Sequential requests on a keep-alive connection.  The server runs on the same event loop as the client.
+    """
+    body = json.dumps(_request(method, [1, 2])).encode()
+    request = b'POST /rpc HTTP/1.1\r\nHost: bench\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body)
+
+    async def run():
+        port, stop = await start_server()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            for _ in range(HTTP_REQUESTS):
+                writer.write(request)
+                await _read_response(reader)
+        finally:
+            writer.close()
+            await stop()
+
+    return _loop_of(run)
+
+
+async def _start_aio():
+    server = await serve(app, '127.0.0.1', 0, path='/rpc')
+
+    async def stop():
+        server.close()
+        await server.wait_closed()
+
+    return server.sockets[0].getsockname()[1], stop
+
+
+def _start_tornado(registrator):
+    async def start():
+        import tornado.httpserver
+        import tornado.netutil
+        import tornado.web
+        from json_rpc.server.http import create_handler
+
+        handler = create_handler(tornado.web.RequestHandler, registrator)
+        server = tornado.httpserver.HTTPServer(tornado.web.Application([(r'/rpc', handler)]))
+        sockets = tornado.netutil.bind_sockets(0, '127.0.0.1')
+        server.add_sockets(sockets)
+
+        async def stop():
+            server.stop()
+            await server.close_all_connections()
+
+        return sockets[0].getsockname()[1], stop
+
+    return start
+
+
+def _has_tornado():
+    try:
+        import tornado  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@case('http.aio.registrator', number=HTTP_REQUESTS)
+def _():
+    return _http_round_trips(_start_aio, 'plus')
+
+
+if _has_tornado():
+    @case('http.tornado.rpc_dispatcher', number=HTTP_REQUESTS)
+    def _():
+        return _http_round_trips(_start_tornado(None), 'legacy_plus')
+
+    @case('http.tornado.registrator', number=HTTP_REQUESTS)
+    def _():
+        return _http_round_trips(_start_tornado(app), 'plus')
+
+
+def measure(setup, number):
+    run = setup()
+    run()  # warm up
+    samples = []
+    for _ in range(REPEAT):
+        start = perf_counter()
+        run()
+        samples.append((perf_counter() - start) / number * 1e9)
+    return samples
+
+
+def run_suite(pattern=None):
+    results = {}
+    for name, unit, number, setup in CASES:
+        if pattern and pattern not in name:
+            continue
+        samples = measure(setup, number)
+        results[name] = {'ns_per_op': min(samples), 'unit': unit, 'samples': samples}
+        print(f'{name:<36} {min(samples):>12.1f} ns/{unit}', file=sys.stderr)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'repeat': REPEAT,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Returns the names of the cases which are slower than the baseline by more than `threshold`.
+    """
+    regressions = []
+    print(f'{"case":<36} {"baseline":>12} {"current":>12} {"change":>8}')
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f'{name:<36} {"-":>12} {result["ns_per_op"]:>12.1f} {"new":>8}')
+            continue
+
+        change = result['ns_per_op'] / base['ns_per_op'] - 1
+        mark = ''
+        if change > threshold:
+            regressions.append(name)
+            mark = '  REGRESSION'
+        print(f'{name:<36} {base["ns_per_op"]:>12.1f} {result["ns_per_op"]:>12.1f} {change:>+8.1%}{mark}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', help='run only the cases whose name contains it')
+    parser.add_argument('--output', help='write the results as JSON to the file, "-" for stdout')
+    parser.add_argument('--baseline', help='compare the results with the JSON file')
+    parser.add_argument('--threshold', type=float, default=0.15, help='regression ratio (default: 0.15)')
+    parser.add_argument('--save-baseline', action='store_true', help=f'write the results to {BASELINE}')
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.filter)
+
+    if args.output == '-':
+        json.dump(current, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.save_baseline:
+        # the cases which were not run keep their baseline
+        saved = {'results': {}}
+        if os.path.exists(BASELINE):
+            with open(BASELINE) as f:
+                saved = json.load(f)
+        saved['meta'] = current['meta']
+        saved['results'].update(current['results'])
+        with open(BASELINE, 'w') as f:
+            json.dump(saved, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,92 +1,395 @@
 # -*- coding: utf-8 -*-
 
-from __future__ import print_function, unicode_literals, absolute_import
+from __future__ import print_function, unicode_literals, absolute_import, annotations
 
-from asyncio import AbstractEventLoop, ensure_future
-from uuid import uuid4
+# `asyncio`, `concurrent.futures`, `inspect` and `uuid` are imported on the first use, so that a short-lived
+# process which dispatches only a few requests does not pay for them.  `typing` is imported only by the type
+# checkers: the modules of this package annotate lazily and import it under ``TYPE_CHECKING = False``.
+from time import monotonic
 from functools import wraps
 from operator import methodcaller
-from typing import (
-    Dict,
-    List,
-    Union,
-    Optional,
-    Any,
-)
 
-from .variants import JSON_RPC_VERSION, ErrorCode, Success, AsyncResultsResolver
+from .variants import JSON_RPC_VERSION, ErrorCode, Success, is_concurrent_future, is_stream
 from ._error import create_error_response, code_to_response, as_failed
+from ._descriptor import MethodDescriptor
+from .execution import Execution, Executors
+from . import codec as _codec
+from .codec import Codec
+from .cache import MISSING, SingleFlight, freeze
+from .limits import Overloaded, as_limit, run_limited
+from .metrics import Metrics, instrument
+from .middleware import Call, CallRejected, compile_chain
+from .stream import (
+    CHUNK_SIZE, iter_json_array, aiter_json_array, aiter_items, aiter_json_result, aiter_partial_results, collect,
+)
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from asyncio import AbstractEventLoop
+    from typing import Any, Dict, List, Optional, Union
 
 
 class Evaluator:
     """ TODO: split async evaluation """
-    def __init__(self, rpc_stack: Dict, loop: Optional[AbstractEventLoop]):
+    def __init__(
+        self,
+        rpc_stack: Dict,
+        loop: Optional[AbstractEventLoop],
+        executors: Executors,
+        max_batch_size: Optional[int]=None,
+    ):
         self._rpc_stack = rpc_stack
         self._loop = loop
+        self._executors = executors
+        self._max_batch_size = max_batch_size
+        self._middleware = None
+
+    def use(self, middlewares: List):
+        """
+        Compile the middlewares into the chain which every call goes through.
+        """
+        if not middlewares:
+            self._middleware = None
+            return
+
+        def run(call):
+            return self._run(call.descriptor, call.params, call.args, call.kw)
+
+        self._middleware = compile_chain(middlewares, run)
 
     def _call(self, id, name, params: Union[List, Dict]) -> Dict:
         """
         JSON-RPC supports positional arguments and named arguments.
         """
-        from inspect import signature
-
-        if name not in self._rpc_stack:
+        descriptor = self._rpc_stack.get(name)
+        if descriptor is None:
             return as_failed(id, ErrorCode.METHOD_NOT_FOUND)
 
-        function = self._rpc_stack[name]
-        parameter_spec = signature(function).parameters
-
-        result = None
-        if isinstance(params, List):
-            if len(params) != len(parameter_spec):
+        if isinstance(params, list):
+            if not descriptor.accepts_positional(params):
                 return as_failed(id, ErrorCode.INVALID_PARAMS)
+            args, kw = params, {}
 
-            result = function(*params)
-
-        elif isinstance(params, Dict):
-            if set(params.keys()) != set(parameter_spec.keys()):
+        elif isinstance(params, dict):
+            if not descriptor.accepts_named(params):
                 return as_failed(id, ErrorCode.INVALID_PARAMS)
-
-            result = function(**params)
+            args, kw = (), params
 
         else:
             return as_failed(id, ErrorCode.INVALID_REQUEST)
 
-        return Success(id, result)
+        if descriptor.validator is not None:
+            error = descriptor.validator(args, kw)
+            if error is not None:
+                return as_failed(id, ErrorCode.INVALID_PARAMS, error)
+
+        if self._middleware is not None:
+            return Success(id, self._middleware(Call(id, name, params, args, kw, descriptor)))
+        return Success(id, self._run(descriptor, params, args, kw))
 
-    def _eval(self, jsonrpc, method, id=None, params=None):
+    def _run(self, descriptor, params, args, kw):
+        if descriptor.cache is not None:
+            return self._call_cached(descriptor, params, args, kw)
+
+        if descriptor.single_flight is not None:
+            return self._call_shared(descriptor, params, args, kw)
+
+        if descriptor.limits or descriptor.timeout is not None:
+            return self._bound(descriptor, descriptor.function(*args, **kw))
+
+        if descriptor.execution is Execution.INLINE:
+            return descriptor.function(*args, **kw)
+
+        # the result is `concurrent.futures.Future` which is going to be resolved by `do` or `do_async`
+        return self._executors.submit(descriptor.execution, descriptor.function, *args, **kw)
+
+    def _invoke(self, descriptor, args, kw):
+        """
+        Call the procedure.  The coroutine is wrapped into a task so that it can be awaited more than once.
+        """
+        if descriptor.execution is Execution.INLINE:
+            import asyncio
+            import inspect
+
+            result = descriptor.function(*args, **kw)
+            if inspect.iscoroutine(result):
+                result = asyncio.ensure_future(self._bound(descriptor, result))
+            return result
+
+        return self._executors.submit(descriptor.execution, descriptor.function, *args, **kw)
+
+    def _bound(self, descriptor, coroutine):
+        """
+        Apply the concurrency limits and the timeout of the procedure.  The time waiting for the limits counts.
+        """
+        if descriptor.limits:
+            coroutine = run_limited(coroutine, descriptor.limits)
+        if descriptor.timeout is not None:
+            import asyncio
+            coroutine = asyncio.wait_for(coroutine, descriptor.timeout)
+        return coroutine
+
+    def _call_cached(self, descriptor, params, args, kw):
+        """
+        The result of coroutine function is cached as a task, so that identical calls await the same one.
+        """
+        cache = descriptor.cache
+        key = (descriptor.name, freeze(params))
+        result = cache.get(key)
+        if result is MISSING:
+            result = self._invoke(descriptor, args, kw)
+            cache.put(key, result)
+        return result
+
+    def _call_shared(self, descriptor, params, args, kw):
+        """
+        Identical calls which arrive while the first one is in-flight await the same future.
+        """
+        single_flight = descriptor.single_flight
+        key = (descriptor.name, freeze(params))
+        future = single_flight.get(key)
+        if future is MISSING:
+            future = self._invoke(descriptor, args, kw)
+            single_flight.put(key, future)
+        return future
+
+    def _eval(self, request):
+        if not isinstance(request, dict):
+            return as_failed(None, ErrorCode.INVALID_REQUEST)
+
+        id = request.get('id')
+        method = request.get('method')
+        if not isinstance(method, str):
+            return as_failed(id, ErrorCode.INVALID_REQUEST)
+
+        params = request.get('params')
         if params is None:
             params = []
 
         try:
             return self._call(id, method, params)
+        except CallRejected as e:
+            return as_failed(id, e.code, e.message)
         except Exception as e:
             return as_failed(id, ErrorCode.UNEXPECTED_ERROR, str(e))
 
-    def do(self, request):
-        if isinstance(request, Dict):
-            result = self._eval(**request)
-            return result.to_response()
+    def _check_batch(self, request: List):
+        """
+        Returns the error for a batch request which is too large, otherwise None.
+        """
+        if self._max_batch_size is not None and len(request) > self._max_batch_size:
+            return as_failed(None, ErrorCode.BATCH_TOO_LARGE)
+        return None
+
+    def _wait(self, result, deadline: Optional[float]=None):
+        """
+        Block until the procedure executed on a pool is done.  The items of a generator are collected into a list.
+        """
+        if not result.is_async():
+            return result
 
-        if isinstance(request, List):
-            results = (self._eval(**r) for r in request)
-            responses = map(methodcaller('to_response'), results)
-            return [r for r in responses if r]
+        if is_stream(result.result) and not hasattr(result.result, '__anext__'):
+            try:
+                return Success(result.id, list(result.result))
+            except Exception as e:
+                return as_failed(result.id, ErrorCode.UNEXPECTED_ERROR, str(e))
 
-        assert False, f'Invalid request {request}'
+        if not is_concurrent_future(result.result):
+            return result
+
+        from concurrent.futures import TimeoutError as ConcurrentTimeoutError
+        try:
+            return Success(result.id, result.result.result(_remaining(deadline)))
+        except ConcurrentTimeoutError:
+            # the thread can not be interrupted, only the response is given up
+            return as_failed(result.id, ErrorCode.TIMEOUT)
+        except Exception as e:
+            return as_failed(result.id, ErrorCode.UNEXPECTED_ERROR, str(e))
+
+    def evaluate(self, request, timeout: Optional[float]=None):
+        """
+        Evaluate the request into `Success` or `Fail`.  It will be a list of them if the request is batch.
+        An entry which is not done within `timeout` seconds fails with `ErrorCode.TIMEOUT`.
+        """
+        deadline = _deadline(timeout)
+        if isinstance(request, dict):
+            return self._wait(self._eval(request), deadline)
+
+        if isinstance(request, list) and request:
+            error = self._check_batch(request)
+            if error is not None:
+                return error
+
+            # every entry is submitted before waiting so that the pooled procedures run in parallel
+            results = [self._eval(r) for r in request]
+            return [self._wait(r, deadline) for r in results]
+
+        return as_failed(None, ErrorCode.INVALID_REQUEST)
+
+    def do(self, request, timeout: Optional[float]=None):
+        return _to_response(self.evaluate(request, timeout))
+
+    async def _resolve(self, result, deadline: Optional[float]=None):
+        """
+        Await the result of coroutine function or pooled procedure then wrap it into `Success` again.
+        The items of a generator or async generator are collected into a list.
+        """
+        import asyncio
+
+        awaitable = result.result
+        if is_stream(awaitable):
+            awaitable = collect(awaitable)
+        elif is_concurrent_future(awaitable):
+            awaitable = asyncio.wrap_future(awaitable)
+
+        try:
+            if deadline is not None:
+                # a future may be shared by the identical calls, it is not cancelled for the deadline of this one
+                if asyncio.isfuture(awaitable):
+                    awaitable = asyncio.shield(awaitable)
+                awaitable = asyncio.wait_for(awaitable, _remaining(deadline))
+            return Success(result.id, await awaitable)
+        except Overloaded:
+            return as_failed(result.id, ErrorCode.SERVER_OVERLOADED)
+        except CallRejected as e:
+            return as_failed(result.id, e.code, e.message)
+        except asyncio.TimeoutError:
+            return as_failed(result.id, ErrorCode.TIMEOUT)
+        except Exception as e:
+            return as_failed(result.id, ErrorCode.UNEXPECTED_ERROR, str(e))
+
+    async def evaluate_async(self, request, timeout: Optional[float]=None, stream: bool=False):
+        """
+        Evaluate the request within the running event loop.
+        The async entries of a batch request are awaited concurrently, and each of them is cancelled if it is not
+        done within `timeout` seconds.
+
+        With `stream`, the result of a single call of a generator function or async generator function is not
+        collected.  It is `Success` whose result is an async iterator of the items, which `timeout` does not bound.
+        """
+        deadline = _deadline(timeout)
+        if isinstance(request, dict):
+            result = self._eval(request)
+            if result.is_async():
+                if stream and result and is_stream(result.result):
+                    return self._stream(result)
+                result = await self._resolve(result, deadline)
+            return result
+
+        if isinstance(request, list) and request:
+            error = self._check_batch(request)
+            if error is not None:
+                return error
+
+            results = [self._eval(r) for r in request]
+            pending = [i for i, r in enumerate(results) if r.is_async()]
+            if pending:
+                import asyncio
+                resolved = await asyncio.gather(*[self._resolve(results[i], deadline) for i in pending])
+                for i, r in zip(pending, resolved):
+                    results[i] = r
+            return results
+
+        return as_failed(None, ErrorCode.INVALID_REQUEST)
+
+    def _stream(self, result):
+        return Success(result.id, aiter_items(result.result))
+
+    async def do_async(self, request, timeout: Optional[float]=None):
+        return _to_response(await self.evaluate_async(request, timeout))
+
+    def iter_results(self, request: List, timeout: Optional[float]=None):
+        """
+        Evaluate the entries of a batch request one by one and yield each result.
+        """
+        deadline = _deadline(timeout)
+        error = self._check_batch(request)
+        if error is not None:
+            yield error
+            return
+
+        for r in request:
+            yield self._wait(self._eval(r), deadline)
+
+    def iter_batch(self, request: List, timeout: Optional[float]=None):
+        for result in self.iter_results(request, timeout):
+            response = result.to_response()
+            if response:
+                yield response
+
+    async def aiter_results(self, request: List, timeout: Optional[float]=None):
+        """
+        Yield the results of a batch request as each entry completes.
+        The async entries are scheduled as soon as they are evaluated, so that they are awaited concurrently.
+        """
+        deadline = _deadline(timeout)
+        error = self._check_batch(request)
+        if error is not None:
+            yield error
+            return
+
+        import asyncio
+
+        pending = []
+        try:
+            for r in request:
+                result = self._eval(r)
+                if result.is_async():
+                    pending.append(asyncio.ensure_future(self._resolve(result, deadline)))
+                else:
+                    yield result
+
+            for future in asyncio.as_completed(pending):
+                yield await future
+
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def aiter_batch(self, request: List, timeout: Optional[float]=None):
+        async for result in self.aiter_results(request, timeout):
+            response = result.to_response()
+            if response:
+                yield response
 
 
 class AsyncEvaluator(Evaluator):
-    def do(self, request):
-        if isinstance(request, Dict):
-            result = self._eval(**request)
-            return result.resolve_async(self._loop).to_response()
+    def evaluate(self, request, timeout: Optional[float]=None):
+        return self._loop.run_until_complete(self.evaluate_async(request, timeout))
+
+    def iter_results(self, request: List, timeout: Optional[float]=None):
+        results = self.aiter_results(request, timeout)
+        try:
+            while True:
+                try:
+                    yield self._loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            # an early stop cancels the entries still running, unless the loop can not be driven from here
+            if not self._loop.is_closed() and not self._loop.is_running():
+                self._loop.run_until_complete(results.aclose())
+
+
+async def _prepend(first, chunks):
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+
+def _deadline(timeout: Optional[float]) -> Optional[float]:
+    return None if timeout is None else monotonic() + timeout
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(deadline - monotonic(), 0)
 
-        if isinstance(request, List):
-            results = AsyncResultsResolver([self._eval(**r) for r in request], self._loop)
-            return results.to_response()
 
-        assert False, f'Invalid request {request}'
+def _to_response(result):
+    if isinstance(result, list):
+        responses = map(methodcaller('to_response'), result)
+        return [r for r in responses if r]
+    return result.to_response()
 
 
 class Registrator:
@@ -109,47 +412,488 @@ class Registrator:
     ... def func_named(a, b, c):
     ...     pass
     ...
+
+    Blocking procedure can be executed on a pool so that it does not block the other requests.
+
+    >>> @register(execution='thread')
+    ... def func_blocking(a):
+    ...     pass
+    ...
+
+    >>> @register('named_cpu_bound', execution=Execution.PROCESS)
+    ... def func_cpu_bound(a):
+    ...     pass
+    ...
+
+    Coroutine procedures can be limited in how many of them run at once.
+
+    >>> @register(concurrency=10)
+    ... async def func_query(a):
+    ...     pass
+    ...
+
+    :param concurrency: Limit of coroutine procedures which run at once across the `Registrator`.  A number of calls,
+        or `json_rpc.limits.ConcurrencyLimit` to bound the calls waiting for it as well.
+    :param max_batch_size: A batch request with more entries is rejected with `ErrorCode.BATCH_TOO_LARGE`.
+    :param metrics: ``True`` or `json_rpc.metrics.Metrics` to record the calls of each procedure.
+    :param validate: Default of the `validate` option of `register`.
     """
 
-    def __init__(self, loop=None):
+    def __init__(
+        self,
+        loop=None,
+        thread_pool_size: Optional[int]=None,
+        process_pool_size: Optional[int]=None,
+        codec: Optional[Codec]=None,
+        single_flight: bool=False,
+        concurrency=None,
+        max_batch_size: Optional[int]=None,
+        metrics=False,
+        validate: bool=False,
+    ):
         self._rpc_stack = {}
+        self._middlewares = []
+        self._mounts = []
+        self._parents = []
+        self._frozen = False
         self._loop = loop
-        if loop:
-            self._evaluator = AsyncEvaluator(self._rpc_stack, self._loop)
-        else:
-            self._evaluator = Evaluator(self._rpc_stack, self._loop)
-
-    def _set_rpc(self, name, func):
-        self._rpc_stack[name] = func
+        self.codec = codec or _codec.default_codec
+        self._executors = Executors(thread_pool_size, process_pool_size)
+        self.single_flight = SingleFlight() if single_flight else None
+        self.concurrency = as_limit(concurrency)
+        self.validate = validate
+        self.metrics = Metrics() if metrics is True else metrics or None
+
+        evaluator = AsyncEvaluator if loop else Evaluator
+        options = {}
+        if self.metrics is not None:
+            # no instrumentation at all unless it is enabled
+            evaluator = instrument(evaluator)
+            options['metrics'] = self.metrics
+
+        self._evaluator = evaluator(
+            self._rpc_stack, self._loop, self._executors, max_batch_size, **options,
+        )
+
+    def _set_rpc(self, name, func, **options):
+        options.setdefault('single_flight', self.single_flight)
+        options.setdefault('shared_concurrency', self.concurrency)
+        options.setdefault('validate', self.validate)
+        self._route(name, MethodDescriptor(name, func, **options))
         return func
 
-    def register(self, target):
+    def _route(self, name, descriptor):
+        """
+        Put the procedure into the routing table, and the tables of the `Registrator` which mounted this one.
+        Nothing is changed unless every table accepts it.
+        """
+        for registrator, full_name in self._check_route(name, self._rpc_stack.get(name)):
+            registrator._rpc_stack[full_name] = descriptor
+
+    def _check_route(self, name, current=None):
+        """
+        Returns the registrators whose tables the procedure is put into, with its name in each of them.
+        Raises `RuntimeError` if any of them is frozen, or `ValueError` if any of them has another procedure of the
+        name.  `current` is the procedure which is going to be replaced.
+        """
+        tables = list(self._tables(name))
+        for registrator, full_name in tables:
+            if registrator._frozen:
+                raise RuntimeError(f'{full_name} can not be registered, the routing table is frozen')
+            existing = registrator._rpc_stack.get(full_name)
+            if existing is not None and existing is not current:
+                raise ValueError(f'{full_name} is already registered')
+        return tables
+
+    def _tables(self, name):
+        yield self, name
+        for prefix, parent in self._parents:
+            yield from parent._tables(prefix + name)
+
+    def mount(self, prefix: str, registrator: 'Registrator') -> 'Registrator':
+        """
+        Mount the procedures of another `Registrator` with the prefix of their names, like ``user/``.
+
+        The names are flattened into the routing table of this one, so that a request is routed with a single
+        lookup however many registrators are mounted.  The procedures registered to the mounted one later are
+        added as well.  They are called by this `Registrator`, with its pools and middlewares, while the options
+        which are compiled at the registration (``concurrency``, ``validate`` and ``single_flight``) are the
+        defaults of the `Registrator` they were registered to.
+
+        >>> users = Registrator()
+        >>> @users.register
+        ... def get(id):
+        ...     pass
+        ...
+        >>> app = Registrator().mount('user/', users)
+        >>> sorted(app.routes())
+        ['user/get']
+        """
+        if registrator is self or registrator in self._ancestors():
+            raise ValueError('a registrator can not be mounted into itself')
+        if self._frozen or any(parent._frozen for parent in self._ancestors()):
+            raise RuntimeError(f'{prefix} can not be mounted, the routing table is frozen')
+
+        routes = [
+            (table, full_name, descriptor)
+            for name, descriptor in registrator._rpc_stack.items()
+            for table, full_name in self._check_route(prefix + name)
+        ]
+        for table, full_name, descriptor in routes:
+            table._rpc_stack[full_name] = descriptor
+        registrator._parents.append((prefix, self))
+        self._mounts.append((prefix, registrator))
+        return self
+
+    def _ancestors(self):
+        for _, parent in self._parents:
+            yield parent
+            yield from parent._ancestors()
+
+    def routes(self) -> Dict[str, MethodDescriptor]:
+        """
+        Returns the routing table, the names of the procedures and their descriptors.
+        """
+        return dict(self._rpc_stack)
+
+    def freeze(self):
+        """
+        Freeze the routing table of this `Registrator` and the mounted ones.  Call it once every procedure was
+        registered, then registering more raises `RuntimeError`.
+        """
+        self._frozen = True
+        for _, registrator in self._mounts:
+            registrator.freeze()
+        return self
+
+    def register(self, target=None, **options):
+        """
+        Options:
+
+        execution
+            `Execution` policy or its value. ``inline``, ``thread`` or ``process``.
+
+        cache
+            `json_rpc.cache.ResponseCache` to memoize the result by the params, or ``True`` for the default one.
+            The procedure must be idempotent.
+
+        single_flight
+            ``False`` to opt out the coalescing of identical in-flight calls when the `Registrator` was created
+            with ``single_flight=True``, or ``True`` to opt in.  It only affects coroutine functions and pooled
+            procedures.
+
+        concurrency
+            Limit of the calls of the coroutine function which run at once.  A number of calls, or
+            `json_rpc.limits.ConcurrencyLimit` to reject the calls with `ErrorCode.SERVER_OVERLOADED` when too many
+            of them are waiting.  The limit of the `Registrator` is applied as well.
+
+        timeout
+            Seconds until the call of the coroutine function is cancelled and fails with `ErrorCode.TIMEOUT`.
+
+        validate
+            ``True`` to check the types of the params by the annotations of the function, see
+            `json_rpc.validation`.  Invalid params fail with `ErrorCode.INVALID_PARAMS` before the function is called.
+        """
+        if target is None:
+
+            # call as decorator with options only
+            def decorate(func):
+                return self._set_rpc(func.__name__, func, **options)
+
+            return decorate
+
         if isinstance(target, str):
 
             # call as decorator with argument
             def decorate(func):
-                return self._set_rpc(target, func)
+                return self._set_rpc(target, func, **options)
 
             return decorate
 
         else:
             # call as normal decorator
             func = target
-            return self._set_rpc(func.__name__, func)
+            return self._set_rpc(func.__name__, func, **options)
+
+    def __call__(self, target=None, **options):
+        return self.register(target, **options)
 
-    def __call__(self, request):
-        return self.register(request)
+    def use(self, middleware):
+        """
+        Add a middleware around the calls of the procedures.  See `json_rpc.middleware`.
+        The chain is compiled here, so that a call does not walk the list of the middlewares.
+        """
+        self._middlewares.append(middleware)
+        self._evaluator.use(self._middlewares)
+        return middleware
 
-    def dispatch(self, request):
+    def dispatch(self, request, timeout: Optional[float]=None):
         """
         Dispatcher for rpc request.
         Receive a JSON-rpc request then returns a result.
         The request must be follows JSON-rpc protocol.  Basically a dict but it can be a list if it is batch.
+        An entry which is not done within `timeout` seconds fails with `ErrorCode.TIMEOUT`.
+        """
+        return self._evaluator.do(request, timeout)
+
+    async def dispatch_async(self, request, timeout: Optional[float]=None):
+        """
+        Coroutine version of `dispatch`.
+        It awaits the result within the running event loop so that it can be used from async frameworks
+        like Tornado or aiohttp.  The entries of a batch request are evaluated concurrently.
+        """
+        return await self._evaluator.do_async(request, timeout)
+
+    def cache_info(self) -> Dict[str, Dict]:
+        """
+        Returns the statistics of the cache of each procedure registered with `cache` option.
+        """
+        return {
+            name: descriptor.cache.info()
+            for name, descriptor in self._rpc_stack.items()
+            if descriptor.cache is not None
+        }
+
+    def limit_info(self) -> Dict[str, Dict]:
+        """
+        Returns the statistics of the concurrency limits.  The limit of the `Registrator` is keyed by ``*``.
+        """
+        info = {
+            name: descriptor.limits[0].info()
+            for name, descriptor in self._rpc_stack.items()
+            if descriptor.limits and descriptor.limits[0] is not self.concurrency
+        }
+        if self.concurrency is not None:
+            info['*'] = self.concurrency.info()
+        return info
+
+    def dispatch_iter(self, request: List, timeout: Optional[float]=None):
+        """
+        Streaming version of `dispatch` for a batch request.
+        Returns a generator which yields the response of each entry, so that the whole batch is never held
+        in memory.  `json_rpc.stream.iter_json_array` encodes it incrementally.
+        """
+        assert isinstance(request, list), f'Streaming is only for batch request {request}'
+        return self._evaluator.iter_batch(request, timeout)
+
+    def dispatch_aiter(self, request: List, timeout: Optional[float]=None):
+        """
+        Streaming version of `dispatch_async` for a batch request.
+        Returns an async iterator which yields the response of each entry as it completes.
+        The order of responses may differ from the request, use `id` to match them.
+        """
+        assert isinstance(request, list), f'Streaming is only for batch request {request}'
+        return self._evaluator.aiter_batch(request, timeout)
+
+    def _encode(self, result) -> bytes:
+        """
+        Encode the result of evaluation directly without building the response dict.
+        A result which can not be encoded is replaced with `ErrorCode.INTERNAL_ERROR`.
+        """
+        if isinstance(result, list):
+            encoded = bytearray()
+            for chunk in iter_json_array(result, self._encode):
+                encoded += chunk
+            return bytes(encoded)
+
+        try:
+            return result.to_bytes(self.codec.dumps)
+        except (TypeError, ValueError) as e:
+            return as_failed(result.id, ErrorCode.INTERNAL_ERROR, str(e)).to_bytes(self.codec.dumps)
+
+    def _parse_error(self, error: ValueError) -> bytes:
+        return as_failed(None, ErrorCode.PARSE_ERROR, str(error)).to_bytes(self.codec.dumps)
+
+    def dispatch_bytes(self, raw: bytes, timeout: Optional[float]=None) -> bytes:
+        """
+        Same as `dispatch` but receives a raw JSON request and returns an encoded response.
+        It returns empty bytes when no response is needed.
+        """
+        try:
+            request = self.codec.loads(raw)
+        except ValueError as e:
+            return self._parse_error(e)
+
+        return self._encode(self._evaluator.evaluate(request, timeout))
+
+    async def dispatch_bytes_async(self, raw: bytes, timeout: Optional[float]=None) -> bytes:
+        """
+        Coroutine version of `dispatch_bytes`.
+        """
+        try:
+            request = self.codec.loads(raw)
+        except ValueError as e:
+            return self._parse_error(e)
+
+        return self._encode(await self._evaluator.evaluate_async(request, timeout))
+
+    async def dispatch_bytes_aiter(self, raw: bytes, timeout: Optional[float]=None):
         """
-        return self._evaluator.do(request)
+        Streaming version of `dispatch_bytes_async`.
+        The responses of a batch request are yielded as chunks of a JSON array, and so is the result of a generator
+        function, see `dispatch_stream_async`.
+        """
+        try:
+            request = self.codec.loads(raw)
+        except ValueError as e:
+            yield self._parse_error(e)
+            return
+
+        if isinstance(request, list) and request and self._evaluator._check_batch(request) is None:
+            async for chunk in aiter_json_array(self._evaluator.aiter_results(request, timeout), self._encode):
+                yield chunk
+            return
+
+        response = await self._encode_stream(await self._evaluator.evaluate_async(request, timeout, stream=True))
+        if isinstance(response, bytes):
+            if response:
+                yield response
+            return
+
+        async for chunk in response:
+            yield chunk
+
+    async def _encode_stream(self, result, chunk_size: int=CHUNK_SIZE):
+        """
+        Returns the encoded response, or the async iterator of its chunks if its result is streamed.
+        The first chunk is encoded here, so that a result which fails before it or fits in it is the bytes.
+        """
+        if not (isinstance(result, Success) and is_stream(result.result)):
+            return self._encode(result)
+
+        chunks = aiter_json_result(result.id, result.result, self.codec.dumps, chunk_size)
+        try:
+            first = await chunks.__anext__()
+        except Exception as e:
+            return as_failed(result.id, ErrorCode.UNEXPECTED_ERROR, str(e)).to_bytes(self.codec.dumps)
+
+        if len(first) < chunk_size:
+            return first
+        return _prepend(first, chunks)
+
+    async def dispatch_stream_async(self, raw: bytes, timeout: Optional[float]=None, chunk_size: int=CHUNK_SIZE):
+        """
+        Same as `dispatch_bytes_async`, except that the result of a single request to a generator function or async
+        generator function is encoded into a JSON array item by item, so that the whole result is never held in
+        memory.  The response is an async iterator of the chunks, unless it is smaller than `chunk_size` bytes.
+        An error raised by the generator after the first chunk is raised by the iterator.
+
+        `timeout` does not bound the iteration of the items.
+        """
+        try:
+            request = self.codec.loads(raw)
+        except ValueError as e:
+            return self._parse_error(e)
+
+        return await self._encode_stream(await self._evaluator.evaluate_async(request, timeout, stream=True), chunk_size)
+
+    async def dispatch_partial_aiter(self, raw: bytes, timeout: Optional[float]=None, chunk_size: int=CHUNK_SIZE):
+        """
+        Same as `dispatch_stream_async` for the transports of messages.  It yields the encoded messages.
+        The items of a streamed result are sent as the notifications of `json_rpc.stream.PARTIAL_METHOD` followed by
+        the response of the rest of them, or of the error raised by the generator.
+        """
+        try:
+            request = self.codec.loads(raw)
+        except ValueError as e:
+            yield self._parse_error(e)
+            return
+
+        result = await self._evaluator.evaluate_async(request, timeout, stream=True)
+        if not (isinstance(result, Success) and is_stream(result.result)):
+            response = self._encode(result)
+            if response:
+                yield response
+            return
+
+        try:
+            async for message in aiter_partial_results(result.id, result.result, self.codec.dumps, chunk_size):
+                yield message
+        except Exception as e:
+            yield as_failed(result.id, ErrorCode.UNEXPECTED_ERROR, str(e)).to_bytes(self.codec.dumps)
+
+    def _encode_parts(self, result):
+        """
+        Encode the result with its binaries detached as the attachments.
+        """
+        from .attachments import detach
+
+        attachments = []
+
+        def detached(r):
+            # a notification has no response to refer to its binaries
+            if isinstance(r, Success) and r.id is not None:
+                return Success(r.id, detach(r.result, attachments))
+            return r
+
+        if isinstance(result, list):
+            result = [detached(r) for r in result]
+        else:
+            result = detached(result)
+        return self._encode(result), attachments
+
+    def _decode_parts(self, raw: bytes, attachments):
+        request = self.codec.loads(raw)
+        if attachments:
+            from .attachments import attach
+            request = attach(request, attachments)
+        return request
+
+    def dispatch_parts(self, raw: bytes, timeout: Optional[float]=None, attachments=()):
+        """
+        Same as `dispatch_bytes` for the transports which carry `json_rpc.attachments`.
+        Returns the encoded response and the list of its attachments.  `attachments` of the request are resolved
+        into the params.
+        """
+        try:
+            request = self._decode_parts(raw, attachments)
+        except ValueError as e:
+            return self._parse_error(e), []
+
+        return self._encode_parts(self._evaluator.evaluate(request, timeout))
+
+    async def dispatch_parts_async(
+        self, raw: bytes, timeout: Optional[float]=None, attachments=(), chunk_size: Optional[int]=None,
+    ):
+        """
+        Coroutine version of `dispatch_parts`.
+        With `chunk_size`, the result of a generator function is streamed as `dispatch_stream_async` does, and its
+        items are not detached.
+        """
+        try:
+            request = self._decode_parts(raw, attachments)
+        except ValueError as e:
+            return self._parse_error(e), []
+
+        result = await self._evaluator.evaluate_async(request, timeout, stream=chunk_size is not None)
+        if chunk_size is not None and isinstance(result, Success) and is_stream(result.result):
+            return await self._encode_stream(result, chunk_size), []
+        return self._encode_parts(result)
+
+    def shutdown(self, wait=True):
+        """
+        Shutdown the pools for the procedures registered with `thread` or `process` execution.
+        """
+        self._executors.shutdown(wait=wait)
 
 
 RPC_STACK = {}
+_RPC_DESCRIPTORS = {}
+
+
+def _describe(name):
+    """
+    Returns the descriptor of a procedure registered in `RPC_STACK`.
+    It is compiled lazily in case the function was put into `RPC_STACK` directly.
+    """
+    function = RPC_STACK.get(name)
+    if function is None:
+        return None
+
+    descriptor = _RPC_DESCRIPTORS.get(name)
+    if descriptor is None or descriptor.function is not function:
+        descriptor = _RPC_DESCRIPTORS[name] = MethodDescriptor(name, function)
+    return descriptor
 
 
 def register(target):
@@ -184,6 +928,7 @@ def register(target):
                 return func(*args, **kw)
 
             RPC_STACK[target] = __inner
+            _RPC_DESCRIPTORS[target] = MethodDescriptor(target, __inner)
             return __inner
 
         return decorate
@@ -198,6 +943,7 @@ def register(target):
             return func(*args, **kw)
 
         RPC_STACK[func.__name__] = __inner
+        _RPC_DESCRIPTORS[func.__name__] = MethodDescriptor(func.__name__, __inner)
         return __inner
 
 
@@ -205,26 +951,22 @@ def _call(id, name, params: Union[List, Dict]) -> Dict:
     """
     JSON-RPC supports positional arguments and named arguments.
     """
-    from inspect import signature
-
-    if name not in RPC_STACK:
+    descriptor = _describe(name)
+    if descriptor is None:
         return code_to_response(id, ErrorCode.METHOD_NOT_FOUND)
 
-    function = RPC_STACK[name]
-    parameter_spec = signature(function).parameters
-
     result = None
-    if isinstance(params, List):
-        if len(params) != len(parameter_spec):
+    if isinstance(params, list):
+        if not descriptor.accepts_positional(params):
             return code_to_response(id, ErrorCode.INVALID_PARAMS)
 
-        result = function(*params)
+        result = descriptor.function(*params)
 
-    elif isinstance(params, Dict):
-        if set(params.keys()) != set(parameter_spec.keys()):
+    elif isinstance(params, dict):
+        if not descriptor.accepts_named(params):
             return code_to_response(id, ErrorCode.INVALID_PARAMS)
 
-        result = function(**params)
+        result = descriptor.function(**params)
 
     else:
         return code_to_response(id, ErrorCode.INVALID_REQUEST)
@@ -260,9 +1002,9 @@ def rpc_dispatcher(request: Union[List, Dict]):
     The request must be follows JSON-rpc protocol.  Basically a dict but it can be a list if it is batch.
     """
 
-    if isinstance(request, List):
+    if isinstance(request, list):
         return list(filter(None, [_eval(**r) for r in request]))
-    elif isinstance(request, Dict):
+    elif isinstance(request, dict):
         return _eval(**request)
     else:
         assert False, 'Invalid request'
@@ -277,6 +1019,7 @@ def make_request(method: str, params: Union[List, Dict[str, Any]], request_id: O
     """
 
     if not request_id:
+        from uuid import uuid4
         request_id = str(uuid4())
     return {
         'jsonrpc': JSON_RPC_VERSION,
@@ -0,0 +1,133 @@
+from .execution import Execution
+from .cache import ResponseCache, SingleFlight
+from .limits import as_limit
+
+
+class MethodDescriptor:
+    """
+    Calling convention of a registered procedure.
+
+    It is compiled only once when the function is registered so that the evaluation of a request does not need
+    to inspect the signature of the function anymore.  `inspect` is imported by the first registration.
+    """
+
+    __slots__ = (
+        'name',
+        'function',
+        'min_args',
+        'max_args',
+        'names',
+        'required',
+        'optional',
+        'var_positional',
+        'var_keyword',
+        'positional_callable',
+        'named_callable',
+        'is_coroutine',
+        'execution',
+        'cache',
+        'single_flight',
+        'limits',
+        'timeout',
+        'validator',
+    )
+
+    def __init__(
+        self,
+        name,
+        function,
+        execution=Execution.INLINE,
+        cache=None,
+        single_flight=False,
+        concurrency=None,
+        shared_concurrency=None,
+        timeout=None,
+        validate=False,
+    ):
+        from inspect import Parameter, signature, iscoroutinefunction, isasyncgenfunction, isgeneratorfunction
+
+        self.name = name
+        self.function = function
+
+        parameters = signature(function).parameters.values()
+        positional = [p for p in parameters if p.kind in (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)]
+        named = [p for p in parameters if p.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY)]
+
+        self.var_positional = any(p.kind is Parameter.VAR_POSITIONAL for p in parameters)
+        self.var_keyword = any(p.kind is Parameter.VAR_KEYWORD for p in parameters)
+
+        self.min_args = sum(1 for p in positional if p.default is Parameter.empty)
+        self.max_args = None if self.var_positional else len(positional)
+
+        self.names = frozenset(p.name for p in named)
+        self.required = frozenset(p.name for p in named if p.default is Parameter.empty)
+        self.optional = self.names - self.required
+
+        # keyword only parameter without default can not be filled by a positional call and vice versa.
+        self.positional_callable = not any(
+            p.kind is Parameter.KEYWORD_ONLY and p.default is Parameter.empty for p in parameters
+        )
+        self.named_callable = not any(
+            p.kind is Parameter.POSITIONAL_ONLY and p.default is Parameter.empty for p in parameters
+        )
+
+        self.is_coroutine = iscoroutinefunction(function)
+
+        self.execution = Execution(execution)
+        if self.is_coroutine and self.execution is not Execution.INLINE:
+            raise ValueError(f'coroutine function {name} is run on the event loop, it can not be {self.execution}')
+
+        # the items of a generator are produced while the result is encoded, by the caller
+        if isgeneratorfunction(function) or isasyncgenfunction(function):
+            if self.execution is not Execution.INLINE:
+                raise ValueError(f'generator function {name} is iterated by the caller, it can not be {self.execution}')
+            if cache is not None and cache is not False:
+                raise ValueError(f'generator function {name} can not be cached')
+
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = cache if cache is not False else None
+
+        # only the call which has a future to share can be coalesced
+        if single_flight is True:
+            single_flight = SingleFlight()
+        shareable = self.is_coroutine or self.execution is not Execution.INLINE
+        self.single_flight = single_flight if shareable and single_flight is not False else None
+
+        # the procedures on a pool are bounded by the pool, and the inline ones never run concurrently
+        concurrency = as_limit(concurrency)
+        if concurrency is not None and not self.is_coroutine:
+            raise ValueError(f'concurrency limit is only for coroutine function, {name} is not')
+        limits = (concurrency, shared_concurrency) if self.is_coroutine else ()
+        self.limits = tuple(limit for limit in limits if limit is not None)
+
+        if timeout is not None and not self.is_coroutine:
+            raise ValueError(f'timeout is only for coroutine function, {name} is not')
+        self.timeout = timeout
+
+        self.validator = None
+        if validate:
+            from .validation import compile_validator
+            self.validator = compile_validator(function)
+
+    def __repr__(self):
+        return f'MethodDescriptor <{self.name}: {self.function!r}>'
+
+    def accepts_positional(self, params) -> bool:
+        if not self.positional_callable:
+            return False
+
+        length = len(params)
+        if length < self.min_args:
+            return False
+        return self.max_args is None or length <= self.max_args
+
+    def accepts_named(self, params) -> bool:
+        if not self.named_callable:
+            return False
+
+        keys = params.keys()
+        if not self.var_keyword and not keys <= self.names:
+            return False
+        return self.required <= keys
+
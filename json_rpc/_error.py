@@ -1,14 +1,4 @@
-from .variants import JSON_RPC_VERSION, ErrorCode, Fail
-
-
-CODE_TO_MESSAGE = {
-    ErrorCode.PARSE_ERROR: 'Parse error Invalid JSON was received by the server.  An error occurred on the server while parsing the JSON text.',
-    ErrorCode.INVALID_REQUEST: 'The JSON sent is not a valid Request object.',
-    ErrorCode.METHOD_NOT_FOUND: 'The method does not exist / is not available.',
-    ErrorCode.INVALID_PARAMS: 'Invalid method parameter(s).',
-    ErrorCode.INTERNAL_ERROR: 'Internal JSON-RPC error.',
-    ErrorCode.UNEXPECTED_ERROR: 'unexpected error is occurred',
-}
+from .variants import JSON_RPC_VERSION, CODE_TO_MESSAGE, Fail
 
 
 def create_error_response(id, code, message):
@@ -0,0 +1,165 @@
+"""
+Out-of-band binary attachments.
+
+A procedure may return `bytes`, `bytearray`, `memoryview` or `mmap.mmap`, in its result or in the lists and dicts of
+it.  When the transport carries attachments, each binary is sent as a segment beside the JSON response instead of
+being encoded into JSON, and the JSON refers to the segment by its index::
+
+    {"jsonrpc": "2.0", "result": {"name": "a.bin", "content": {"$attachment": 0, "size": 1048576}}, "id": 1}
+
+The segments are written as they are, neither encoded nor copied into the response.  The references in a request
+are resolved into the binaries before the procedure is called as well.
+
+.. csv-table::
+    :header: transport, attachments
+
+    "``json_rpc.server.stream`` with ``framing='segments'``", segments of the frame following the JSON
+    ``json_rpc.server.aio``, "``multipart/mixed`` response, for a request which accepts it"
+
+>>> attachments = []
+>>> detach({'name': 'a.bin', 'content': b'abc'}, attachments)
+{'name': 'a.bin', 'content': {'$attachment': 0, 'size': 3}}
+>>> bytes(attachments[0])
+b'abc'
+"""
+
+import mmap
+import os
+from typing import List, Tuple
+
+
+REFERENCE = '$attachment'
+BINARY_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+_SCALARS = frozenset((type(None), bool, int, float, str))
+
+
+def detach(value, attachments: list):
+    """
+    Returns the value whose binaries are replaced with the references, appending the binaries to `attachments`.
+    The lists and dicts which have no binary are returned as they are.
+    """
+    kind = type(value)
+    if kind in _SCALARS:
+        return value
+
+    if kind is dict:
+        detached = None
+        for key, item in value.items():
+            new = detach(item, attachments)
+            if new is not item:
+                if detached is None:
+                    detached = dict(value)
+                detached[key] = new
+        return value if detached is None else detached
+
+    if kind is list or kind is tuple:
+        detached = None
+        for i, item in enumerate(value):
+            new = detach(item, attachments)
+            if new is not item:
+                if detached is None:
+                    detached = list(value)
+                detached[i] = new
+        return value if detached is None else detached
+
+    if isinstance(value, BINARY_TYPES):
+        data = memoryview(value).cast('B')
+        attachments.append(data)
+        return {REFERENCE: len(attachments) - 1, 'size': data.nbytes}
+
+    return value
+
+
+def attach(value, attachments):
+    """
+    Resolve the references in decoded JSON into the attachments.  The lists and dicts are updated in place.
+    Raises `ValueError` for a reference to a missing attachment.
+    """
+    kind = type(value)
+    if kind is dict:
+        if REFERENCE in value:
+            index = value[REFERENCE]
+            if type(index) is not int or not 0 <= index < len(attachments):
+                raise ValueError(f'no attachment {index!r}')
+            return attachments[index]
+
+        for key, item in value.items():
+            if type(item) is dict or type(item) is list:
+                value[key] = attach(item, attachments)
+
+    elif kind is list:
+        for i, item in enumerate(value):
+            if type(item) is dict or type(item) is list:
+                value[i] = attach(item, attachments)
+
+    return value
+
+
+def encode_multipart(payload: bytes, attachments) -> Tuple[bytes, list]:
+    """
+    Returns the content type and the parts of ``multipart/mixed`` body to be written with `writelines`.
+    The JSON is the first part, and every part has ``Content-Length`` so that the reader does not need to search
+    the boundary in the binaries.
+    """
+    boundary = os.urandom(16).hex().encode('ascii')
+    delimiter = b'--' + boundary + b'\r\n'
+    parts = [
+        delimiter,
+        b'Content-Type: application/json\r\nContent-Length: %d\r\n\r\n' % len(payload),
+        payload,
+    ]
+    for data in attachments:
+        parts.append(b'\r\n' + delimiter)
+        parts.append(b'Content-Type: application/octet-stream\r\nContent-Length: %d\r\n\r\n' % len(data))
+        parts.append(data)
+    parts.append(b'\r\n--' + boundary + b'--\r\n')
+    return b'multipart/mixed; boundary=' + boundary, parts
+
+
+def _boundary_of(content_type: bytes) -> bytes:
+    for param in content_type.split(b';')[1:]:
+        name, _, value = param.strip().partition(b'=')
+        if name.lower() == b'boundary':
+            return value.strip(b'"')
+    raise ValueError('multipart body without boundary')
+
+
+def parse_multipart(body: bytes, content_type: bytes) -> Tuple[bytes, List[memoryview]]:
+    """
+    Returns the first part and the rest of ``multipart/mixed`` body.  The parts are views of the body.
+    """
+    delimiter = b'--' + _boundary_of(content_type)
+    view = memoryview(body)
+    parts = []
+
+    position = body.find(delimiter)
+    while position >= 0:
+        position += len(delimiter)
+        if body.startswith(b'--', position):
+            break
+
+        head_end = body.find(b'\r\n\r\n', position)
+        if head_end < 0:
+            raise ValueError('multipart part without the end of the headers')
+
+        length = None
+        for line in body[position:head_end].split(b'\r\n'):
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value)
+
+        start = head_end + 4
+        if length is None:
+            end = body.find(b'\r\n' + delimiter, start)
+            if end < 0:
+                raise ValueError('multipart part without the closing boundary')
+        else:
+            end = start + length
+
+        parts.append(view[start:end])
+        position = body.find(delimiter, end)
+
+    if not parts:
+        raise ValueError('multipart body has no part')
+    return parts[0].tobytes(), parts[1:]
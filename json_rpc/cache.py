@@ -0,0 +1,190 @@
+"""
+Memoization of the results of idempotent procedures.
+
+>>> from json_rpc import Registrator
+>>> register = Registrator()
+
+>>> @register(cache=ResponseCache(maxsize=1024, ttl=60))
+... def lookup(key):
+...     pass
+...
+"""
+
+from __future__ import annotations
+
+# `threading.Lock` itself, without importing `threading`
+from _thread import allocate_lock as Lock
+from collections import OrderedDict
+from time import monotonic
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
+
+
+MISSING = object()
+
+
+class _Dict:
+    """Marker to distinguish a frozen JSON object from a frozen JSON array."""
+
+
+def freeze(value):
+    """
+    Canonicalise decoded JSON params into a hashable key.
+    The order of the keys of an object does not matter.  `true` and `1`, `1.0` and `1` are distinguished.
+
+    >>> freeze({'b': [1, 2], 'a': True}) == freeze({'a': True, 'b': [1, 2]})
+    True
+    >>> freeze([1]) == freeze([True])
+    False
+    """
+    if isinstance(value, list):
+        return tuple(map(freeze, value))
+    if isinstance(value, dict):
+        return (_Dict, tuple(sorted((k, freeze(v)) for k, v in value.items())))
+    if type(value) in (bool, float):
+        return (type(value), value)
+    return value
+
+
+def _copy(value):
+    # only the containers of JSON are copied, the other values are immutable or shared as they are
+    if type(value) is list:
+        return [_copy(v) for v in value]
+    if type(value) is dict:
+        return {k: _copy(v) for k, v in value.items()}
+    return value
+
+
+class ResponseCache:
+    """
+    LRU cache with expiration for the results of a procedure.
+
+    Result of coroutine function or pooled procedure is stored as the future as soon as it is called, so that
+    concurrent identical calls share the single in-flight call.  The future is replaced with its result when it is
+    done, or dropped if it failed.
+
+    The results are copied into and out of the cache, so that a caller which mutates its result does not change the
+    later hits.  The calls which await the same in-flight future share its result.
+
+    :param maxsize: Maximum number of the entries.  The least recently used entry is evicted.
+    :param ttl: Seconds until an entry expires.  Never expires if it is None.
+    """
+
+    def __init__(self, maxsize: int=128, ttl: Optional[float]=None, clock=monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Returns the cached value or `MISSING`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value if hasattr(value, 'add_done_callback') else _copy(value)
+
+    def put(self, key, value):
+        pending = hasattr(value, 'add_done_callback')
+        expires_at = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value if pending else _copy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        if pending:
+            value.add_done_callback(lambda future: self._settle(key, future))
+
+    def _settle(self, key, future):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] is not future:
+                return
+
+            if future.cancelled() or future.exception() is not None:
+                del self._entries[key]
+            else:
+                self._entries[key] = (entry[0], _copy(future.result()))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+        }
+
+
+class SingleFlight:
+    """
+    Coalescing of identical in-flight calls.
+
+    Unlike `ResponseCache`, the future is shared only while it is in-flight.  It is dropped as soon as it is done,
+    so that the next call runs the procedure again.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._in_flight = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    def get(self, key):
+        """
+        Returns the in-flight future or `MISSING`.
+        """
+        with self._lock:
+            future = self._in_flight.get(key, MISSING)
+            if future is MISSING:
+                self.calls += 1
+            else:
+                self.shared += 1
+            return future
+
+    def put(self, key, future):
+        with self._lock:
+            self._in_flight[key] = future
+        future.add_done_callback(lambda done: self._done(key, done))
+
+    def _done(self, key, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def info(self):
+        return {
+            'calls': self.calls,
+            'shared': self.shared,
+            'in_flight': len(self._in_flight),
+        }
@@ -0,0 +1,37 @@
+"""
+Clients to call remote procedures of a `Registrator`.
+"""
+
+from ..variants import ErrorCode
+
+
+class RPCError(Exception):
+    """
+    Error response returned by the server.
+    `code` is an `ErrorCode` if it is defined by the protocol or this library, otherwise the integer as it was.
+    """
+
+    def __init__(self, code, message, data=None, id=None):
+        try:
+            code = ErrorCode(code)
+        except ValueError:
+            pass
+
+        super().__init__(f'{code}: {message}')
+        self.code = code
+        self.message = message
+        self.data = data
+        self.id = id
+
+
+def unwrap(response):
+    """
+    Returns the result of the response or raise `RPCError`.
+
+    >>> unwrap({'jsonrpc': '2.0', 'result': 3, 'id': 1})
+    3
+    """
+    error = response.get('error')
+    if error is not None:
+        raise RPCError(error.get('code'), error.get('message'), error.get('data'), response.get('id'))
+    return response.get('result')
@@ -0,0 +1,128 @@
+"""
+Automatic batching of the calls.
+
+Calls made within `window` seconds are sent as a single batch request, and each caller gets its own result.
+It trades a little latency of each call for much fewer requests from chatty callers.
+
+Example:
+
+>>> import asyncio
+>>> from json_rpc.client.batching import BatchingClient
+>>> from json_rpc.client.http import AsyncHTTPClient
+
+>>> client = BatchingClient(AsyncHTTPClient('http://localhost:8888/rpc'), window=0.002, max_batch=100)
+>>> async def plus_all(pairs):
+...     return await asyncio.gather(*[client.call('plus', pair) for pair in pairs])
+...
+"""
+
+import asyncio
+from collections import Counter
+from typing import Optional
+
+from . import RPCError
+
+
+class BatchingClient:
+    """
+    Wraps a client which has async `call` and `batch`, such as `json_rpc.client.http.AsyncHTTPClient`.
+
+    :param window: Seconds to wait for more calls after the first call of a batch.
+    :param max_batch: A batch is sent immediately when it has this number of calls.
+    """
+
+    def __init__(self, client, window: float=0.002, max_batch: int=100):
+        self._client = client
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = []
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.calls = 0
+        self.sizes = Counter()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def call(self, method: str, params=None) -> asyncio.Future:
+        """
+        Queue the call to the next batch.  Returns a future of its result, which raises `json_rpc.client.RPCError`
+        for the error response.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((method, params, future))
+        if len(self._queue) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        """
+        Send the queued calls now.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # calls cancelled by the callers are not sent
+        queue = [entry for entry in self._queue if not entry[2].done()]
+        self._queue = []
+        if not queue:
+            return
+
+        self.batches += 1
+        self.calls += len(queue)
+        self.sizes[len(queue)] += 1
+
+        task = asyncio.ensure_future(self._send(queue))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, queue):
+        futures = [future for _, _, future in queue]
+        try:
+            if len(queue) == 1:
+                method, params, _ = queue[0]
+                try:
+                    results = [await self._client.call(method, params)]
+                except RPCError as e:
+                    results = [e]
+            else:
+                results = await self._client.batch([(method, params) for method, params, _ in queue])
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, RPCError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def info(self):
+        return {
+            'batches': self.batches,
+            'calls': self.calls,
+            'mean_size': self.calls / self.batches if self.batches else 0.0,
+            'max_size': max(self.sizes, default=0),
+            'sizes': dict(self.sizes),
+        }
+
+    async def close(self, timeout: Optional[float]=None):
+        """
+        Send the queued calls, wait for the batches in-flight, then close the client.
+        """
+        self.flush()
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+        self._client.close()
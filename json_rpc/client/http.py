@@ -0,0 +1,357 @@
+"""
+HTTP clients with keep-alive connection pool.
+
+`HTTPClient` is the blocking client built on `http.client`.  `AsyncHTTPClient` is built on asyncio streams and
+pipelines the requests on each connection.  Both give each call an increasing integer id instead of uuid.
+They accept ``multipart/mixed`` responses, and the `json_rpc.attachments` are resolved into the results as
+`memoryview` of the response body.
+
+Example:
+
+>>> from json_rpc.client.http import HTTPClient
+
+>>> client = HTTPClient('http://localhost:8888/rpc', pool_size=4, timeout=5)
+>>> def plus():
+...     return client.call('test/hyoe', {'x': 3, 'y': 3})
+...
+"""
+
+import asyncio
+import http.client
+from collections import deque
+from itertools import count
+from queue import LifoQueue, Empty
+from typing import Optional, List, Tuple
+from urllib.parse import urlsplit
+
+from ..attachments import attach, parse_multipart
+from ..codec import Codec, default_codec
+from ..variants import JSON_RPC_VERSION, ErrorCode
+from . import RPCError, unwrap
+
+
+ACCEPT = 'application/json, multipart/mixed'
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status: int, body: bytes=b''):
+        super().__init__(f'HTTP {status}')
+        self.status = status
+        self.body = body
+
+
+class _BaseClient:
+
+    def __init__(self, url: str, codec: Optional[Codec]=None, timeout: Optional[float]=None):
+        parsed = urlsplit(url)
+        if parsed.scheme not in ('http', 'https'):
+            raise ValueError(f'unsupported scheme {parsed.scheme}')
+
+        self.url = url
+        self.timeout = timeout
+        self._secure = parsed.scheme == 'https'
+        self._host = parsed.hostname
+        self._port = parsed.port or (443 if self._secure else 80)
+        self._path = (parsed.path or '/') + (f'?{parsed.query}' if parsed.query else '')
+        self._codec = codec or default_codec
+        self._ids = count(1)
+
+    def _request(self, method: str, params, notification: bool=False):
+        request = {
+            'jsonrpc': JSON_RPC_VERSION, 'method': method, 'params': params if params is not None else [],
+        }
+        if not notification:
+            request['id'] = next(self._ids)
+        return request
+
+    def _batch_request(self, calls: List[Tuple[str, object]]):
+        return [self._request(method, params) for method, params in calls]
+
+    def _decode(self, body: bytes, content_type: bytes):
+        if not body:
+            return None
+        if content_type.startswith(b'multipart/'):
+            body, attachments = parse_multipart(body, content_type)
+            return attach(self._codec.loads(body), attachments)
+        return self._codec.loads(body)
+
+    def _demultiplex(self, requests, body: bytes, content_type: bytes):
+        """
+        Returns the results of a batch in the order of the calls.  A failed call is `RPCError` instead of its result.
+        """
+        responses = self._decode(body, content_type) or []
+        if isinstance(responses, dict):
+            # the whole batch was rejected
+            unwrap(responses)
+
+        by_id = {r.get('id'): r for r in responses}
+        results = []
+        for request in requests:
+            response = by_id.get(request['id'])
+            if response is None:
+                results.append(RPCError(ErrorCode.INTERNAL_ERROR, 'no response for the call', id=request['id']))
+                continue
+            try:
+                results.append(unwrap(response))
+            except RPCError as e:
+                results.append(e)
+        return results
+
+    def _unwrap_body(self, body: bytes, content_type: bytes):
+        return unwrap(self._decode(body, content_type))
+
+
+class HTTPClient(_BaseClient):
+    """
+    Blocking client.  Connections are kept alive and reused by the calls from any thread.
+
+    :param pool_size: Maximum number of idle connections kept in the pool.
+    :param timeout: Seconds of socket timeout.
+    """
+
+    def __init__(self, url: str, pool_size: int=4, codec: Optional[Codec]=None, timeout: Optional[float]=None):
+        super().__init__(url, codec, timeout)
+        self._pool = LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self._secure else http.client.HTTPConnection
+        return connection_class(self._host, self._port, timeout=self.timeout)
+
+    def _post(self, body: bytes) -> Tuple[bytes, bytes]:
+        """
+        Returns the body of the response and its content type.
+        """
+        try:
+            connection = self._pool.get_nowait()
+            reused = True
+        except Empty:
+            connection = self._connect()
+            reused = False
+
+        try:
+            connection.request('POST', self._path, body, {'Content-Type': 'application/json', 'Accept': ACCEPT})
+            response = connection.getresponse()
+            payload = response.read()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            connection.close()
+            if not reused:
+                raise
+            # the server closed the idle connection, try again with a new one
+            return self._post_new(body)
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            try:
+                self._pool.put_nowait(connection)
+            except Exception:
+                connection.close()
+
+        if response.status >= 300:
+            raise HTTPStatusError(response.status, payload)
+        return payload, (response.getheader('Content-Type') or '').encode('latin-1')
+
+    def _post_new(self, body: bytes) -> Tuple[bytes, bytes]:
+        self.close()
+        return self._post(body)
+
+    def call(self, method: str, params=None):
+        """
+        Call the remote procedure and returns its result.  Raises `json_rpc.client.RPCError` for the error response.
+        """
+        return self._unwrap_body(*self._post(self._codec.dumps(self._request(method, params))))
+
+    def notify(self, method: str, params=None):
+        self._post(self._codec.dumps(self._request(method, params, notification=True)))
+
+    def batch(self, calls: List[Tuple[str, object]]) -> list:
+        """
+        Call the procedures in a batch request.
+        Returns the results in the order of `calls`.  A failed call is `json_rpc.client.RPCError` instead of its result.
+        """
+        requests = self._batch_request(calls)
+        return self._demultiplex(requests, *self._post(self._codec.dumps(requests)))
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except Empty:
+                return
+
+
+async def read_response(reader: asyncio.StreamReader):
+    """
+    Read an HTTP/1.1 response.  Returns status code, whether the connection is kept alive, the body and the headers
+    whose names are lower case.
+    """
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head[:-4].split(b'\r\n')
+    version, status = lines[0].split(b' ', 2)[:2]
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(b':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get(b'transfer-encoding', b'').lower() == b'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            if size == 0:
+                await reader.readuntil(b'\r\n')
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b''.join(chunks)
+    else:
+        body = await reader.readexactly(int(headers.get(b'content-length', 0)))
+
+    connection = headers.get(b'connection', b'').lower()
+    keep_alive = connection != b'close' if version == b'HTTP/1.1' else connection == b'keep-alive'
+    return int(status), keep_alive, body, headers
+
+
+class _PipelinedConnection:
+    """
+    Requests are written as soon as they are called, and the responses are read in the same order.
+    """
+
+    def __init__(self, reader, writer, head: bytes):
+        self._reader = reader
+        self._writer = writer
+        self._head = head
+        self._waiters = deque()
+        self._closed = None
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed is not None
+
+    def post(self, body: bytes) -> asyncio.Future:
+        if self._closed is not None:
+            raise self._closed
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._writer.writelines([self._head, str(len(body)).encode('ascii'), b'\r\n\r\n', body])
+        return future
+
+    async def _receive(self):
+        error = ConnectionResetError('connection is closed')
+        try:
+            while self._waiters or not self._reader.at_eof():
+                status, keep_alive, body, headers = await read_response(self._reader)
+                future = self._waiters.popleft()
+                if not future.done():
+                    future.set_result((status, body, headers.get(b'content-type', b'')))
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError) as e:
+            error = ConnectionResetError(f'connection is broken: {e}')
+        finally:
+            self._closed = error
+            self._writer.close()
+            while self._waiters:
+                future = self._waiters.popleft()
+                if not future.done():
+                    future.set_exception(error)
+
+    def close(self):
+        self._receiver.cancel()
+
+
+class AsyncHTTPClient(_BaseClient):
+    """
+    Async client.  A call is sent on the least busy connection, and a new connection is opened while the pool is
+    smaller than `pool_size`.  Requests are pipelined up to `max_pipeline` on each connection.
+
+    :param timeout: Seconds to wait for each response.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int=4,
+        max_pipeline: int=16,
+        codec: Optional[Codec]=None,
+        timeout: Optional[float]=None,
+    ):
+        super().__init__(url, codec, timeout)
+        self.pool_size = pool_size
+        self.max_pipeline = max_pipeline
+        self._connections = []
+        self._connecting = set()
+        self._slots = asyncio.Semaphore(pool_size * max_pipeline)
+        self._head = (
+            f'POST {self._path} HTTP/1.1\r\nHost: {self._host}:{self._port}\r\n'
+            f'Content-Type: application/json\r\nAccept: {ACCEPT}\r\nContent-Length: '
+        ).encode('ascii')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    async def _connection(self) -> _PipelinedConnection:
+        self._connections = [c for c in self._connections if not c.closed]
+        size = len(self._connections) + len(self._connecting)
+        least_busy = min(self._connections, key=lambda c: c.in_flight, default=None)
+        if least_busy is not None and (least_busy.in_flight == 0 or size >= self.pool_size):
+            return least_busy
+
+        if size >= self.pool_size:
+            # the rest of the pool is still connecting
+            await asyncio.wait(self._connecting, return_when=asyncio.FIRST_COMPLETED)
+            return await self._connection()
+
+        task = asyncio.ensure_future(self._connect())
+        self._connecting.add(task)
+        task.add_done_callback(self._connecting.discard)
+        return await task
+
+    async def _connect(self) -> _PipelinedConnection:
+        reader, writer = await asyncio.open_connection(self._host, self._port, ssl=self._secure or None)
+        connection = _PipelinedConnection(reader, writer, self._head)
+        self._connections.append(connection)
+        return connection
+
+    async def _post(self, body: bytes) -> Tuple[bytes, bytes]:
+        # the number of calls is bounded so that the least busy connection always has room in its pipeline
+        async with self._slots:
+            connection = await self._connection()
+            status, payload, content_type = await asyncio.wait_for(connection.post(body), self.timeout)
+        if status >= 300:
+            raise HTTPStatusError(status, payload)
+        return payload, content_type
+
+    async def call(self, method: str, params=None):
+        """
+        Call the remote procedure and returns its result.
+        Raises `json_rpc.client.RPCError` for the error response, `asyncio.TimeoutError` if no response in time.
+        """
+        return self._unwrap_body(*await self._post(self._codec.dumps(self._request(method, params))))
+
+    async def notify(self, method: str, params=None):
+        await self._post(self._codec.dumps(self._request(method, params, notification=True)))
+
+    async def batch(self, calls: List[Tuple[str, object]]) -> list:
+        """
+        Call the procedures in a batch request.
+        Returns the results in the order of `calls`.  A failed call is `json_rpc.client.RPCError` instead of its result.
+        """
+        requests = self._batch_request(calls)
+        return self._demultiplex(requests, *await self._post(self._codec.dumps(requests)))
+
+    def close(self):
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
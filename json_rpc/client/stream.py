@@ -0,0 +1,200 @@
+"""
+Client for `json_rpc.server.stream`.
+
+Calls are multiplexed on a single connection.  Each call gets an increasing integer id and its response is matched
+by the id, so that responses can arrive in any order.
+
+With ``framing='segments'``, the binaries in the params are sent as `json_rpc.attachments`, and the attachments of
+the responses are resolved into the results as `bytes`.
+
+The partial results sent by a server with ``partial_results=True`` are joined into the result of `call`, or yielded
+one by one by `stream`.
+
+Example:
+
+>>> from json_rpc.client.stream import StreamClient
+
+>>> async def main():
+...     async with await StreamClient.connect_tcp('127.0.0.1', 4000, framing='length') as client:
+...         return await client.call('plus', [1, 2])
+...
+"""
+
+import asyncio
+from itertools import count
+from typing import Optional
+
+from ..attachments import attach, detach
+from ..codec import Codec, default_codec
+from ..framing import FrameError, get_framing
+from ..stream import PARTIAL_METHOD
+from ..variants import JSON_RPC_VERSION
+from . import unwrap
+
+
+def _message(method: str, params, **id):
+    return {'jsonrpc': JSON_RPC_VERSION, 'method': method, 'params': params if params is not None else [], **id}
+
+
+class StreamClient:
+    """
+    :param timeout: Default seconds to wait for each response.  No limit if it is None.
+    :param max_in_flight: Calls wait while this number of calls are waiting for the responses.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        framing='ndjson',
+        codec: Optional[Codec]=None,
+        timeout: Optional[float]=None,
+        max_in_flight: int=1024,
+    ):
+        self._reader = reader
+        self._writer = writer
+        self._framing = get_framing(framing)
+        self._codec = codec or default_codec
+        self.timeout = timeout
+        self._ids = count(1)
+        self._pending = {}
+        self._partials = {}
+        self._streams = {}
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._closed = None
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect_tcp(cls, host, port, framing='ndjson', **options):
+        framing = get_framing(framing)
+        reader, writer = await asyncio.open_connection(host, port, limit=framing.max_frame_size)
+        return cls(reader, writer, framing, **options)
+
+    @classmethod
+    async def connect_unix(cls, path, framing='ndjson', **options):
+        framing = get_framing(framing)
+        reader, writer = await asyncio.open_unix_connection(path, limit=framing.max_frame_size)
+        return cls(reader, writer, framing, **options)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _send(self, message):
+        if self._closed is not None:
+            raise self._closed
+
+        if self._framing.attachments:
+            attachments = []
+            message = detach(message, attachments)
+            self._writer.writelines(self._framing.encode_parts(self._codec.dumps(message), attachments))
+        else:
+            self._writer.writelines(self._framing.encode(self._codec.dumps(message)))
+        await self._writer.drain()
+
+    async def call(self, method: str, params=None, timeout: Optional[float]=None):
+        """
+        Call the remote procedure and returns its result.
+        Raises `json_rpc.client.RPCError` for the error response, `asyncio.TimeoutError` if no response in time.
+        """
+        async with self._slots:
+            id = next(self._ids)
+            future = self._pending[id] = asyncio.get_running_loop().create_future()
+            try:
+                await self._send(_message(method, params, id=id))
+                response = await asyncio.wait_for(future, timeout or self.timeout)
+            finally:
+                self._pending.pop(id, None)
+                partial = self._partials.pop(id, None)
+
+        result = unwrap(response)
+        if partial:
+            result = partial + result
+        return result
+
+    async def stream(self, method: str, params=None, timeout: Optional[float]=None):
+        """
+        Call the remote procedure whose result is a list, and yield the items as they arrive.
+        `timeout` is the seconds to wait for each message of the result.
+        """
+        async with self._slots:
+            id = next(self._ids)
+            queue = self._streams[id] = asyncio.Queue()
+            try:
+                await self._send(_message(method, params, id=id))
+                while True:
+                    message = await asyncio.wait_for(queue.get(), timeout or self.timeout)
+                    if isinstance(message, Exception):
+                        raise message
+
+                    if message.get('method') == PARTIAL_METHOD:
+                        for item in message['params']['result']:
+                            yield item
+                    else:
+                        for item in unwrap(message):
+                            yield item
+                        return
+            finally:
+                self._streams.pop(id, None)
+
+    async def notify(self, method: str, params=None):
+        await self._send(_message(method, params))
+
+    def _deliver(self, response):
+        if not isinstance(response, dict):
+            return
+
+        partial = response.get('method') == PARTIAL_METHOD
+        if partial and not isinstance(response.get('params'), dict):
+            return
+        id = response['params'].get('id') if partial else response.get('id')
+        queue = self._streams.get(id)
+        if queue is not None:
+            queue.put_nowait(response)
+            return
+
+        future = self._pending.get(id)
+        if future is None or future.done():
+            return
+        if partial:
+            self._partials.setdefault(id, []).extend(response['params']['result'])
+        else:
+            future.set_result(response)
+
+    async def _receive(self):
+        error = ConnectionResetError('connection is closed')
+        try:
+            while True:
+                frame = await self._framing.read_parts(self._reader)
+                if frame is None:
+                    break
+
+                frame, attachments = frame
+                message = self._codec.loads(frame)
+                if attachments:
+                    message = attach(message, attachments)
+                if isinstance(message, list):
+                    for response in message:
+                        self._deliver(response)
+                else:
+                    self._deliver(message)
+
+        except (FrameError, ValueError, ConnectionError) as e:
+            error = ConnectionResetError(f'connection is broken: {e}')
+        finally:
+            self._closed = error
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            for queue in self._streams.values():
+                queue.put_nowait(error)
+
+    async def close(self):
+        self._writer.close()
+        self._receiver.cancel()
+        try:
+            await self._receiver
+        except asyncio.CancelledError:
+            pass
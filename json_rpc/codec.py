@@ -0,0 +1,98 @@
+"""
+JSON codecs to decode a request from bytes and encode a response into bytes.
+
+The fastest available library is picked as `default_codec` on its first use. ``orjson``, ``ujson`` then the standard
+``json`` module.  Neither ``orjson`` nor ``ujson`` is required.
+"""
+
+import json
+
+
+class Codec:
+    """
+    Interface of the codec.
+
+    `loads` receives bytes and must raise `ValueError` (or its subclass) for an invalid JSON.
+    `dumps` returns bytes and must raise `TypeError` or `ValueError` for an object which can not be encoded.
+    """
+
+    name = None
+
+    def loads(self, raw: bytes):
+        raise NotImplementedError
+
+    def dumps(self, obj) -> bytes:
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f'{self.__class__.__name__} <{self.name}>'
+
+
+class StdlibCodec(Codec):
+    name = 'json'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def loads(self, raw: bytes):
+        return json.loads(raw)
+
+    def dumps(self, obj) -> bytes:
+        return self._encoder.encode(obj).encode('utf-8')
+
+
+class UjsonCodec(Codec):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def loads(self, raw: bytes):
+        return self._ujson.loads(raw)
+
+    def dumps(self, obj) -> bytes:
+        return self._ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+class OrjsonCodec(Codec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, raw: bytes):
+        return self._orjson.loads(raw)
+
+    def dumps(self, obj) -> bytes:
+        return self._orjson.dumps(obj)
+
+
+CODECS = (OrjsonCodec, UjsonCodec, StdlibCodec)
+
+
+def find_codec(*names: str) -> Codec:
+    """
+    Returns the first codec which is available.  All codecs are candidates if no name is given.
+
+    >>> find_codec('json')
+    StdlibCodec <json>
+    """
+    candidates = [c for c in CODECS if not names or c.name in names]
+    for codec in candidates:
+        try:
+            return codec()
+        except ImportError:
+            continue
+
+    raise ImportError(f'No JSON codec is available in {names}')
+
+
+def __getattr__(name):
+    # the optional libraries are imported when `default_codec` is used at first
+    if name == 'default_codec':
+        global default_codec
+        default_codec = find_codec()
+        return default_codec
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from enum import Enum
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
+
+
+class Execution(Enum):
+    """
+    Where a registered procedure is executed.
+
+    .. csv-table::
+        :header: policy, meaning
+
+        inline, Called directly by the evaluator. (default)
+        thread, Submitted to the thread pool.  Suitable for blocking I/O.
+        process, Submitted to the process pool.  Suitable for CPU bound procedure.  The function and its arguments must be picklable.
+    """
+
+    INLINE = 'inline'
+    THREAD = 'thread'
+    PROCESS = 'process'
+
+
+class Executors:
+    """
+    Pools which are shared by the procedures of a `Registrator`.
+    Each pool is created on the first use, `concurrent.futures` is not imported until then.
+    """
+
+    def __init__(self, thread_pool_size: Optional[int]=None, process_pool_size: Optional[int]=None):
+        self.thread_pool_size = thread_pool_size
+        self.process_pool_size = process_pool_size
+        self._thread_pool = None
+        self._process_pool = None
+
+    def get(self, execution: Execution):
+        if execution is Execution.THREAD:
+            if self._thread_pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._thread_pool = ThreadPoolExecutor(self.thread_pool_size)
+            return self._thread_pool
+
+        if execution is Execution.PROCESS:
+            if self._process_pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self._process_pool = ProcessPoolExecutor(self.process_pool_size)
+            return self._process_pool
+
+        assert False, f'{execution} has no pool'
+
+    def submit(self, execution: Execution, function, *args, **kw):
+        """
+        Returns `concurrent.futures.Future` of the call.
+        """
+        return self.get(execution).submit(function, *args, **kw)
+
+    def shutdown(self, wait=True):
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=wait)
+        self._thread_pool = None
+        self._process_pool = None
@@ -0,0 +1,173 @@
+"""
+Framing of JSON-RPC messages over a byte stream (TCP or Unix domain socket).
+
+.. csv-table::
+    :header: name, format
+
+    ndjson, Each message is terminated by ``\\n``.  The encoded JSON never contains a raw newline.
+    length, Each message is prefixed with its length as 4 bytes unsigned big endian integer.
+    segments, "Each message is prefixed with the number of its segments and their lengths, as 4 bytes unsigned big endian integers.  The first segment is the JSON, and the rest are its `json_rpc.attachments`."
+"""
+
+import asyncio
+from struct import Struct
+from typing import Optional, Tuple
+
+
+class FrameError(Exception):
+    """The peer sent a frame which violates the framing."""
+
+
+class Framing:
+    """
+    Interface of the framing.
+
+    `encode` returns a list of bytes to be written with `writelines`, so that the payload is never copied.
+    `read` returns the payload of the next frame, or None when the stream reached EOF.
+    The framing which carries attachments overrides `encode_parts` and `read_parts` as well.
+    """
+
+    name = None
+    attachments = False
+
+    def __init__(self, max_frame_size: int=16 * 1024 * 1024):
+        self.max_frame_size = max_frame_size
+
+    def encode(self, payload: bytes) -> list:
+        raise NotImplementedError
+
+    async def read(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def encode_parts(self, payload: bytes, attachments) -> list:
+        if attachments:
+            raise ValueError(f'{self.name} framing does not carry attachments')
+        return self.encode(payload)
+
+    async def read_parts(self, reader: asyncio.StreamReader) -> Optional[Tuple[bytes, list]]:
+        """
+        Returns the payload and the attachments of the next frame, or None when the stream reached EOF.
+        """
+        payload = await self.read(reader)
+        return None if payload is None else (payload, [])
+
+
+class NewlineFraming(Framing):
+    name = 'ndjson'
+
+    def encode(self, payload: bytes) -> list:
+        return [payload, b'\n']
+
+    async def read(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        while True:
+            try:
+                line = await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError as e:
+                if e.partial.strip():
+                    raise FrameError('stream is closed in the middle of a frame')
+                return None
+            except asyncio.LimitOverrunError:
+                raise FrameError('frame exceeds the limit of the reader')
+
+            if len(line) > self.max_frame_size:
+                raise FrameError(f'frame size {len(line)} exceeds {self.max_frame_size}')
+
+            line = line.strip()
+            if line:
+                return line
+
+
+_LENGTH = Struct('>I')
+
+
+class LengthPrefixedFraming(Framing):
+    name = 'length'
+
+    def encode(self, payload: bytes) -> list:
+        return [_LENGTH.pack(len(payload)), payload]
+
+    async def read(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        try:
+            head = await reader.readexactly(_LENGTH.size)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise FrameError('stream is closed in the middle of a frame')
+            return None
+
+        length, = _LENGTH.unpack(head)
+        if length > self.max_frame_size:
+            raise FrameError(f'frame size {length} exceeds {self.max_frame_size}')
+
+        try:
+            return await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise FrameError('stream is closed in the middle of a frame')
+
+
+class SegmentedFraming(Framing):
+    """
+    :param max_frame_size: Limit of each segment.
+    :param max_segments: Limit of the number of the segments of a frame.
+    """
+
+    name = 'segments'
+    attachments = True
+
+    def __init__(self, max_frame_size: int=16 * 1024 * 1024, max_segments: int=1024):
+        super().__init__(max_frame_size)
+        self.max_segments = max_segments
+
+    def encode(self, payload: bytes) -> list:
+        return self.encode_parts(payload, ())
+
+    def encode_parts(self, payload: bytes, attachments) -> list:
+        lengths = [len(payload)]
+        lengths.extend(len(data) for data in attachments)
+        head = _LENGTH.pack(len(lengths)) + b''.join(_LENGTH.pack(length) for length in lengths)
+        return [head, payload, *attachments]
+
+    async def read(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        parts = await self.read_parts(reader)
+        if parts is None:
+            return None
+        if parts[1]:
+            raise FrameError('frame has attachments, which are read by read_parts')
+        return parts[0]
+
+    async def read_parts(self, reader: asyncio.StreamReader) -> Optional[Tuple[bytes, list]]:
+        try:
+            head = await reader.readexactly(_LENGTH.size)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise FrameError('stream is closed in the middle of a frame')
+            return None
+
+        count, = _LENGTH.unpack(head)
+        if not 0 < count <= self.max_segments:
+            raise FrameError(f'number of segments {count} is not in 1 to {self.max_segments}')
+
+        try:
+            lengths = Struct(f'>{count}I').unpack(await reader.readexactly(_LENGTH.size * count))
+            for length in lengths:
+                if length > self.max_frame_size:
+                    raise FrameError(f'segment size {length} exceeds {self.max_frame_size}')
+            segments = [await reader.readexactly(length) for length in lengths]
+        except asyncio.IncompleteReadError:
+            raise FrameError('stream is closed in the middle of a frame')
+
+        return segments[0], segments[1:]
+
+
+FRAMINGS = {f.name: f for f in (NewlineFraming, LengthPrefixedFraming, SegmentedFraming)}
+
+
+def get_framing(framing) -> Framing:
+    """
+    Returns the framing instance for its name, or the instance itself.
+
+    >>> get_framing('length')  # doctest: +ELLIPSIS
+    <json_rpc.framing.LengthPrefixedFraming object at ...>
+    """
+    if isinstance(framing, Framing):
+        return framing
+    return FRAMINGS[framing]()
@@ -0,0 +1,102 @@
+"""
+Concurrency limits of coroutine procedures.
+
+A call beyond the limit waits for a running one, and a call is rejected with `ErrorCode.SERVER_OVERLOADED` when
+too many calls are already waiting, so that a burst of requests can not exhaust the backend behind the procedures.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
+
+
+class Overloaded(Exception):
+    """The call was rejected because the queue of the limit is full."""
+
+
+class ConcurrencyLimit:
+    """
+    Semaphore with a bounded queue for the event loop.
+
+    :param limit: Number of calls which run at once.
+    :param max_pending: Number of calls which wait for a slot.  No limit if it is None.
+    """
+
+    def __init__(self, limit: int, max_pending: Optional[int]=None):
+        if limit < 1:
+            raise ValueError(f'limit must be positive: {limit}')
+
+        self.limit = limit
+        self.max_pending = max_pending
+        self.running = 0
+        self.rejected = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        if self.running < self.limit and not self._waiters:
+            self.running += 1
+            return
+
+        if self.max_pending is not None and len(self._waiters) >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded(f'{len(self._waiters)} calls are waiting')
+
+        import asyncio
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # the slot is handed over by `release` without decrementing `running`
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    def info(self):
+        return {
+            'limit': self.limit,
+            'running': self.running,
+            'pending': len(self._waiters),
+            'max_pending': self.max_pending,
+            'rejected': self.rejected,
+        }
+
+
+def as_limit(value) -> Optional[ConcurrencyLimit]:
+    """
+    Returns the limit for an option which is a number of calls or `ConcurrencyLimit` itself.
+    """
+    if value is None or isinstance(value, ConcurrencyLimit):
+        return value
+    return ConcurrencyLimit(value)
+
+
+async def run_limited(coroutine, limits):
+    """
+    Run the coroutine once it acquired every limit.
+    """
+    acquired = []
+    try:
+        for limit in limits:
+            await limit.acquire()
+            acquired.append(limit)
+        return await coroutine
+    finally:
+        for limit in reversed(acquired):
+            limit.release()
+        # a coroutine which never started must be closed, otherwise it warns that it was never awaited
+        coroutine.close()
@@ -0,0 +1,346 @@
+"""
+Call counts, error counts and latency of each procedure.
+
+Metrics are recorded only when the `Registrator` is created with ``metrics=True`` (or a `Metrics`), otherwise the
+evaluator has no instrumentation at all.
+
+Example:
+
+>>> from json_rpc import Registrator
+
+>>> app = Registrator(metrics=True)
+
+>>> @app.register
+... def plus(x, y):
+...     return x + y
+...
+
+>>> _ = app.dispatch({'jsonrpc': '2.0', 'method': 'plus', 'params': [1, 2], 'id': 1})
+>>> app.metrics.snapshot()['plus']['calls']
+1
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from functools import lru_cache
+from time import perf_counter
+
+from .variants import ErrorCode, Fail, Success
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, Optional
+
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_SHIFT = 40
+
+PROMETHEUS_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+UNKNOWN_METHOD = '(unknown)'
+
+
+def _index(value: int) -> int:
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = min(value.bit_length() - SUB_BUCKET_BITS - 1, MAX_SHIFT)
+    return shift * SUB_BUCKETS + min(value >> shift, 2 * SUB_BUCKETS - 1)
+
+
+def _upper_bound(index: int) -> int:
+    """
+    Returns the exclusive upper bound in microseconds of the bucket.
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index + 1
+    shift = index // SUB_BUCKETS - 1
+    return (index - shift * SUB_BUCKETS + 1) << shift
+
+
+class Histogram:
+    """
+    Latency histogram in the manner of HDR histogram.
+
+    Each power of two of microseconds is split into `SUB_BUCKETS` linear buckets, so that the relative error of a
+    recorded value is bounded by ``1 / SUB_BUCKETS`` with a fixed number of counters, and recording is a few integer
+    operations.  Counters are not locked, a record racing between threads may be lost.
+
+    >>> h = Histogram()
+    >>> for ms in range(1, 101):
+    ...     h.record(ms / 1000)
+    ...
+    >>> round(h.percentile(50), 3)
+    0.051
+    """
+
+    def __init__(self):
+        self.counts = [0] * ((MAX_SHIFT + 2) * SUB_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        # `_index` is inlined as this is on the path of every call
+        value = int(seconds * 1000000)
+        if value < 2 * SUB_BUCKETS:
+            self.counts[value] += 1
+        else:
+            shift = value.bit_length() - SUB_BUCKET_BITS - 1
+            if shift > MAX_SHIFT:
+                self.counts[-1] += 1
+            else:
+                self.counts[shift * SUB_BUCKETS + (value >> shift)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the upper bound in seconds of the bucket which has the percentile.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(_upper_bound(index) / 1000000, self.max)
+        return self.max
+
+    def cumulative(self, bounds=PROMETHEUS_BUCKETS):
+        """
+        Returns the cumulative counts for the upper bounds in seconds, in the manner of Prometheus histogram.
+        A bucket is counted in the first bound which is not less than the upper bound of the bucket.
+        """
+        counts = [0] * (len(bounds) + 1)
+        for index, count in enumerate(self.counts):
+            if count:
+                counts[bisect_left(bounds, _upper_bound(index) / 1000000)] += count
+
+        total = 0
+        for i, count in enumerate(counts):
+            total += count
+            counts[i] = total
+        return counts
+
+    def state(self) -> dict:
+        """
+        Returns the counters which can be sent to another process and merged by `merge`.
+        """
+        return {
+            'counts': {i: count for i, count in enumerate(self.counts) if count},
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+        }
+
+    def merge(self, state: dict):
+        for index, count in state['counts'].items():
+            self.counts[int(index)] += count
+        self.count += state['count']
+        self.sum += state['sum']
+        self.max = max(self.max, state['max'])
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+        }
+
+
+class MethodMetrics:
+    __slots__ = ('calls', 'errors', 'latency')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = {}
+        self.latency = Histogram()
+
+    def observe(self, seconds: float, code: Optional[ErrorCode]):
+        self.calls += 1
+        self.latency.record(seconds)
+        if code is not None:
+            self.errors[code] = self.errors.get(code, 0) + 1
+
+
+class Metrics:
+    """
+    Metrics of the procedures of a `Registrator`.
+    The calls of the methods which are not registered are aggregated into `UNKNOWN_METHOD`.
+    """
+
+    def __init__(self):
+        self.methods = {}
+
+    def observe(self, method: str, seconds: float, code: Optional[ErrorCode]=None):
+        metrics = self.methods.get(method)
+        if metrics is None:
+            metrics = self.methods[method] = MethodMetrics()
+        metrics.observe(seconds, code)
+
+    def reset(self):
+        self.methods = {}
+
+    def state(self) -> dict:
+        """
+        Returns the counters which can be encoded as JSON, to be aggregated by `merge` in another process.
+        """
+        return {
+            method: {
+                'calls': metrics.calls,
+                'errors': {int(code): count for code, count in metrics.errors.items()},
+                'latency': metrics.latency.state(),
+            }
+            for method, metrics in list(self.methods.items())
+        }
+
+    def merge(self, state: dict):
+        """
+        Add the counters of `state` into this one.
+        """
+        for method, method_state in state.items():
+            metrics = self.methods.get(method)
+            if metrics is None:
+                metrics = self.methods[method] = MethodMetrics()
+            metrics.calls += method_state['calls']
+            for code, count in method_state['errors'].items():
+                code = ErrorCode(int(code))
+                metrics.errors[code] = metrics.errors.get(code, 0) + count
+            metrics.latency.merge(method_state['latency'])
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {
+            method: {
+                'calls': metrics.calls,
+                'errors': {ErrorCode(code).name: count for code, count in metrics.errors.items()},
+                'latency': metrics.latency.snapshot(),
+            }
+            for method, metrics in list(self.methods.items())
+        }
+
+    def prometheus(self, prefix: str='jsonrpc') -> str:
+        """
+        Returns the metrics in Prometheus text exposition format.
+        """
+        lines = [
+            f'# HELP {prefix}_calls_total Number of calls.',
+            f'# TYPE {prefix}_calls_total counter',
+        ]
+        methods = sorted(self.methods.items())
+        for method, metrics in methods:
+            lines.append(f'{prefix}_calls_total{{method={_label(method)}}} {metrics.calls}')
+
+        lines.append(f'# HELP {prefix}_errors_total Number of error responses by the code.')
+        lines.append(f'# TYPE {prefix}_errors_total counter')
+        for method, metrics in methods:
+            for code, count in sorted(metrics.errors.items()):
+                lines.append(f'{prefix}_errors_total{{method={_label(method)},code="{int(code)}"}} {count}')
+
+        lines.append(f'# HELP {prefix}_call_duration_seconds Latency of calls.')
+        lines.append(f'# TYPE {prefix}_call_duration_seconds histogram')
+        for method, metrics in methods:
+            label = _label(method)
+            histogram = metrics.latency
+            counts = histogram.cumulative()
+            for bound, count in zip(PROMETHEUS_BUCKETS, counts):
+                lines.append(f'{prefix}_call_duration_seconds_bucket{{method={label},le="{bound}"}} {count}')
+            lines.append(f'{prefix}_call_duration_seconds_bucket{{method={label},le="+Inf"}} {counts[-1]}')
+            lines.append(f'{prefix}_call_duration_seconds_sum{{method={label}}} {histogram.sum}')
+            lines.append(f'{prefix}_call_duration_seconds_count{{method={label}}} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value: str) -> str:
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'"{escaped}"'
+
+
+class _Timed(Success):
+    """
+    Async result which remembers when its evaluation started.
+    """
+
+    __slots__ = ('method', 'started')
+
+    def __init__(self, id, result, method, started):
+        super().__init__(id, result)
+        self.method = method
+        self.started = started
+
+
+class Instrumented:
+    """
+    Mixin of the evaluator which records the metrics.  The latency of an async call is measured until it is resolved.
+    """
+
+    def __init__(self, *args, metrics: Metrics, **kw):
+        super().__init__(*args, **kw)
+        self._metrics = metrics
+
+    def _method_of(self, request) -> str:
+        method = request.get('method') if isinstance(request, dict) else None
+        # the names sent by the clients are not trusted, the label would grow without bound
+        return method if isinstance(method, str) and method in self._rpc_stack else UNKNOWN_METHOD
+
+    def _eval(self, request):
+        started = perf_counter()
+        result = super()._eval(request)
+        method = self._method_of(request)
+        if result.is_async():
+            return _Timed(result.id, result.result, method, started)
+
+        self._metrics.observe(method, perf_counter() - started, getattr(result, 'code', None))
+        return result
+
+    def _finish(self, timed, result):
+        code = result.code if isinstance(result, Fail) else None
+        self._metrics.observe(timed.method, perf_counter() - timed.started, code)
+        return result
+
+    def _wait(self, result, deadline=None):
+        resolved = super()._wait(result, deadline)
+        if isinstance(result, _Timed) and resolved is not result:
+            self._finish(result, resolved)
+        return resolved
+
+    async def _resolve(self, result, deadline=None):
+        return self._finish(result, await super()._resolve(result, deadline))
+
+    def _stream(self, result):
+        streamed = super()._stream(result)
+        return Success(streamed.id, self._timed_items(result, streamed.result))
+
+    async def _timed_items(self, timed, items):
+        """
+        The latency of a streamed result is measured until its last item.
+        """
+        code = None
+        try:
+            async for item in items:
+                yield item
+        except Exception:
+            code = ErrorCode.UNEXPECTED_ERROR
+            raise
+        finally:
+            self._metrics.observe(timed.method, perf_counter() - timed.started, code)
+
+
+@lru_cache(maxsize=None)
+def instrument(evaluator_class):
+    """
+    Returns the subclass of the evaluator which records the metrics.
+    """
+    return type(f'Instrumented{evaluator_class.__name__}', (Instrumented, evaluator_class), {})
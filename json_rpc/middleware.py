@@ -0,0 +1,203 @@
+"""
+Middlewares around the calls of the procedures.
+
+A middleware is a callable ``middleware(call, call_next)`` which returns the result of `call_next(call)` or its own.
+It is called after the params were validated against the procedure.  A coroutine function can be a middleware as
+well, its result is awaited by the async dispatch.  The result of `call_next` is awaitable if the procedure is
+a coroutine function or executed on a pool, `resolve` awaits any of them.
+
+The middlewares of a `Registrator` are compiled into a single chain of calls when they are added, the first one
+added is the outermost.
+
+Example:
+
+>>> from json_rpc import Registrator, ErrorCode
+>>> from json_rpc.middleware import CallRejected, resolve
+
+>>> app = Registrator()
+
+>>> @app.use
+... def deny_private(call, call_next):
+...     if call.method.startswith('_'):
+...         raise CallRejected(ErrorCode.METHOD_NOT_FOUND)
+...     return call_next(call)
+...
+
+>>> @app.use
+... async def trace(call, call_next):
+...     print('start', call.method)
+...     return await resolve(call_next(call))
+...
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from time import perf_counter
+
+from .execution import Execution
+from .variants import ErrorCode, is_concurrent_future
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Callable, List, Optional
+
+
+class CallRejected(Exception):
+    """
+    Raised by a middleware to respond the error instead of calling the procedure.
+    """
+
+    def __init__(self, code: ErrorCode, message: str=''):
+        super().__init__(message)
+        self.code = ErrorCode(code)
+        self.message = message
+
+
+class Call:
+    """
+    A call of the procedure which is passed through the middlewares.
+    """
+
+    __slots__ = ('id', 'method', 'params', 'args', 'kw', 'descriptor')
+
+    def __init__(self, id, method, params, args, kw, descriptor):
+        self.id = id
+        self.method = method
+        self.params = params
+        self.args = args
+        self.kw = kw
+        self.descriptor = descriptor
+
+    def __repr__(self):
+        return f'Call <{self.id}: {self.method}>'
+
+
+async def resolve(result):
+    """
+    Await the result of `call_next` if it is awaitable, otherwise return it as it was.
+    """
+    import inspect
+
+    if is_concurrent_future(result):
+        import asyncio
+        result = asyncio.wrap_future(result)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def _link(middleware, call_next):
+    def handler(call):
+        return middleware(call, call_next)
+    return handler
+
+
+def compile_chain(middlewares: List[Callable], handler: Callable) -> Callable:
+    """
+    Returns a single callable which passes the call through the middlewares then the handler.
+    """
+    for middleware in reversed(middlewares):
+        handler = _link(middleware, handler)
+    return handler
+
+
+class SamplingProfiler:
+    """
+    Middleware which profiles a fraction of the calls and keeps the reports of the slow ones.
+
+    A sampled call of a function runs under `cProfile`.  A sampled call of a coroutine function is not profiled, as
+    the profiler would count the other tasks running meanwhile; instead its stack is captured once it runs over
+    `threshold`, to show where it is waiting.  The calls executed on a pool are not sampled.
+    The profilers are imported only when a call is sampled.
+
+    :param rate: Fraction of the calls which are sampled.
+    :param threshold: Seconds.  A sampled call is reported only if it takes longer.
+    :param on_sample: Called with the call, seconds it took and the report.  The reports are kept in `samples`
+        if it is None.
+    :param max_samples: Number of the latest reports kept in `samples`.
+    :param limit: Number of the functions in a report of `cProfile`.
+    """
+
+    def __init__(
+        self,
+        rate: float=0.01,
+        threshold: float=0.1,
+        on_sample: Optional[Callable]=None,
+        max_samples: int=100,
+        limit: int=20,
+    ):
+        from random import random
+
+        self.rate = rate
+        self._random = random
+        self.threshold = threshold
+        self.samples = deque(maxlen=max_samples)
+        self._on_sample = on_sample or (lambda call, seconds, report: self.samples.append((call, seconds, report)))
+        self._limit = limit
+
+    def __call__(self, call, call_next):
+        if self._random() >= self.rate:
+            return call_next(call)
+
+        if call.descriptor.is_coroutine:
+            return self._watch(call, call_next(call))
+        if call.descriptor.execution is not Execution.INLINE:
+            # the procedure runs on a pool, nothing to profile in this thread
+            return call_next(call)
+
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is active, only one of them can be since Python 3.12
+            return call_next(call)
+
+        started = perf_counter()
+        try:
+            return call_next(call)
+        finally:
+            profile.disable()
+            seconds = perf_counter() - started
+            if seconds >= self.threshold:
+                self._on_sample(call, seconds, self._report(profile))
+
+    def _report(self, profile) -> str:
+        import io
+        import pstats
+
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(self._limit)
+        return stream.getvalue()
+
+    async def _watch(self, call, result):
+        import asyncio
+        from inspect import iscoroutine
+
+        if not iscoroutine(result):
+            return await resolve(result)
+
+        stacks = []
+        handle = asyncio.get_running_loop().call_later(self.threshold, lambda: stacks.append(_format_stack(result)))
+        started = perf_counter()
+        try:
+            return await result
+        finally:
+            handle.cancel()
+            if stacks:
+                self._on_sample(call, perf_counter() - started, stacks[0])
+
+
+def _format_stack(coroutine) -> str:
+    """
+    Format the stack of the suspended coroutine by following what it awaits.
+    """
+    import traceback
+
+    frames = []
+    while coroutine is not None and getattr(coroutine, 'cr_frame', None) is not None:
+        frames.append((coroutine.cr_frame, coroutine.cr_frame.f_lineno))
+        coroutine = coroutine.cr_await
+    return ''.join(traceback.StackSummary.extract(frames).format())
@@ -0,0 +1,456 @@
+"""
+HTTP/1.1 server built on asyncio protocol which serves a `Registrator`.
+
+It supports keep-alive and pipelining.  Responses of pipelined requests are written in the order of the requests
+while the requests are evaluated concurrently.  The result of a generator function is written with chunked transfer
+encoding as it is produced.
+
+Example:
+
+>>> import asyncio
+>>> from json_rpc import Registrator
+>>> from json_rpc.server.aio import serve
+
+>>> app = Registrator()
+
+>>> async def main():
+...     server = await serve(app, '127.0.0.1', 8080)
+...     async with server:
+...         await server.serve_forever()
+...
+"""
+
+import asyncio
+from collections import deque
+from http import HTTPStatus
+from typing import Optional
+
+from ..attachments import encode_multipart
+
+
+MIN_READ_SIZE = 64 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus):
+        super().__init__(status.phrase)
+        self.status = status
+
+
+def _status_line(status: HTTPStatus) -> bytes:
+    return f'HTTP/1.1 {status.value} {status.phrase}\r\n'.encode('ascii')
+
+
+def encode_response(status: HTTPStatus, body: bytes=b'', keep_alive: bool=True, content_type: bytes=b'application/json') -> list:
+    """
+    Returns the head and body of the response as a list to be written by `writelines`, so that the body is never
+    copied into the head.
+    """
+    head = _encode_head(status, len(body), keep_alive, content_type if body else None)
+    return [head, body] if body else [head]
+
+
+def encode_parts_response(status: HTTPStatus, parts: list, keep_alive: bool, content_type: bytes) -> list:
+    """
+    Same as `encode_response` for the body which consists of the parts, e.g. `json_rpc.attachments`.
+    """
+    head = _encode_head(status, sum(len(part) for part in parts), keep_alive, content_type)
+    return [head, *parts]
+
+
+def encode_chunked_head(status: HTTPStatus, keep_alive: bool, content_type: bytes=b'application/json') -> bytes:
+    """
+    Returns the head of the response whose body is written with `encode_chunk`.
+    """
+    return _encode_head(status, None, keep_alive, content_type)
+
+
+def encode_chunk(chunk: bytes) -> list:
+    """
+    Returns a chunk of the body to be written by `writelines`.  The empty chunk is the end of the body.
+    """
+    return [b'%x\r\n' % len(chunk), chunk, b'\r\n']
+
+
+def _encode_head(status: HTTPStatus, length: Optional[int], keep_alive: bool, content_type: Optional[bytes]) -> bytes:
+    head = [_status_line(status)]
+    if length is None:
+        head.append(b'Transfer-Encoding: chunked\r\n')
+    else:
+        head.extend((b'Content-Length: ', str(length).encode('ascii'), b'\r\n'))
+    if content_type is not None:
+        head.extend((b'Content-Type: ', content_type, b'\r\n'))
+    if not keep_alive:
+        head.append(b'Connection: close\r\n')
+    head.append(b'\r\n')
+    return b''.join(head)
+
+
+class Request:
+    __slots__ = ('method', 'path', 'version', 'headers', 'body')
+
+    def __init__(self, method, path, version, headers):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = b''
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get(b'connection', b'').lower()
+        if self.version == b'HTTP/1.0':
+            return connection == b'keep-alive'
+        return connection != b'close'
+
+
+def parse_head(head: bytes) -> Request:
+    lines = head.split(b'\r\n')
+    try:
+        method, path, version = lines[0].split(b' ')
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST)
+
+    if not version.startswith(b'HTTP/1.'):
+        raise HTTPError(HTTPStatus.HTTP_VERSION_NOT_SUPPORTED)
+
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(b':')
+        if not sep:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+        headers[name.strip().lower()] = value.strip()
+
+    return Request(method, path, version, headers)
+
+
+class HTTPProtocol(asyncio.BufferedProtocol):
+    """
+    The socket is read directly into the buffer of the protocol, and the body is handed to the codec with a single
+    copy.
+
+    :param registrator: `Registrator` to dispatch the requests.
+    :param path: Path of the end point.  Any path is accepted if it is None.
+    :param max_header_size: Requests with larger head is rejected with 431.
+    :param max_body_size: Requests with larger body is rejected with 413.
+    :param max_pipeline: Reading is paused while this number of requests are in-flight on the connection.
+    :param keep_alive_timeout: Seconds until an idle connection is closed.
+    :param request_timeout: Seconds until the calls of a request fail with `ErrorCode.TIMEOUT`.
+    :param metrics_path: Path to serve `Registrator.metrics` in Prometheus text format by GET.
+
+    A request which accepts ``multipart/mixed`` is responded with the `json_rpc.attachments` of the results as the
+    parts following the JSON, if there is any.
+
+    A response larger than `chunk_size` is written by the chunks as `Registrator.dispatch_stream_async` encodes it,
+    for a HTTP/1.1 request to a generator function.  The connection is closed without the end of the body if the
+    generator raises after the first chunk.
+    """
+
+    def __init__(
+        self,
+        registrator,
+        path: Optional[str]=None,
+        max_header_size: int=8 * 1024,
+        max_body_size: int=1024 * 1024,
+        max_pipeline: int=64,
+        keep_alive_timeout: float=75.0,
+        request_timeout: Optional[float]=None,
+        metrics_path: Optional[str]=None,
+        chunk_size: int=64 * 1024,
+    ):
+        self._registrator = registrator
+        self._path = path.encode('ascii') if path else None
+        self._max_header_size = max_header_size
+        self._max_body_size = max_body_size
+        self._max_pipeline = max_pipeline
+        self._keep_alive_timeout = keep_alive_timeout
+        self._request_timeout = request_timeout
+        self._metrics_path = metrics_path.encode('ascii') if metrics_path else None
+        self._chunk_size = chunk_size
+
+        self._loop = None
+        self._transport = None
+        self._buffer = bytearray(MIN_READ_SIZE)
+        self._start = 0
+        self._end = 0
+        self._request = None
+        self._content_length = 0
+        self._queue = deque()
+        self._closing = False
+        self._reading_paused = False
+        self._writing_paused = False
+        self._drain_waiter = None
+        self._streaming = None
+        self._idle_handle = None
+
+    def connection_made(self, transport):
+        self._loop = asyncio.get_running_loop()
+        self._transport = transport
+        self._reset_idle_timer()
+
+    def connection_lost(self, exc):
+        self._closing = True
+        self._cancel_idle_timer()
+        for future, _ in self._queue:
+            future.cancel()
+        self._queue.clear()
+        if self._streaming is not None:
+            self._streaming.cancel()
+        self._wake_writer()
+
+    def get_buffer(self, sizehint):
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._start:
+            del self._buffer[:self._start]
+            self._end -= self._start
+            self._start = 0
+
+        if len(self._buffer) - self._end < MIN_READ_SIZE:
+            self._buffer.extend(bytes(MIN_READ_SIZE))
+        return memoryview(self._buffer)[self._end:]
+
+    def buffer_updated(self, nbytes):
+        self._end += nbytes
+        try:
+            self._parse()
+        except HTTPError as e:
+            self._reject(e.status)
+
+    def eof_received(self):
+        if self._queue:
+            # respond to the requests which has been received then close
+            self._closing = True
+            return True
+        return False
+
+    def pause_writing(self):
+        self._writing_paused = True
+        self._update_reading()
+
+    def resume_writing(self):
+        self._writing_paused = False
+        self._wake_writer()
+        self._update_reading()
+
+    def _wake_writer(self):
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.set_result(None)
+
+    def _parse(self):
+        buffer = self._buffer
+        while not self._closing:
+            if self._request is None:
+                index = buffer.find(b'\r\n\r\n', self._start, self._end)
+                if index < 0:
+                    if self._end - self._start > self._max_header_size:
+                        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+                    return
+
+                if index - self._start > self._max_header_size:
+                    raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+                self._request = parse_head(bytes(buffer[self._start:index]))
+                self._start = index + 4
+                self._content_length = self._read_content_length(self._request)
+
+            if self._end - self._start < self._content_length:
+                return
+
+            request, self._request = self._request, None
+            end = self._start + self._content_length
+            with memoryview(buffer) as view:
+                request.body = view[self._start:end].tobytes()
+            self._start = end
+            self._handle(request)
+
+    def _read_content_length(self, request) -> int:
+        if b'transfer-encoding' in request.headers:
+            raise HTTPError(HTTPStatus.NOT_IMPLEMENTED)
+
+        try:
+            content_length = int(request.headers.get(b'content-length', 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+
+        if content_length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+        if content_length > self._max_body_size:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        return content_length
+
+    def route(self, request):
+        """
+        Returns a coroutine which returns the response for the request, or raise `HTTPError`.
+        """
+        if self._metrics_path is not None and request.path == self._metrics_path:
+            if request.method != b'GET':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            return self._export_metrics(request)
+
+        if self._path is not None and request.path != self._path:
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+        if request.method != b'POST':
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+        return self._dispatch(request)
+
+    async def _dispatch(self, request):
+        if b'multipart/mixed' in request.headers.get(b'accept', b''):
+            return await self._dispatch_parts(request)
+
+        if request.version == b'HTTP/1.1':
+            body = await self._registrator.dispatch_stream_async(request.body, self._request_timeout, self._chunk_size)
+            if not isinstance(body, bytes):
+                # an async iterator of the chunks
+                return body
+        else:
+            body = await self._registrator.dispatch_bytes_async(request.body, self._request_timeout)
+
+        if not body:
+            return encode_response(HTTPStatus.NO_CONTENT, keep_alive=request.keep_alive)
+        return encode_response(HTTPStatus.OK, body, keep_alive=request.keep_alive)
+
+    async def _dispatch_parts(self, request):
+        chunk_size = self._chunk_size if request.version == b'HTTP/1.1' else None
+        body, attachments = await self._registrator.dispatch_parts_async(
+            request.body, self._request_timeout, chunk_size=chunk_size,
+        )
+        if not isinstance(body, bytes):
+            return body
+        if not body:
+            return encode_response(HTTPStatus.NO_CONTENT, keep_alive=request.keep_alive)
+        if not attachments:
+            return encode_response(HTTPStatus.OK, body, keep_alive=request.keep_alive)
+
+        content_type, parts = encode_multipart(body, attachments)
+        return encode_parts_response(HTTPStatus.OK, parts, request.keep_alive, content_type)
+
+    async def _export_metrics(self, request):
+        metrics = self._registrator.metrics
+        if metrics is None:
+            return encode_response(HTTPStatus.NOT_FOUND, keep_alive=request.keep_alive)
+        body = metrics.prometheus().encode('utf-8')
+        return encode_response(HTTPStatus.OK, body, request.keep_alive, b'text/plain; version=0.0.4; charset=utf-8')
+
+    def _handle(self, request):
+        self._cancel_idle_timer()
+        try:
+            future = self._loop.create_task(self.route(request))
+        except HTTPError as e:
+            future = self._loop.create_future()
+            future.set_result(encode_response(e.status, keep_alive=request.keep_alive))
+
+        self._queue.append((future, request.keep_alive))
+        future.add_done_callback(self._flush)
+
+        if not request.keep_alive:
+            # the requests after this one are never responded
+            self._closing = True
+        self._update_reading()
+
+    def _flush(self, _=None):
+        """
+        Write the responses which are ready from the head of the queue, to keep the order of pipelined requests.
+        The responses after a chunked one wait for its end.
+        """
+        if self._streaming is not None:
+            return
+
+        while self._queue and self._queue[0][0].done():
+            future, keep_alive = self._queue.popleft()
+            if future.cancelled():
+                continue
+
+            if future.exception() is not None:
+                response = encode_response(HTTPStatus.INTERNAL_SERVER_ERROR, keep_alive=False)
+                keep_alive = False
+            else:
+                response = future.result()
+
+            if not isinstance(response, list):
+                self._streaming = self._loop.create_task(self._write_chunks(response, keep_alive))
+                self._streaming.add_done_callback(self._chunks_written)
+                return
+
+            self._transport.writelines(response)
+            if not keep_alive:
+                self._transport.close()
+                return
+
+        if not self._queue:
+            if self._closing:
+                self._transport.close()
+                return
+            self._reset_idle_timer()
+        self._update_reading()
+
+    async def _write_chunks(self, chunks, keep_alive: bool) -> bool:
+        """
+        Write the chunked response.  Returns whether the connection is kept alive after it.
+        """
+        self._transport.write(encode_chunked_head(HTTPStatus.OK, keep_alive))
+        try:
+            async for chunk in chunks:
+                self._transport.writelines(encode_chunk(chunk))
+                if self._writing_paused:
+                    self._drain_waiter = self._loop.create_future()
+                    await self._drain_waiter
+                if self._transport.is_closing():
+                    return False
+        except Exception:
+            # the client sees the body is broken
+            self._transport.close()
+            return False
+
+        self._transport.writelines(encode_chunk(b''))
+        if not keep_alive:
+            self._transport.close()
+        return keep_alive
+
+    def _chunks_written(self, task):
+        self._streaming = None
+        if not task.cancelled() and task.result():
+            self._flush()
+
+    def _reject(self, status: HTTPStatus):
+        """
+        Respond an error after the in-flight requests then close the connection.
+        """
+        self._request = None
+        future = self._loop.create_future()
+        future.set_result(encode_response(status, keep_alive=False))
+        self._queue.append((future, False))
+        self._closing = True
+        self._flush()
+
+    def _update_reading(self):
+        if self._transport.is_closing():
+            return
+
+        pause = self._closing or self._writing_paused or len(self._queue) >= self._max_pipeline
+        if pause and not self._reading_paused:
+            self._transport.pause_reading()
+            self._reading_paused = True
+        elif not pause and self._reading_paused:
+            self._transport.resume_reading()
+            self._reading_paused = False
+
+    def _reset_idle_timer(self):
+        self._cancel_idle_timer()
+        if self._keep_alive_timeout:
+            self._idle_handle = self._loop.call_later(self._keep_alive_timeout, self._transport.close)
+
+    def _cancel_idle_timer(self):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+
+async def serve(registrator, host: Optional[str]=None, port: Optional[int]=None, protocol=HTTPProtocol, **options):
+    """
+    Start serving the `Registrator` and returns `asyncio.Server`.
+    `options` are passed to `loop.create_server` (e.g. ``sock``, ``reuse_port``, ``backlog``) or the protocol.
+    """
+    server_options = {k: options.pop(k) for k in ('sock', 'reuse_port', 'reuse_address', 'backlog', 'ssl') if k in options}
+    loop = asyncio.get_running_loop()
+    return await loop.create_server(lambda: protocol(registrator, **options), host, port, **server_options)
@@ -3,7 +3,14 @@ import json
 from .. import rpc_dispatcher
 
 
-def create_handler(klass):
+def create_handler(klass, registrator=None, flush_size=64 * 1024):
+    """
+    Create a handler class for Tornado.
+
+    The deprecated `rpc_dispatcher` is used if `registrator` is not given.
+    With `registrator`, the request body is dispatched by `Registrator.dispatch_bytes_aiter` with its codec.
+    The responses of a batch request are written as each entry completes and flushed every `flush_size` bytes.
+    """
 
     class RPCHandler(klass):
 
@@ -13,10 +20,18 @@ def create_handler(klass):
         def get(self):
             self.write('rpc demo')
 
-        def post(self):
-            rpc_request = json.loads(self.request.body)
-            result = rpc_dispatcher(rpc_request)
-
-            self.write(json.dumps(result))
+        async def post(self):
+            if registrator is None:
+                rpc_request = json.loads(self.request.body)
+                self.write(json.dumps(rpc_dispatcher(rpc_request)))
+                return
+
+            buffered = 0
+            async for chunk in registrator.dispatch_bytes_aiter(self.request.body):
+                self.write(chunk)
+                buffered += len(chunk)
+                if buffered >= flush_size:
+                    await self.flush()
+                    buffered = 0
 
     return RPCHandler
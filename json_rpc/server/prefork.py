@@ -0,0 +1,497 @@
+"""
+Pre-fork server which runs the aio server in several worker processes sharing one listening socket.
+
+The master process binds the socket and forks the workers, which accept the connections of the inherited socket.
+With ``reuse_port=True`` each worker binds its own socket with ``SO_REUSEPORT`` instead, so that the kernel
+balances the connections among the workers.
+
+The master process
+
+* replaces a worker which exits, or which misses its heartbeats for `health_timeout` as its event loop is blocked,
+* restarts the workers gracefully on SIGHUP: new workers are forked, and an old one is stopped whenever a new one is
+  ready to accept connections,
+* stops on SIGTERM or SIGINT, the workers respond the requests in-flight within `shutdown_timeout`,
+* aggregates the metrics which the workers send with their heartbeats, and serves them at `metrics_port`.
+
+It works only on POSIX, as the workers are forked.  The procedures must not be called in the master process
+before `run`, the pools of the executors can not be forked.
+
+Example:
+
+>>> from json_rpc import Registrator
+>>> from json_rpc.server.prefork import PreforkServer
+
+>>> app = Registrator(metrics=True)
+
+>>> server = PreforkServer(app, '0.0.0.0', 8080, workers=4, metrics_port=9100, path='/rpc')
+>>> server.run()  # doctest: +SKIP
+"""
+
+import asyncio
+import json
+import logging
+import os
+import selectors
+import signal
+import socket
+import traceback
+from http import HTTPStatus
+from time import monotonic
+from typing import Optional
+
+from ..metrics import Metrics
+from .aio import HTTPError, HTTPProtocol, encode_response, parse_head, serve
+
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_SIZE = 256 * 1024
+
+_SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD)
+
+
+class _Draining:
+    """
+    Mixin of the protocol which lets the worker close the connections once their requests were responded.
+    """
+
+    connections = None
+
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        self.connections.add(self)
+
+    def connection_lost(self, exc):
+        self.connections.discard(self)
+        super().connection_lost(exc)
+
+    def close_if_idle(self) -> bool:
+        if self._queue or self._request is not None or self._start < self._end:
+            return False
+        self._transport.close()
+        return True
+
+
+class _Worker:
+    __slots__ = ('pid', 'channel', 'generation', 'last_seen', 'ready', 'terminated', 'metrics')
+
+    def __init__(self, pid, channel, generation):
+        self.pid = pid
+        self.channel = channel
+        self.generation = generation
+        # a worker has `health_timeout` to start up
+        self.last_seen = monotonic()
+        self.ready = False
+        self.terminated = None
+        self.metrics = None
+
+
+class PreforkServer:
+    """
+    :param registrator: `Registrator` served by the workers.
+    :param host: Address to bind.
+    :param port: Port to bind.
+    :param workers: Number of the worker processes.  The number of CPUs if it is None.
+    :param sock: Listening socket to share instead of binding `host` and `port`.
+    :param reuse_port: Each worker binds `host` and `port` with ``SO_REUSEPORT``.
+    :param health_interval: Seconds between the heartbeats of a worker.
+    :param health_timeout: Seconds without heartbeat until a worker is killed and replaced.
+    :param shutdown_timeout: Seconds for a stopped worker to respond the requests in-flight until it is killed.
+    :param metrics_port: Port where the master serves the metrics aggregated from the workers by GET.
+    :param metrics_host: Address of `metrics_port`.
+    :param options: Passed to `json_rpc.server.aio.serve` in the workers.
+    """
+
+    def __init__(
+        self,
+        registrator,
+        host: Optional[str]=None,
+        port: Optional[int]=None,
+        workers: Optional[int]=None,
+        sock: Optional[socket.socket]=None,
+        reuse_port: bool=False,
+        health_interval: float=1.0,
+        health_timeout: float=10.0,
+        shutdown_timeout: float=30.0,
+        metrics_port: Optional[int]=None,
+        metrics_host: str='127.0.0.1',
+        **options
+    ):
+        if reuse_port and sock is not None:
+            raise ValueError('sock can not be shared with reuse_port')
+
+        self.registrator = registrator
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.reuse_port = reuse_port
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self._sock = sock
+        self._options = options
+
+        self._workers = {}
+        self._generation = 0
+        self._signals = []
+        self._stopping = False
+        self._spawn_after = 0.0
+        # the metrics of the workers which exited
+        self._retired = Metrics()
+        self._selector = None
+        self._wakeup = None
+        self._metrics_listener = None
+        self._handlers = {}
+
+    def run(self):
+        """
+        Serve until SIGTERM or SIGINT.  It must be called in the main thread.
+        """
+        self._start()
+        try:
+            while not self._stopping or self._workers:
+                if not self._stopping:
+                    self._spawn_missing()
+                self._poll()
+                self._handle_signals()
+                self._reap()
+                self._check_health()
+        finally:
+            self._close()
+
+    def restart(self):
+        """
+        Replace every worker with a new one, keeping the old ones serving until the new ones are ready.
+        """
+        logger.info('restarting %d workers', self.workers)
+        self._generation += 1
+
+    def stop(self):
+        """
+        Stop the workers gracefully and return from `run` once they exited.
+        """
+        self._stopping = True
+        for worker in self._workers.values():
+            self._terminate(worker)
+
+    def collect_metrics(self) -> Optional[Metrics]:
+        """
+        Returns the metrics aggregated from the workers, which are as recent as their last heartbeats.
+        It is None if the `Registrator` has no metrics.
+        """
+        if self.registrator.metrics is None:
+            return None
+
+        metrics = Metrics()
+        metrics.merge(self._retired.state())
+        for worker in self._workers.values():
+            if worker.metrics is not None:
+                metrics.merge(worker.metrics)
+        return metrics
+
+    def info(self):
+        now = monotonic()
+        return [
+            {
+                'pid': worker.pid,
+                'generation': worker.generation,
+                'ready': worker.ready,
+                'terminated': worker.terminated is not None,
+                'last_seen': now - worker.last_seen,
+            }
+            for worker in self._workers.values()
+        ]
+
+    # master
+
+    def _start(self):
+        self._selector = selectors.DefaultSelector()
+
+        if self._sock is None and not self.reuse_port:
+            self._sock = self._bind(self.host, self.port)
+
+        if self.metrics_port is not None:
+            self._metrics_listener = self._bind(self.metrics_host, self.metrics_port)
+            self._metrics_listener.setblocking(False)
+            self._selector.register(self._metrics_listener, selectors.EVENT_READ, self._serve_metrics)
+
+        # signals wake up the selector through the socket
+        self._wakeup = socket.socketpair()
+        for s in self._wakeup:
+            s.setblocking(False)
+        self._selector.register(self._wakeup[0], selectors.EVENT_READ, self._drain_wakeup)
+        signal.set_wakeup_fd(self._wakeup[1].fileno())
+        for signum in _SIGNALS:
+            self._handlers[signum] = signal.signal(signum, self._on_signal)
+
+    def _close(self):
+        signal.set_wakeup_fd(-1)
+        for signum, handler in self._handlers.items():
+            signal.signal(signum, handler)
+        self._handlers = {}
+        for worker in self._workers.values():
+            worker.channel.close()
+        for s in self._wakeup or ():
+            s.close()
+        if self._metrics_listener is not None:
+            self._metrics_listener.close()
+        self._selector.close()
+
+    @staticmethod
+    def _bind(host, port) -> socket.socket:
+        family, type, proto, _, address = socket.getaddrinfo(
+            host, port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE,
+        )[0]
+        sock = socket.socket(family, type, proto)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(address)
+        sock.listen(socket.SOMAXCONN)
+        return sock
+
+    def _on_signal(self, signum, frame):
+        # it is handled by the loop of `run`, not in the middle of whatever it is doing
+        self._signals.append(signum)
+
+    def _handle_signals(self):
+        signals, self._signals = self._signals, []
+        for signum in signals:
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                self.stop()
+            elif signum == signal.SIGHUP and not self._stopping:
+                self.restart()
+
+    def _drain_wakeup(self, sock):
+        try:
+            while sock.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _poll(self):
+        for key, _ in self._selector.select(self.health_interval):
+            key.data(key.fileobj)
+
+    def _spawn_missing(self):
+        current = [
+            w for w in self._workers.values() if w.generation == self._generation and w.terminated is None
+        ]
+        for _ in range(self.workers - len(current)):
+            if monotonic() < self._spawn_after:
+                return
+            self._spawn()
+
+    def _spawn(self):
+        channel, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                channel.close()
+                self._detach()
+                self._run_worker(child)
+                status = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(status)
+
+        child.close()
+        channel.setblocking(False)
+        worker = _Worker(pid, channel, self._generation)
+        self._workers[pid] = worker
+        self._selector.register(channel, selectors.EVENT_READ, lambda _: self._receive(worker))
+        logger.info('worker %d started', pid)
+
+    def _receive(self, worker):
+        while True:
+            try:
+                message = worker.channel.recv(MAX_MESSAGE_SIZE)
+            except BlockingIOError:
+                return
+
+            worker.last_seen = monotonic()
+            metrics = json.loads(message.decode('utf-8'))['metrics']
+            if metrics is not None:
+                worker.metrics = metrics
+
+            if not worker.ready and worker.pid in self._workers:
+                worker.ready = True
+                self._retire_old_worker()
+
+    def _retire_old_worker(self):
+        """
+        Stop one of the workers of a previous generation, as a new one took its place.
+        """
+        for worker in self._workers.values():
+            if worker.generation < self._generation and worker.terminated is None:
+                self._terminate(worker)
+                return
+
+    def _terminate(self, worker, signum=signal.SIGTERM):
+        if worker.terminated is None:
+            worker.terminated = monotonic()
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            worker = self._workers.pop(pid, None)
+            if worker is None:
+                continue
+
+            self._selector.unregister(worker.channel)
+            # the last heartbeat is taken in, which may miss the latest calls of a worker which crashed
+            self._receive(worker)
+            worker.channel.close()
+            if worker.metrics is not None:
+                self._retired.merge(worker.metrics)
+
+            if worker.terminated is None:
+                logger.error('worker %d exited unexpectedly with status %d', pid, status)
+                if not worker.ready:
+                    # do not fork in a busy loop while the workers fail to start
+                    self._spawn_after = monotonic() + self.health_interval
+            else:
+                logger.info('worker %d exited', pid)
+
+    def _check_health(self):
+        now = monotonic()
+        for worker in list(self._workers.values()):
+            if worker.terminated is None:
+                if now - worker.last_seen > self.health_timeout:
+                    logger.error('worker %d missed its heartbeats for %.1f seconds', worker.pid, now - worker.last_seen)
+                    self._terminate(worker, signal.SIGKILL)
+            elif now - worker.terminated > self.shutdown_timeout:
+                logger.error('worker %d did not stop in %.1f seconds', worker.pid, self.shutdown_timeout)
+                self._terminate(worker, signal.SIGKILL)
+
+    def _serve_metrics(self, listener):
+        """
+        Respond a GET request for the aggregated metrics.  It blocks the master up to a second for a slow client, so
+        `metrics_host` should not be exposed beyond the scraper.
+        """
+        try:
+            conn, _ = listener.accept()
+        except BlockingIOError:
+            return
+
+        with conn:
+            conn.settimeout(1.0)
+            try:
+                head = b''
+                while b'\r\n\r\n' not in head:
+                    chunk = conn.recv(8192)
+                    if not chunk or len(head) > 8192:
+                        return
+                    head += chunk
+                request = parse_head(head[:head.index(b'\r\n\r\n')])
+
+                metrics = self.collect_metrics()
+                if request.method != b'GET':
+                    response = encode_response(HTTPStatus.METHOD_NOT_ALLOWED, keep_alive=False)
+                elif metrics is None:
+                    response = encode_response(HTTPStatus.NOT_FOUND, keep_alive=False)
+                else:
+                    body = metrics.prometheus().encode('utf-8')
+                    response = encode_response(
+                        HTTPStatus.OK, body, False, b'text/plain; version=0.0.4; charset=utf-8',
+                    )
+                conn.sendall(b''.join(response))
+            except HTTPError as e:
+                conn.sendall(b''.join(encode_response(e.status, keep_alive=False)))
+            except OSError:
+                pass
+
+    # worker
+
+    def _detach(self):
+        """
+        Release what the forked worker inherited from the master, but the listening socket.
+        """
+        signal.set_wakeup_fd(-1)
+        for signum in _SIGNALS:
+            signal.signal(signum, signal.SIG_DFL)
+        # Ctrl-C reaches the whole process group, the master stops the workers
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        for worker in self._workers.values():
+            worker.channel.close()
+        self._workers = {}
+        for s in self._wakeup:
+            s.close()
+        if self._metrics_listener is not None:
+            self._metrics_listener.close()
+        self._selector.close()
+
+    def _run_worker(self, channel):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._serve_worker(loop, channel))
+        finally:
+            loop.close()
+
+    async def _serve_worker(self, loop, channel):
+        stopped = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stopped.set)
+
+        metrics = self.registrator.metrics
+        if metrics is not None:
+            # what was recorded before the fork belongs to the master
+            metrics.reset()
+
+        options = dict(self._options)
+        protocol = options.pop('protocol', HTTPProtocol)
+        connections = set()
+        protocol = type(f'Draining{protocol.__name__}', (_Draining, protocol), {'connections': connections})
+
+        channel.setblocking(False)
+        if self.reuse_port:
+            server = await serve(self.registrator, self.host, self.port, protocol, reuse_port=True, **options)
+        else:
+            server = await serve(self.registrator, sock=self._sock, protocol=protocol, **options)
+
+        heartbeat = loop.create_task(self._heartbeat(channel))
+        await stopped.wait()
+
+        server.close()
+        deadline = loop.time() + self.shutdown_timeout
+        while connections and loop.time() < deadline:
+            for connection in list(connections):
+                connection.close_if_idle()
+            await asyncio.sleep(0.05)
+
+        heartbeat.cancel()
+        # the calls served while draining are counted as well
+        self._send_heartbeat(channel)
+
+    async def _heartbeat(self, channel):
+        while True:
+            self._send_heartbeat(channel)
+            await asyncio.sleep(self.health_interval)
+
+    def _send_heartbeat(self, channel):
+        metrics = self.registrator.metrics
+        message = json.dumps({'metrics': None if metrics is None else metrics.state()}).encode('utf-8')
+        try:
+            channel.send(message)
+        except BlockingIOError:
+            # the master is busy, the next heartbeat is sent anyway
+            pass
+        except OSError:
+            # too many metrics for a message, the master keeps the last ones
+            try:
+                channel.send(b'{"metrics": null}')
+            except OSError:
+                pass
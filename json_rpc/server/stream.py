@@ -0,0 +1,147 @@
+"""
+JSON-RPC over persistent TCP or Unix domain socket connection.
+
+Every frame received on a connection is dispatched concurrently and its response is written as soon as it completes,
+so that a single connection can carry many calls.  The client matches the responses by `id`.
+
+Example:
+
+>>> from json_rpc import Registrator
+>>> from json_rpc.server.stream import serve_tcp, serve_unix
+
+>>> app = Registrator()
+
+>>> async def main():
+...     server = await serve_tcp(app, '127.0.0.1', 4000, framing='length')
+...     async with server:
+...         await server.serve_forever()
+...
+"""
+
+import asyncio
+
+from ..framing import FrameError, get_framing
+
+
+class StreamConnection:
+    """
+    A connection which dispatches the frames with `Registrator.dispatch_bytes_async`.
+
+    :param max_in_flight: Reading next frame is suspended while this number of calls are in-flight, and writing is
+        throttled by the transport buffer, so that a fast client can not exhaust the server.
+
+    :param partial_results: Send the items of a generator function as the notifications of partial results, see
+        `Registrator.dispatch_partial_aiter`.  Otherwise they are collected into the result.
+
+    With the framing which carries `json_rpc.attachments`, the frames are dispatched with
+    `Registrator.dispatch_parts_async` instead.
+    """
+
+    def __init__(
+        self, registrator, reader, writer, framing, max_in_flight: int=128, partial_results: bool=False,
+    ):
+        self._registrator = registrator
+        self._reader = reader
+        self._writer = writer
+        self._framing = framing
+        self._partial_results = partial_results
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tasks = set()
+
+    async def run(self):
+        try:
+            while True:
+                await self._slots.acquire()
+                try:
+                    if self._framing.attachments:
+                        frame = await self._framing.read_parts(self._reader)
+                    else:
+                        frame = await self._framing.read(self._reader)
+                except (FrameError, ConnectionError):
+                    frame = None
+
+                if frame is None:
+                    self._slots.release()
+                    break
+
+                if self._framing.attachments:
+                    task = asyncio.ensure_future(self._dispatch_parts(*frame))
+                elif self._partial_results:
+                    task = asyncio.ensure_future(self._dispatch_partial(frame))
+                else:
+                    task = asyncio.ensure_future(self._dispatch(frame))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            if self._tasks:
+                await asyncio.wait(self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            self._writer.close()
+
+    async def _dispatch(self, frame: bytes):
+        try:
+            response = await self._registrator.dispatch_bytes_async(frame)
+            await self._write(self._framing.encode, response)
+        except ConnectionError:
+            pass
+        finally:
+            self._slots.release()
+
+    async def _dispatch_partial(self, frame: bytes):
+        try:
+            async for message in self._registrator.dispatch_partial_aiter(frame):
+                await self._write(self._framing.encode, message)
+        except ConnectionError:
+            pass
+        finally:
+            self._slots.release()
+
+    async def _dispatch_parts(self, frame: bytes, attachments: list):
+        try:
+            response, attachments = await self._registrator.dispatch_parts_async(frame, attachments=attachments)
+            await self._write(self._framing.encode_parts, response, attachments)
+        except ConnectionError:
+            pass
+        finally:
+            self._slots.release()
+
+    async def _write(self, encode, response, *attachments):
+        if response and not self._writer.is_closing():
+            self._writer.writelines(encode(response, *attachments))
+            await self._writer.drain()
+
+
+def _handler(registrator, framing, max_in_flight, partial_results):
+    framing = get_framing(framing)
+
+    async def handle(reader, writer):
+        await StreamConnection(registrator, reader, writer, framing, max_in_flight, partial_results).run()
+
+    return handle, framing
+
+
+async def serve_tcp(
+    registrator, host=None, port=None, framing='ndjson', max_in_flight: int=128, partial_results: bool=False,
+    **options
+):
+    """
+    Start serving the `Registrator` on TCP and returns `asyncio.Server`.
+    `options` are passed to `asyncio.start_server`.
+    """
+    handle, framing = _handler(registrator, framing, max_in_flight, partial_results)
+    options.setdefault('limit', framing.max_frame_size)
+    return await asyncio.start_server(handle, host, port, **options)
+
+
+async def serve_unix(
+    registrator, path=None, framing='ndjson', max_in_flight: int=128, partial_results: bool=False, **options
+):
+    """
+    Start serving the `Registrator` on Unix domain socket and returns `asyncio.Server`.
+    `options` are passed to `asyncio.start_unix_server`.
+    """
+    handle, framing = _handler(registrator, framing, max_in_flight, partial_results)
+    options.setdefault('limit', framing.max_frame_size)
+    return await asyncio.start_unix_server(handle, path, **options)
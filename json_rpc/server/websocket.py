@@ -0,0 +1,92 @@
+"""
+JSON-RPC over WebSocket for Tornado.
+
+Each message is dispatched concurrently and its response is sent as soon as it completes.  The server can push
+JSON-RPC notifications to a client or to every connected client.
+
+Example:
+
+>>> import tornado.web
+>>> import tornado.websocket
+>>> from json_rpc import Registrator
+>>> from json_rpc.server.websocket import create_websocket_handler
+
+>>> app = Registrator()
+>>> RPCWebSocket = create_websocket_handler(tornado.websocket.WebSocketHandler, app)
+
+>>> application = tornado.web.Application([
+...     (r'/ws', RPCWebSocket),
+... ])
+
+>>> def on_event(payload):
+...     RPCWebSocket.broadcast('event', [payload])
+...
+"""
+
+import asyncio
+
+from ..variants import JSON_RPC_VERSION
+
+
+def _notification(method: str, params):
+    return {'jsonrpc': JSON_RPC_VERSION, 'method': method, 'params': params if params is not None else []}
+
+
+def create_websocket_handler(klass, registrator):
+    """
+    Create a WebSocket handler class for Tornado.
+    `klass` is expected to be `tornado.websocket.WebSocketHandler` or its subclass.
+    """
+    from tornado.websocket import WebSocketClosedError
+
+    class RPCWebSocketHandler(klass):
+
+        connections = set()
+
+        def open(self, *args, **kw):
+            self._tasks = set()
+            self.connections.add(self)
+
+        def on_close(self):
+            self.connections.discard(self)
+            for task in self._tasks:
+                task.cancel()
+
+        def on_message(self, message):
+            # not to return the coroutine, otherwise Tornado waits for it before reading the next message
+            if isinstance(message, str):
+                message = message.encode('utf-8')
+
+            task = asyncio.ensure_future(self._dispatch(message))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        async def _dispatch(self, message: bytes):
+            response = await registrator.dispatch_bytes_async(message)
+            if response:
+                await self._send(response)
+
+        async def _send(self, payload: bytes):
+            # bytes are sent as a text frame as it is
+            try:
+                await self.write_message(payload)
+            except WebSocketClosedError:
+                pass
+
+        def notify(self, method: str, params=None):
+            """
+            Push a notification to the client.  Returns an awaitable which is done when it was written.
+            """
+            notification = _notification(method, params)
+            return asyncio.ensure_future(self._send(registrator.codec.dumps(notification)))
+
+        @classmethod
+        def broadcast(cls, method: str, params=None):
+            """
+            Push a notification to every connected client.  The notification is encoded only once.
+            """
+            notification = _notification(method, params)
+            payload = registrator.codec.dumps(notification)
+            return asyncio.gather(*[c._send(payload) for c in list(cls.connections)])
+
+    return RPCWebSocketHandler
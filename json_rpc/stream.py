@@ -0,0 +1,119 @@
+"""
+Incremental encoder for the responses of a batch request, and for the result of a procedure which is a generator
+function or async generator function.
+
+>>> b''.join(iter_json_array([{'id': 1}, {'id': 2}]))
+b'[{"id":1},{"id":2}]'
+"""
+
+from . import codec
+from .variants import encode_id
+
+
+CHUNK_SIZE = 64 * 1024
+
+PARTIAL_METHOD = 'rpc.partial'
+"""Method of the notifications which carry the items of a streamed result before its response."""
+
+
+def iter_json_array(items, dumps=None):
+    """
+    Encode an iterable into a JSON array chunk by chunk.
+    Every chunk except the first one and the last one is an encoded item with a leading separator.
+    An item which is encoded into empty bytes (no response for notification) is skipped.
+    `default_codec` encodes the items if `dumps` is None.
+    """
+    dumps = dumps or codec.default_codec.dumps
+    separator = b'['
+    for item in items:
+        encoded = dumps(item)
+        if encoded:
+            yield separator + encoded
+            separator = b','
+
+    yield b'[]' if separator == b'[' else b']'
+
+
+async def aiter_json_array(items, dumps=None):
+    """
+    Async version of `iter_json_array` for the async iterator.
+    """
+    dumps = dumps or codec.default_codec.dumps
+    separator = b'['
+    async for item in items:
+        encoded = dumps(item)
+        if encoded:
+            yield separator + encoded
+            separator = b','
+
+    yield b'[]' if separator == b'[' else b']'
+
+
+async def aiter_items(items):
+    """
+    Iterate the result of a generator function or async generator function asynchronously.
+    """
+    if hasattr(items, '__anext__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def collect(items) -> list:
+    """
+    Returns the items of a streamed result as a list.
+    """
+    return [item async for item in aiter_items(items)]
+
+
+async def _aiter_joined(items, dumps, chunk_size: int):
+    """
+    Encode the items and join them with the separators.  Every chunk has at least `chunk_size` bytes except the last
+    one, which may be empty.
+    """
+    chunk = bytearray()
+    async for item in items:
+        if chunk:
+            chunk += b','
+        chunk += dumps(item)
+        if len(chunk) >= chunk_size:
+            yield bytes(chunk)
+            chunk = bytearray()
+    yield bytes(chunk)
+
+
+async def aiter_json_result(id, items, dumps, chunk_size: int=CHUNK_SIZE):
+    """
+    Encode the response whose result is the async iterator of the items as a JSON array.
+    Every chunk has at least `chunk_size` bytes except the last one, so that a smaller chunk is the whole response.
+    """
+    head = b'{"jsonrpc":"2.0","result":['
+    chunks = _aiter_joined(items, dumps, chunk_size)
+    chunk = await chunks.__anext__()
+    async for following in chunks:
+        yield head + chunk
+        head = b','
+        chunk = following
+
+    tail = b'],"id":' + encode_id(id, dumps) + b'}'
+    yield head + chunk + tail if chunk or head != b',' else tail
+
+
+_PARTIAL_HEAD = b'{"jsonrpc":"2.0","method":"' + PARTIAL_METHOD.encode('ascii') + b'","params":{"id":'
+
+
+async def aiter_partial_results(id, items, dumps, chunk_size: int=CHUNK_SIZE):
+    """
+    Encode the result as the `PARTIAL_METHOD` notifications of the items, each of them has ``id`` of the request and
+    ``result`` of at least `chunk_size` bytes, followed by the response whose result is the rest of the items.
+    """
+    encoded_id = encode_id(id, dumps)
+    chunks = _aiter_joined(items, dumps, chunk_size)
+    chunk = await chunks.__anext__()
+    async for following in chunks:
+        yield _PARTIAL_HEAD + encoded_id + b',"result":[' + chunk + b']}}'
+        chunk = following
+
+    yield b'{"jsonrpc":"2.0","result":[' + chunk + b'],"id":' + encoded_id + b'}'
@@ -0,0 +1,174 @@
+"""
+Validation of the params by the type annotations of the procedure.
+
+The annotations are compiled once into a validator when the procedure is registered with ``validate=True``, so that
+a call only runs the type checks.  Only the types which can be decoded from JSON are checked, the parameters with
+other annotations are accepted as they are.
+
+.. csv-table::
+    :header: annotation, accepts
+
+    int, integer but not boolean
+    float, integer or float
+    "str, bool", the type itself
+    "list, List[T], Sequence[T]", JSON array
+    "dict, Dict[str, T], Mapping[str, T]", JSON object
+    "Optional[T], Union[A, B], A | B", any of them
+    "Any, None", anything / null
+
+>>> def plus(x: int, y: int=0) -> int:
+...     return x + y
+...
+>>> validate = compile_validator(plus)
+>>> validate([1, 2], {}) is None
+True
+>>> validate(['1'], {})
+'x must be int'
+"""
+
+import collections.abc
+import types
+import typing
+from inspect import Parameter, signature
+from typing import Any, Callable, Optional
+
+
+_POSITIONAL_KINDS = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)
+_NAMED_KINDS = (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY)
+
+
+def _check_type(*types):
+    if len(types) == 1:
+        t, = types
+        return lambda value: type(value) is t
+    return lambda value: type(value) in types
+
+
+def _check_list(item):
+    if item is None:
+        return _check_type(list)
+    return lambda value: type(value) is list and all(item(v) for v in value)
+
+
+def _check_dict(item):
+    if item is None:
+        return _check_type(dict)
+    return lambda value: type(value) is dict and all(item(v) for v in value.values())
+
+
+def _check_union(checks):
+    return lambda value: any(check(value) for check in checks)
+
+
+_SCALARS = {
+    int: _check_type(int),
+    float: _check_type(int, float),
+    str: _check_type(str),
+    bool: _check_type(bool),
+    type(None): lambda value: value is None,
+}
+
+_SEQUENCES = (
+    list, collections.abc.Sequence, collections.abc.MutableSequence, typing.List, typing.Sequence,
+    typing.MutableSequence,
+)
+_MAPPINGS = (
+    dict, collections.abc.Mapping, collections.abc.MutableMapping, typing.Dict, typing.Mapping, typing.MutableMapping,
+)
+# typing.Union and the ``A | B`` unions of PEP 604, python 3.10 and later
+_UNIONS = tuple(u for u in (typing.Union, getattr(types, 'UnionType', None)) if u is not None)
+
+
+def compile_check(annotation) -> Optional[Callable[[Any], bool]]:
+    """
+    Returns the function which checks a decoded JSON value against the annotation.
+    None means that any value is accepted.
+    """
+    if annotation is None:
+        return _SCALARS[type(None)]
+    if annotation in _SCALARS:
+        return _SCALARS[annotation]
+
+    origin = getattr(annotation, '__origin__', None)
+    args = [a for a in getattr(annotation, '__args__', None) or () if not isinstance(a, typing.TypeVar)]
+
+    if origin in _UNIONS or type(annotation) in _UNIONS:
+        checks = [compile_check(a) for a in args]
+        if any(check is None for check in checks):
+            return None
+        return _check_union(checks)
+
+    if annotation in _SEQUENCES or origin in _SEQUENCES:
+        return _check_list(compile_check(args[0]) if args else None)
+
+    if annotation in _MAPPINGS or origin in _MAPPINGS:
+        return _check_dict(compile_check(args[1]) if len(args) == 2 else None)
+
+    # Any and the types which are never decoded from JSON
+    return None
+
+
+def _type_name(annotation) -> str:
+    if getattr(annotation, '__args__', None) or not hasattr(annotation, '__name__'):
+        return str(annotation).replace('typing.', '')
+    return annotation.__name__
+
+
+def compile_validator(function) -> Optional[Callable]:
+    """
+    Returns ``validate(args, kw)`` which returns the error message of the first invalid param, or None if they are
+    valid.  It is None if the function has no annotation to check.
+    The number and names of the params are expected to be checked by `MethodDescriptor` beforehand.
+    """
+    try:
+        hints = typing.get_type_hints(function)
+    except Exception:
+        # an annotation which can not be resolved is not checked
+        hints = {}
+
+    parameters = signature(function).parameters.values()
+    positional = []
+    named = {}
+    var_positional = var_keyword = None
+
+    for p in parameters:
+        annotation = hints.get(p.name, Parameter.empty)
+        check = None if annotation is Parameter.empty else compile_check(annotation)
+        entry = None if check is None else (check, f'{p.name} must be {_type_name(annotation)}')
+
+        if p.kind is Parameter.VAR_POSITIONAL:
+            var_positional = entry
+        elif p.kind is Parameter.VAR_KEYWORD:
+            var_keyword = entry
+        else:
+            if p.kind in _POSITIONAL_KINDS:
+                positional.append(entry)
+            if p.kind is not Parameter.POSITIONAL_ONLY and entry is not None:
+                named[p.name] = entry
+
+    if not any(positional) and not named and var_positional is None and var_keyword is None:
+        return None
+
+    size = len(positional)
+    names = frozenset(p.name for p in parameters if p.kind in _NAMED_KINDS)
+
+    def validate(args, kw):
+        for entry, value in zip(positional, args):
+            if entry is not None and not entry[0](value):
+                return entry[1]
+
+        if var_positional is not None:
+            for value in args[size:]:
+                if not var_positional[0](value):
+                    return var_positional[1]
+
+        for name, value in kw.items():
+            entry = named.get(name)
+            if entry is not None:
+                if not entry[0](value):
+                    return entry[1]
+            elif var_keyword is not None and name not in names and not var_keyword[0](value):
+                return var_keyword[1]
+        return None
+
+    return validate
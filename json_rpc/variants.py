@@ -1,13 +1,18 @@
-from asyncio import iscoroutine, gather, ensure_future, Future
-from enum import Enum
-from operator import methodcaller
-from itertools import chain
+import json
+import sys
+from enum import IntEnum
+from types import AsyncGeneratorType, GeneratorType
 
 
 JSON_RPC_VERSION = '2.0'
 
+# results which are never awaited
+_PLAIN_TYPES = frozenset((type(None), bool, int, float, str, list, dict))
 
-class ErrorCode(Enum):
+_STREAM_TYPES = (GeneratorType, AsyncGeneratorType)
+
+
+class ErrorCode(IntEnum):
     """
     An enum object is having error definitions which was defined by the protocol.
 
@@ -31,9 +36,18 @@ class ErrorCode(Enum):
     INVALID_PARAMS = -32602
     INTERNAL_ERROR = -32603
 
-    # TODO: Reserved for implementation-defined server-errors.
+    # Reserved for implementation-defined server-errors.
     #   Server error = -32000 to -32099
 
+    SERVER_OVERLOADED = -32000
+    """too many calls are waiting for the concurrency limit"""
+
+    BATCH_TOO_LARGE = -32001
+    """the batch request has more entries than the limit"""
+
+    TIMEOUT = -32002
+    """the procedure was not done within the timeout"""
+
     UNEXPECTED_ERROR = -32099
     """error for application specific error which is unexpected"""
 
@@ -44,11 +58,49 @@ CODE_TO_MESSAGE = {
     ErrorCode.METHOD_NOT_FOUND: 'The method does not exist / is not available.',
     ErrorCode.INVALID_PARAMS: 'Invalid method parameter(s).',
     ErrorCode.INTERNAL_ERROR: 'Internal JSON-RPC error.',
+    ErrorCode.SERVER_OVERLOADED: 'Server is overloaded, try again later.',
+    ErrorCode.BATCH_TOO_LARGE: 'Batch request has too many entries.',
+    ErrorCode.TIMEOUT: 'Procedure timed out.',
     ErrorCode.UNEXPECTED_ERROR: 'unexpected error is occurred',
 }
 
 
+def is_concurrent_future(obj) -> bool:
+    """
+    `concurrent.futures` is imported when a pool is created, so that no future of it exists until then.
+    """
+    futures = sys.modules.get('concurrent.futures')
+    return futures is not None and isinstance(obj, futures.Future)
+
+
+def is_stream(obj) -> bool:
+    """
+    Whether the result is of a generator function or async generator function, whose items are streamed.
+    """
+    return isinstance(obj, _STREAM_TYPES)
+
+
+def encode_id(id, dumps) -> bytes:
+    if id is None:
+        return b'null'
+    if type(id) is int:
+        return str(id).encode('ascii')
+    return dumps(id)
+
+
+def _error_template(code):
+    """
+    Encode an error response without `id`.  The encoded `id` and closing brace are going to be appended.
+    """
+    response = Fail(None, code, '').to_response()
+    response['error']['code'] = int(code)
+    del response['id']
+    return json.dumps(response, separators=(',', ':'))[:-1].encode('utf-8') + b',"id":'
+
+
 class Fail:
+    __slots__ = ('id', 'code', 'message')
+
     def __init__(self, id, code, msg):
         self.id = id
         self.code = code
@@ -67,19 +119,28 @@ class Fail:
             'id': self.id,
         }
 
-    def resulve_async(self, loop):
-        return self
+    def to_bytes(self, dumps) -> bytes:
+        """
+        Encode the response without building the dict.
+        An error which has no additional message is spliced into the pre-encoded template.
+        """
+        if not self.message:
+            return ERROR_TEMPLATES[self.code] + encode_id(self.id, dumps) + b'}'
+        return dumps(self.to_response())
+
+    def is_async(self):
+        return False
+
+
+ERROR_TEMPLATES = {code: _error_template(code) for code in CODE_TO_MESSAGE}
 
 
 class Success:
+    __slots__ = ('id', 'result')
+
     def __init__(self, id, result):
         self.id = id
         self.result = result
-        if iscoroutine(self.result):
-            print('succeeeeesssss')
-            print(self.result)
-            self.result = ensure_future(self.result)
-            print(self.result)
 
     def __str__(self):
         return f'Success <{self.id}: {self.result}>'
@@ -99,46 +160,19 @@ class Success:
             }
         return None
 
-    def is_async(self):
-        return isinstance(self.result, Future)
-
-    def resolve_async(self, loop):
+    def to_bytes(self, dumps) -> bytes:
         """
-        FIXME: this is solution.
-        Can be Failed after resolved?
+        Encode the response without building the dict.  Notification is encoded into empty bytes.
         """
-        if self.is_async():
-            try:
-                self.result = loop.run_until_complete(self.result)
-            except Exception as e:
-                return Fail(id, ErrorCode.UNEXPECTED_ERROR, str(e))
-        return self
-
+        if self.id is None:
+            return b''
+        return b'{"jsonrpc":"2.0","result":' + dumps(self.result) + b',"id":' + encode_id(self.id, dumps) + b'}'
 
-class AsyncResultsResolver:
-    def __init__(self, results, loop):
-        self.results = results
-        self.loop = loop
-        self.failed = [r for r in results if isinstance(r, Fail)]
-        self.successed = [r for r in results if isinstance(r, Success)]
+    def is_async(self):
+        result = self.result
+        if type(result) in _PLAIN_TYPES:
+            return False
 
-    def to_response(self):
-        successed = []
-        async_results = []
-        for s in self.successed:
-            if s.is_async():
-                async_results.append(s)
-            else:
-                successed.append(s)
-
-        resolved_async_result = map(
-            lambda i_r: Success(i_r[0], i_r[1]),
-            zip(
-                (r.id for r in async_results),
-                self.loop.run_until_complete(gather(*[r.result for r in async_results])),
-            )
-        )
-        return list(filter(None, map(
-            methodcaller('to_response'),
-            chain(self.failed, successed, resolved_async_result),
-        )))
+        # a coroutine function is inspected at its registration, `inspect` is imported by then
+        import inspect
+        return inspect.isawaitable(result) or is_concurrent_future(result) or isinstance(result, _STREAM_TYPES)
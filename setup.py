@@ -19,6 +19,7 @@ setup(
     url='https://github.com/hachibeeDI/py-json-rpc',
     packages=find_packages(),
     install_requires=install_requires,
+    python_requires='>=3.7',
     classifiers=[
         'Development Status :: 4 - Beta',
         'License :: OSI Approved :: MIT License',
@@ -0,0 +1,52 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from json_rpc.server.aio import HTTPProtocol, serve
+
+
+def run(main, *args):
+    """
+    Run the coroutine function on a new event loop.  The tasks left behind are cancelled, so that the connections
+    they hold are closed, then the loop is closed.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main(*args))
+    finally:
+        try:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            # the transports closed by the tasks are released by the next iteration
+            loop.run_until_complete(asyncio.sleep(0))
+        finally:
+            loop.close()
+
+
+@asynccontextmanager
+async def serving(start, registrator, **options):
+    """
+    Start serving the registrator on a free port of localhost by `start`, `json_rpc.server.aio.serve` or
+    `json_rpc.server.stream.serve_tcp`, and yield the port.  The server and its connections are closed at the exit.
+    """
+    transports = []
+    if start is serve:
+        class Tracked(options.pop('protocol', HTTPProtocol)):
+            def connection_made(self, transport):
+                transports.append(transport)
+                super().connection_made(transport)
+
+        options['protocol'] = Tracked
+
+    server = await start(registrator, '127.0.0.1', 0, **options)
+    try:
+        yield server.sockets[0].getsockname()[1]
+    finally:
+        server.close()
+        for transport in transports:
+            transport.close()
+        await server.wait_closed()
+        await asyncio.sleep(0)
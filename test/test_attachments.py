@@ -0,0 +1,97 @@
+import asyncio
+import mmap
+
+from json_rpc import Registrator
+from json_rpc.attachments import attach, detach, encode_multipart, parse_multipart
+from json_rpc.client.http import AsyncHTTPClient, HTTPClient
+from json_rpc.client.stream import StreamClient
+from json_rpc.server.aio import serve
+from json_rpc.server.stream import serve_tcp
+
+from . import run, serving
+
+
+app = Registrator()
+
+
+@app.register
+def read(size):
+    blob = mmap.mmap(-1, size)
+    blob[:3] = b'abc'
+    return {'name': 'a.bin', 'content': blob}
+
+
+@app.register
+def length(data):
+    return {'size': len(data), 'head': data[:3]}
+
+
+def _blocking_call(url, method, params):
+    client = HTTPClient(url)
+    try:
+        return client.call(method, params)
+    finally:
+        client.close()
+
+
+def test_detach_attach():
+    value = {'a': [1, b'xy', {'b': bytearray(b'z')}], 'c': 'd'}
+    attachments = []
+    detached = detach(value, attachments)
+    assert detached == {'a': [1, {'$attachment': 0, 'size': 2}, {'b': {'$attachment': 1, 'size': 1}}], 'c': 'd'}, detached
+    assert value['a'][1] == b'xy', value
+
+    attached = attach(detached, [b'xy', b'z'])
+    assert attached == {'a': [1, b'xy', {'b': b'z'}], 'c': 'd'}, attached
+
+    try:
+        attach({'$attachment': 2}, [])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('missing attachment is accepted')
+
+
+def test_multipart_round_trip():
+    # a part can contain the boundary since the parts are delimited by Content-Length
+    content_type, parts = encode_multipart(b'{"a": 1}', [b'\r\n--', memoryview(b'')])
+    payload, attachments = parse_multipart(b''.join(parts), content_type)
+    assert payload == b'{"a": 1}', payload
+    assert [bytes(a) for a in attachments] == [b'\r\n--', b''], attachments
+
+
+def test_dispatch_parts():
+    raw = b'{"jsonrpc": "2.0", "method": "read", "params": [16], "id": 1}'
+    response, attachments = app.dispatch_parts(raw)
+    assert response == b'{"jsonrpc":"2.0","result":{"name":"a.bin","content":{"$attachment":0,"size":16}},"id":1}', response
+    assert bytes(attachments[0][:3]) == b'abc', attachments
+
+
+def test_stream_segments():
+    async def main():
+        async with serving(serve_tcp, app, framing='segments') as port:
+            async with await StreamClient.connect_tcp('127.0.0.1', port, framing='segments') as client:
+                return await asyncio.gather(client.call('read', [1024 * 1024]), client.call('length', [b'xyz' * 100]))
+
+    read, length = run(main)
+    assert read['name'] == 'a.bin' and len(read['content']) == 1024 * 1024, read['name']
+    assert bytes(read['content'][:4]) == b'abc\0', read['content'][:4]
+    assert length == {'size': 300, 'head': b'xyz'}, length
+
+
+def test_http_multipart():
+    async def main():
+        async with serving(serve, app, path='/rpc') as port:
+            url = f'http://127.0.0.1:{port}/rpc'
+            async with AsyncHTTPClient(url) as client:
+                read = await client.call('read', [4096])
+                batch = await client.batch([('read', [8]), ('length', ['plain'])])
+            blocking = await asyncio.get_event_loop().run_in_executor(None, _blocking_call, url, 'read', [8])
+            return read, batch, blocking
+
+    read, batch, blocking = run(main)
+    assert len(read['content']) == 4096 and bytes(read['content'][:3]) == b'abc', read['name']
+    assert bytes(batch[0]['content']) == b'abc\0\0\0\0\0', batch
+    # the result without binary is plain JSON
+    assert batch[1] == {'size': 5, 'head': 'pla'}, batch
+    assert bytes(blocking['content']) == b'abc\0\0\0\0\0', blocking
@@ -0,0 +1,119 @@
+import asyncio
+
+from json_rpc import Registrator, make_request
+from json_rpc.cache import ResponseCache, MISSING
+from json_rpc.variants import ErrorCode
+
+from . import run
+
+
+app = Registrator()
+calls = {'lookup': 0, 'fetch': 0, 'flaky': 0, 'listing': 0, 'alisting': 0}
+
+
+@app.register(cache=True)
+def lookup(key):
+    calls['lookup'] += 1
+    return key.upper()
+
+
+@app.register(cache=ResponseCache(maxsize=8))
+async def fetch(key):
+    calls['fetch'] += 1
+    await asyncio.sleep(0.05)
+    return key * 2
+
+
+@app.register(cache=True)
+async def flaky(key):
+    calls['flaky'] += 1
+    raise ValueError(key)
+
+
+@app.register(cache=True)
+def listing(n):
+    calls['listing'] += 1
+    return {'items': list(range(n))}
+
+
+@app.register(cache=True)
+async def alisting(n):
+    calls['alisting'] += 1
+    return {'items': list(range(n))}
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sync_result_is_cached():
+    for _ in range(3):
+        assert app.dispatch(make_request('lookup', ['a'], 'x'))['result'] == 'A'
+    assert app.dispatch(make_request('lookup', {'key': 'a'}, 'x'))['result'] == 'A'
+
+    assert calls['lookup'] == 2, calls
+    assert app.cache_info()['lookup']['hits'] == 2, app.cache_info()
+
+
+def test_concurrent_coroutine_calls_share_one_future():
+    async def main():
+        rpc_result = await app.dispatch_async([make_request('fetch', ['ab'], i) for i in range(1, 11)])
+        assert [r['result'] for r in rpc_result] == ['abab'] * 10, rpc_result
+        assert calls['fetch'] == 1, calls
+
+        # the cached task is awaited on the same loop
+        await app.dispatch_async(make_request('fetch', ['ab'], 'again'))
+        assert calls['fetch'] == 1, calls
+
+    run(main)
+
+
+def test_failure_is_not_cached():
+    for _ in range(2):
+        rpc_result = run(lambda: app.dispatch_async(make_request('flaky', ['x'], 1)))
+        assert rpc_result['error']['code'] == ErrorCode.UNEXPECTED_ERROR, rpc_result
+
+    assert calls['flaky'] == 2, calls
+
+
+def test_mutated_result_does_not_change_the_cache():
+    for _ in range(3):
+        result = app.dispatch(make_request('listing', [2], 1))['result']
+        assert result == {'items': [0, 1]}, result
+        result['items'].append(2)
+
+    async def main():
+        for _ in range(3):
+            result = (await app.dispatch_async(make_request('alisting', [2], 1)))['result']
+            assert result == {'items': [0, 1]}, result
+            result['items'].append(2)
+
+    run(main)
+    assert calls['listing'] == 1 and calls['alisting'] == 1, calls
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.info()['hits'] == 3 and cache.info()['misses'] == 1, cache.info()
+
+
+def test_ttl_expiry():
+    clock = Clock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    cache.put('a', 1)
+
+    clock.now = 9.9
+    assert cache.get('a') == 1
+    clock.now = 10
+    assert cache.get('a') is MISSING
+    assert len(cache) == 0
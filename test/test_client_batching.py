@@ -0,0 +1,63 @@
+import asyncio
+
+from json_rpc import Registrator
+from json_rpc.client import RPCError
+from json_rpc.client.batching import BatchingClient
+from json_rpc.client.http import AsyncHTTPClient
+from json_rpc.server.aio import serve
+
+from . import run, serving
+
+
+app = Registrator()
+
+
+@app.register
+def plus(x, y):
+    return x + y
+
+
+def _run(scenario, **options):
+    async def main():
+        async with serving(serve, app, path='/rpc') as port:
+            client = BatchingClient(AsyncHTTPClient(f'http://127.0.0.1:{port}/rpc'), **options)
+            try:
+                return await scenario(client)
+            finally:
+                await client.close()
+
+    return run(main)
+
+
+def test_window():
+    async def scenario(client):
+        results = await asyncio.gather(*[client.call('plus', [i, 1]) for i in range(10)])
+        return results, client.info()
+
+    results, info = _run(scenario, window=0.01)
+    assert results == list(range(1, 11)), results
+    assert info['batches'] == 1 and info['sizes'] == {10: 1}, info
+
+
+def test_max_batch():
+    async def scenario(client):
+        futures = [client.call('plus', [i, 0]) for i in range(25)]
+        # the last 5 calls are waiting for the window
+        client.flush()
+        return await asyncio.gather(*futures), client.info()
+
+    results, info = _run(scenario, window=10, max_batch=10)
+    assert results == list(range(25)), results
+    assert info['sizes'] == {10: 2, 5: 1}, info
+
+
+def test_error():
+    async def scenario(client):
+        results = await asyncio.gather(client.call('plus', [1, 2]), client.call('unknown'), return_exceptions=True)
+        single = await asyncio.gather(client.call('unknown'), return_exceptions=True)
+        return results + single
+
+    results = _run(scenario)
+    assert results[0] == 3, results
+    assert isinstance(results[1], RPCError) and results[1].code == -32601, results
+    assert isinstance(results[2], RPCError), results
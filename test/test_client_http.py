@@ -0,0 +1,114 @@
+import asyncio
+
+from json_rpc import Registrator
+from json_rpc.client import RPCError
+from json_rpc.client.http import HTTPClient, AsyncHTTPClient
+from json_rpc.server.aio import serve
+
+from . import run, serving
+
+
+app = Registrator()
+
+
+@app.register
+async def sleep_then_echo(a, sec):
+    await asyncio.sleep(sec)
+    return a
+
+
+@app.register
+def plus(x, y):
+    return x + y
+
+
+def _run(scenario, **options):
+    async def main():
+        async with serving(serve, app, path='/rpc') as port:
+            client = AsyncHTTPClient(f'http://127.0.0.1:{port}/rpc', **options)
+            try:
+                return await scenario(client)
+            finally:
+                client.close()
+
+    return run(main)
+
+
+def test_async_call():
+    async def scenario(client):
+        return [await client.call('plus', [1, 2]), await client.call('plus', {'x': 3, 'y': 4})]
+
+    result = _run(scenario)
+    assert result == [3, 7], result
+
+
+def test_async_error():
+    async def scenario(client):
+        try:
+            await client.call('unknown')
+        except RPCError as e:
+            return e.code
+
+    result = _run(scenario)
+    assert result == -32601, result
+
+
+def test_async_batch():
+    async def scenario(client):
+        return await client.batch([('sleep_then_echo', ['slow', 0.05]), ('unknown', []), ('plus', [1, 2])])
+
+    result = _run(scenario)
+    assert result[0] == 'slow', result
+    assert isinstance(result[1], RPCError) and result[1].code == -32601, result
+    assert result[2] == 3, result
+
+
+def test_async_pipelined():
+    async def scenario(client):
+        results = await asyncio.gather(*[client.call('sleep_then_echo', [i, 0.01]) for i in range(50)])
+        return results, len(client._connections)
+
+    results, connections = _run(scenario, pool_size=2, max_pipeline=8)
+    assert results == list(range(50)), results
+    assert connections == 2, connections
+
+
+def test_async_notify_and_timeout():
+    async def scenario(client):
+        await client.notify('plus', [1, 2])
+        try:
+            await client.call('sleep_then_echo', ['late', 1])
+        except asyncio.TimeoutError:
+            return 'timeout'
+
+    result = _run(scenario, timeout=0.1)
+    assert result == 'timeout', result
+
+
+def test_sync_client():
+    def calls(port):
+        client = HTTPClient(f'http://127.0.0.1:{port}/rpc', pool_size=2, timeout=5)
+        try:
+            results = [client.call('plus', [i, i]) for i in range(5)]
+            batch = client.batch([('plus', [1, 2]), ('unknown', [])])
+            client.notify('plus', [1, 2])
+            return results, batch
+        finally:
+            client.close()
+
+    async def main():
+        async with serving(serve, app, path='/rpc') as port:
+            return await asyncio.get_event_loop().run_in_executor(None, calls, port)
+
+    results, batch = run(main)
+    assert results == [0, 2, 4, 6, 8], results
+    assert batch[0] == 3 and isinstance(batch[1], RPCError), batch
+
+
+def test_empty_named_params():
+    client = HTTPClient('http://127.0.0.1:1/rpc')
+    try:
+        assert client._request('plus', {})['params'] == {}, client._request('plus', {})
+        assert client._request('plus', None)['params'] == [], client._request('plus', None)
+    finally:
+        client.close()
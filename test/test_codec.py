@@ -0,0 +1,92 @@
+import json
+
+from json_rpc import Registrator, make_request
+from json_rpc.codec import StdlibCodec, find_codec, default_codec
+from json_rpc.variants import ErrorCode
+
+from . import run
+
+
+app = Registrator()
+stdlib_app = Registrator(codec=StdlibCodec())
+
+
+@app.register
+@stdlib_app.register
+def plus(x, y):
+    return x + y
+
+
+@app.register
+@stdlib_app.register
+def not_serializable():
+    return object()
+
+
+def _encode(request):
+    return json.dumps(request).encode('utf-8')
+
+
+def test_find_codec():
+    assert isinstance(find_codec('json'), StdlibCodec)
+    assert find_codec().name == default_codec.name
+
+    try:
+        find_codec('missing')
+    except ImportError:
+        pass
+    else:
+        assert False, 'unknown codec should not be found'
+
+
+def test_dispatch_bytes():
+    for registrator in (app, stdlib_app):
+        raw = registrator.dispatch_bytes(_encode(make_request('plus', [1, 2], 'a')))
+        assert isinstance(raw, bytes), raw
+        assert json.loads(raw) == {'jsonrpc': '2.0', 'result': 3, 'id': 'a'}, raw
+
+
+def test_parse_error():
+    for registrator in (app, stdlib_app):
+        response = json.loads(registrator.dispatch_bytes(b'{"jsonrpc": "2.0", "method"'))
+        assert response['error']['code'] == ErrorCode.PARSE_ERROR, response
+        assert response['id'] is None, response
+
+
+def test_invalid_request():
+    response = json.loads(app.dispatch_bytes(b'{"jsonrpc": "2.0", "id": 1}'))
+    assert response['error']['code'] == ErrorCode.INVALID_REQUEST, response
+
+    response = json.loads(app.dispatch_bytes(b'[1, {"jsonrpc": "2.0", "method": "plus", "params": [1, 1], "id": 2}]'))
+    assert response[0]['error']['code'] == ErrorCode.INVALID_REQUEST, response
+    assert response[1]['result'] == 2, response
+
+    response = json.loads(app.dispatch_bytes(b'[]'))
+    assert response['error']['code'] == ErrorCode.INVALID_REQUEST, response
+
+
+def test_unserializable_result():
+    for registrator in (app, stdlib_app):
+        raw = registrator.dispatch_bytes(_encode([
+            make_request('not_serializable', [], 'broken'),
+            make_request('plus', [1, 2], 'fine'),
+        ]))
+        response = json.loads(raw)
+        assert response[0]['error']['code'] == ErrorCode.INTERNAL_ERROR, response
+        assert response[1]['result'] == 3, response
+
+
+def test_notification_has_no_response():
+    assert app.dispatch_bytes(b'{"jsonrpc": "2.0", "method": "plus", "params": [1, 2]}') == b''
+
+
+def test_dispatch_bytes_aiter():
+    async def collect(raw):
+        return b''.join([chunk async for chunk in app.dispatch_bytes_aiter(raw)])
+
+    batch = [make_request('plus', [i, i], f'id{i}') for i in range(3)]
+    response = json.loads(run(collect, _encode(batch)))
+    assert sorted(r['result'] for r in response) == [0, 2, 4], response
+
+    response = json.loads(run(collect, b'not a json'))
+    assert response['error']['code'] == ErrorCode.PARSE_ERROR, response
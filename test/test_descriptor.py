@@ -0,0 +1,71 @@
+from json_rpc import Registrator
+from json_rpc.variants import ErrorCode
+from json_rpc._descriptor import MethodDescriptor
+
+
+app = Registrator()
+
+
+@app.register
+def with_default(x, y=10):
+    return x + y
+
+
+@app.register
+def variadic(*args, **kw):
+    return [len(args), len(kw)]
+
+
+@app.register
+def keyword_only(x, *, scale):
+    return x * scale
+
+
+def _call(method, params):
+    return app.dispatch({
+        'jsonrpc': '2.0',
+        'method': method,
+        'params': params,
+        'id': 1,
+    })
+
+
+def test_descriptor_compiled_on_register():
+    descriptor = app._rpc_stack['with_default']
+    assert isinstance(descriptor, MethodDescriptor), descriptor
+    assert descriptor.function is with_default
+    assert descriptor.min_args == 1 and descriptor.max_args == 2, descriptor
+    assert descriptor.required == {'x'} and descriptor.optional == {'y'}, descriptor
+    assert not descriptor.is_coroutine
+
+
+def test_optional_parameter():
+    assert _call('with_default', [1]).get('result') == 11
+    assert _call('with_default', [1, 2]).get('result') == 3
+    assert _call('with_default', {'x': 1}).get('result') == 11
+    assert _call('with_default', {'x': 1, 'y': 2}).get('result') == 3
+
+
+def test_parameter_mismatch():
+    for params in ([], [1, 2, 3], {'y': 1}, {'x': 1, 'z': 2}):
+        rpc_result = _call('with_default', params)
+        assert rpc_result['error']['code'] == ErrorCode.INVALID_PARAMS, rpc_result
+
+
+def test_variadic():
+    assert _call('variadic', [1, 2, 3]).get('result') == [3, 0]
+    assert _call('variadic', {'a': 1}).get('result') == [0, 1]
+
+
+def test_keyword_only():
+    assert _call('keyword_only', {'x': 2, 'scale': 3}).get('result') == 6
+
+    rpc_result = _call('keyword_only', [2, 3])
+    assert rpc_result['error']['code'] == ErrorCode.INVALID_PARAMS, rpc_result
+
+
+def test_coroutine_function():
+    async def coro(a):
+        return a
+
+    assert MethodDescriptor('coro', coro).is_coroutine
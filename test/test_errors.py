@@ -72,3 +72,22 @@ def test_batch_contains_error():
 
     error = rpc_result[1]['error']
     assert error['code'] == ErrorCode.UNEXPECTED_ERROR, rpc_result
+
+
+def test_error_templates_match_response():
+    import json
+    from json_rpc.codec import default_codec
+    from json_rpc.variants import CODE_TO_MESSAGE, Fail
+
+    for code in CODE_TO_MESSAGE:
+        for id in (1, 'string-id', None, 1.5):
+            encoded = Fail(id, code, '').to_bytes(default_codec.dumps)
+            assert json.loads(encoded) == Fail(id, code, '').to_response(), encoded
+
+
+def test_code_to_response_of_every_code():
+    from json_rpc._error import code_to_response
+    from json_rpc.variants import CODE_TO_MESSAGE, Fail
+
+    for code in CODE_TO_MESSAGE:
+        assert code_to_response(1, code) == Fail(1, code, '').to_response(), code
@@ -0,0 +1,70 @@
+import os
+from time import sleep, time
+
+from json_rpc import Registrator, make_request
+from json_rpc.execution import Execution
+from json_rpc.variants import ErrorCode
+
+from . import run
+
+
+app = Registrator(thread_pool_size=4, process_pool_size=2)
+
+
+@app.register(execution='thread')
+def blocking(a):
+    sleep(a)
+    return 'done'
+
+
+@app.register('pid', execution=Execution.PROCESS)
+def process_id():
+    return os.getpid()
+
+
+@app.register(execution='thread')
+def thread_failure():
+    raise ValueError('failed in thread')
+
+
+def test_thread_pool_batch_runs_in_parallel():
+    start = time()
+    rpc_result = app.dispatch([make_request('blocking', [0.5]) for _ in range(4)])
+    time_took = time() - start
+
+    assert [r.get('result') for r in rpc_result] == ['done'] * 4, rpc_result
+    assert time_took < 1.5, time_took
+
+
+def test_thread_pool_in_running_loop():
+    async def handler():
+        start = time()
+        rpc_result = await app.dispatch_async([make_request('blocking', [0.5]) for _ in range(4)])
+        return rpc_result, time() - start
+
+    rpc_result, time_took = run(handler)
+
+    assert [r.get('result') for r in rpc_result] == ['done'] * 4, rpc_result
+    assert time_took < 1.5, time_took
+
+
+def test_process_pool():
+    rpc_result = app.dispatch(make_request('pid', []))
+    assert rpc_result['result'] != os.getpid(), rpc_result
+
+
+def test_pooled_failure():
+    rpc_result = app.dispatch(make_request('thread_failure', []))
+    assert rpc_result['error']['code'] == ErrorCode.UNEXPECTED_ERROR, rpc_result
+
+
+def test_coroutine_can_not_be_pooled():
+    async def coro():
+        pass
+
+    try:
+        app.register(execution='thread')(coro)
+    except ValueError:
+        pass
+    else:
+        assert False, 'coroutine function should be rejected'
@@ -0,0 +1,76 @@
+import subprocess
+import sys
+
+import json_rpc
+
+from . import run
+
+
+DEFERRED = ('asyncio', 'concurrent.futures', 'inspect', 'typing', 'uuid', 'json_rpc.validation')
+
+
+def _import_times(statement):
+    """
+    Returns the cumulative microseconds of each module imported by the statement in a fresh interpreter.
+    """
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.PIPE, check=True, universal_newlines=True,
+    ).stderr
+
+    times = {}
+    for line in output.splitlines()[1:]:
+        _, _, cumulative, name = line.replace('|', ':').split(':')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_deferred_modules():
+    times = _import_times('import json_rpc')
+    assert 'json_rpc' in times, times
+    imported = [name for name in DEFERRED if name in times]
+    assert imported == [], imported
+
+
+def test_import_time():
+    # asyncio is imported after json_rpc, so each of them is measured as a whole
+    times = _import_times('import json_rpc, asyncio')
+    assert times['json_rpc'] < times['asyncio'], times
+
+
+SYNC_SCRIPT = """
+import sys
+import json_rpc
+
+app = json_rpc.Registrator()
+
+@app.register
+def plus(x, y):
+    return x + y
+
+request = json_rpc.make_request('plus', [1, 2])
+assert app.dispatch(request)['result'] == 3
+print(' '.join(sorted(sys.modules)))
+"""
+
+
+def test_sync_dispatch():
+    # a sync dispatch never loads the async machinery nor the pools
+    output = subprocess.run(
+        [sys.executable, '-c', SYNC_SCRIPT], stdout=subprocess.PIPE, check=True, universal_newlines=True,
+    ).stdout
+    modules = output.split()
+    assert 'inspect' in modules and 'uuid' in modules, modules
+    assert 'asyncio' not in modules and 'concurrent.futures' not in modules, modules
+
+
+def test_async_dispatch():
+    app = json_rpc.Registrator()
+
+    @app.register
+    async def plus(x, y):
+        return x + y
+
+    raw = b'[{"jsonrpc": "2.0", "method": "plus", "params": [1, 2], "id": 1}]'
+    response = run(lambda: app.dispatch_bytes_async(raw, timeout=1.0))
+    assert response == b'[{"jsonrpc":"2.0","result":3,"id":1}]', response
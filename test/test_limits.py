@@ -0,0 +1,65 @@
+import asyncio
+
+from json_rpc import Registrator, make_request
+from json_rpc.limits import ConcurrencyLimit
+
+from . import run
+
+
+def test_method_concurrency():
+    app = Registrator()
+    running = []
+
+    @app.register(concurrency=2)
+    async def query(a):
+        running.append(a)
+        peak = len(running)
+        await asyncio.sleep(0.01)
+        running.remove(a)
+        return peak
+
+    request = [make_request('query', [i], f'id{i}') for i in range(6)]
+    result = run(lambda: app.dispatch_async(request))
+    assert max(r['result'] for r in result) == 2, result
+
+
+def test_overloaded():
+    app = Registrator(concurrency=ConcurrencyLimit(1, max_pending=2))
+
+    @app.register
+    async def query(a):
+        await asyncio.sleep(0.01)
+        return a
+
+    request = [make_request('query', [i], f'id{i}') for i in range(5)]
+    result = run(lambda: app.dispatch_async(request))
+    assert [r.get('result') for r in result] == [0, 1, 2, None, None], result
+    assert result[3]['error']['code'] == -32000, result
+    assert app.limit_info()['*']['rejected'] == 2, app.limit_info()
+
+
+def test_max_batch_size():
+    app = Registrator(max_batch_size=2)
+
+    @app.register
+    def plus(x, y):
+        return x + y
+
+    result = app.dispatch([make_request('plus', [1, 2], f'id{i}') for i in range(3)])
+    assert result['error']['code'] == -32001, result
+    assert result['id'] is None, result
+
+    result = app.dispatch([make_request('plus', [1, 2], f'id{i}') for i in range(2)])
+    assert [r['result'] for r in result] == [3, 3], result
+
+
+def test_limit_is_only_for_coroutine():
+    app = Registrator()
+    try:
+        @app.register(concurrency=2)
+        def plus(x, y):
+            return x + y
+    except ValueError:
+        pass
+    else:
+        assert False, 'concurrency of a function is accepted'
@@ -159,3 +159,39 @@ def test_concurrent():
 
     assert rpc_result[0].get('result') == 'home page!', rpc_result
     assert time_took < 1.5, time_took
+
+
+def test_dispatch_async_in_running_loop():
+    async def handler():
+        single = await app.dispatch_async(make_request('plus_rpc', [1, 2], 'single'))
+        batch = await app.dispatch_async([
+            make_request('minus', [10, 3], 'first'),
+            make_request('will_failed_func', ['x'], 'second'),
+            make_request('plus_rpc', {'x': 5, 'y': 5}, 'third'),
+        ])
+        return single, batch
+
+    single, batch = loop.run_until_complete(handler())
+
+    assert single == {'jsonrpc': '2.0', 'result': 3, 'id': 'single'}, single
+    assert [r['id'] for r in batch] == ['first', 'second', 'third'], batch
+    assert batch[0]['result'] == 7, batch
+    assert batch[1]['error']['code'] == ErrorCode.UNEXPECTED_ERROR, batch
+    assert batch[2]['result'] == 10, batch
+
+
+def test_dispatch_async_concurrent_batch():
+    start = time()
+    rpc_result = loop.run_until_complete(app.dispatch_async([
+        make_request('heavy_request', [1]),
+        make_request('heavy_request', [1]),
+        make_request('heavy_request', [1]),
+    ]))
+    time_took = time() - start
+
+    assert all(r.get('result') == 'home page!' for r in rpc_result), rpc_result
+    assert time_took < 1.5, time_took
+
+
+def teardown_module():
+    loop.close()
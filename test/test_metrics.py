@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+from json_rpc import ErrorCode, Registrator, make_request
+from json_rpc.metrics import Histogram, Metrics, UNKNOWN_METHOD
+from json_rpc.server.aio import serve
+
+from . import run, serving
+
+
+app = Registrator(metrics=True)
+
+
+@app.register
+def plus(x, y):
+    return x + y
+
+
+@app.register
+async def sleep_then_echo(a, sec):
+    await asyncio.sleep(sec)
+    return a
+
+
+@app.register
+def will_fail():
+    raise ValueError('failed')
+
+
+def test_histogram():
+    histogram = Histogram()
+    for us in range(1, 10001):
+        histogram.record(us / 1000000)
+
+    for percent in (50, 90, 99):
+        expected = percent / 100 * 0.01
+        result = histogram.percentile(percent)
+        # the relative error is bounded by the sub buckets
+        assert expected <= result <= expected * 1.07, (percent, result)
+
+    # a bucket across the bound is counted in the next one
+    counts = histogram.cumulative((0.001, 0.005))
+    assert 930 <= counts[0] <= 1000 and 4650 <= counts[1] <= 5000 and counts[2] == 10000, counts
+
+
+def test_snapshot():
+    app.metrics.reset()
+    app.dispatch([
+        make_request('plus', [1, 2], 'a'),
+        make_request('plus', [1], 'b'),
+        make_request('will_fail', [], 'c'),
+        make_request('unknown', [], 'd'),
+    ])
+    run(lambda: app.dispatch_async(make_request('sleep_then_echo', ['x', 0.02], 'e')))
+
+    snapshot = app.metrics.snapshot()
+    assert snapshot['plus']['calls'] == 2, snapshot
+    assert snapshot['plus']['errors'] == {'INVALID_PARAMS': 1}, snapshot
+    assert snapshot['will_fail']['errors'] == {'UNEXPECTED_ERROR': 1}, snapshot
+    assert snapshot[UNKNOWN_METHOD]['errors'] == {'METHOD_NOT_FOUND': 1}, snapshot
+    assert snapshot['sleep_then_echo']['latency']['max'] >= 0.02, snapshot
+
+
+def test_disabled():
+    result = Registrator()
+    assert result.metrics is None, result
+    assert type(result._evaluator).__name__ == 'Evaluator', result._evaluator
+
+
+def test_prometheus_endpoint():
+    app.metrics.reset()
+    app.dispatch(make_request('plus', [1, 2], 'a'))
+
+    async def main():
+        async with serving(serve, app, path='/rpc', metrics_path='/metrics') as port:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /metrics HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n')
+            response = await reader.read()
+            writer.close()
+            return response
+
+    response = run(main)
+    assert response.startswith(b'HTTP/1.1 200'), response
+    assert b'jsonrpc_calls_total{method="plus"} 1\n' in response, response
+    assert b'jsonrpc_call_duration_seconds_count{method="plus"} 1\n' in response, response
+
+
+def test_merge():
+    metrics = Metrics()
+    metrics.observe('plus', 0.001)
+    metrics.observe('plus', 0.002, ErrorCode.INVALID_PARAMS)
+
+    merged = Metrics()
+    # the state is sent between the processes as JSON
+    for _ in range(2):
+        merged.merge(json.loads(json.dumps(metrics.state())))
+
+    result = merged.snapshot()['plus']
+    assert result['calls'] == 4 and result['errors'] == {'INVALID_PARAMS': 2}, result
+    assert result['latency']['count'] == 4 and result['latency']['max'] == 0.002, result
+    assert merged.methods['plus'].latency.counts == [c * 2 for c in metrics.methods['plus'].latency.counts]
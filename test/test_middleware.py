@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+from json_rpc import Registrator, ErrorCode, make_request
+from json_rpc.middleware import CallRejected, SamplingProfiler, resolve
+
+from . import run
+
+
+def test_order_and_result():
+    app = Registrator()
+    trace = []
+
+    @app.use
+    def outer(call, call_next):
+        trace.append(('outer', call.method, call.args))
+        return call_next(call) * 10
+
+    @app.use
+    def inner(call, call_next):
+        trace.append(('inner', call.method, call.args))
+        return call_next(call) + 1
+
+    @app.register
+    def plus(x, y):
+        return x + y
+
+    result = app.dispatch(make_request('plus', [1, 2], 'a'))
+    assert result['result'] == 40, result
+    assert trace == [('outer', 'plus', [1, 2]), ('inner', 'plus', [1, 2])], trace
+
+
+def test_rejected():
+    app = Registrator()
+
+    @app.use
+    def auth(call, call_next):
+        if call.kw.get('token') != 'secret':
+            raise CallRejected(ErrorCode.INVALID_PARAMS, 'token is required')
+        return call_next(call)
+
+    @app.register
+    def whoami(token):
+        return 'admin'
+
+    result = app.dispatch([
+        make_request('whoami', {'token': 'secret'}, 'a'),
+        make_request('whoami', {'token': 'x'}, 'b'),
+    ])
+    assert result[0]['result'] == 'admin', result
+    assert result[1]['error']['code'] == -32602, result
+    assert 'token is required' in result[1]['error']['message'], result
+
+
+def test_async_middleware():
+    app = Registrator()
+
+    @app.use
+    async def double(call, call_next):
+        return await resolve(call_next(call)) * 2
+
+    @app.register
+    async def sleep_then_echo(a, sec):
+        await asyncio.sleep(sec)
+        return a
+
+    @app.register
+    def echo(a):
+        return a
+
+    result = run(lambda: app.dispatch_async([
+        make_request('sleep_then_echo', ['x', 0.01], 'a'),
+        make_request('echo', ['y'], 'b'),
+    ]))
+    assert [r['result'] for r in result] == ['xx', 'yy'], result
+
+
+def test_sampling_profiler():
+    app = Registrator()
+    profiler = app.use(SamplingProfiler(rate=1.0, threshold=0.01))
+
+    @app.register
+    def slow():
+        time.sleep(0.02)
+        return 'slow'
+
+    @app.register
+    def fast():
+        return 'fast'
+
+    @app.register
+    async def slow_async():
+        await asyncio.sleep(0.05)
+        return 'slow'
+
+    app.dispatch([make_request('slow', [], 'a'), make_request('fast', [], 'b')])
+    run(lambda: app.dispatch_async(make_request('slow_async', [], 'c')))
+
+    reports = [(call.method, report) for call, seconds, report in profiler.samples]
+    assert [method for method, _ in reports] == ['slow', 'slow_async'], reports
+    assert 'sleep' in reports[0][1], reports[0][1]
+    assert 'slow_async' in reports[1][1], reports[1][1]
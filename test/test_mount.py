@@ -0,0 +1,171 @@
+import asyncio
+
+from json_rpc import Registrator, make_request
+
+from . import run
+
+
+def _registrators():
+    users = Registrator()
+    billing = Registrator()
+    admin = Registrator()
+
+    @users.register
+    def get(id):
+        return f'user {id}'
+
+    @billing.register('get')
+    def get_invoice(id):
+        return f'invoice {id}'
+
+    @admin.register
+    def stats():
+        return 'stats'
+
+    app = Registrator()
+    app.mount('user/', users).mount('billing/', billing)
+    users.mount('admin/', admin)
+    return app, users, billing
+
+
+def test_routing():
+    app, users, _ = _registrators()
+    result = app.dispatch([
+        make_request('user/get', [1], 'a'),
+        make_request('billing/get', [2], 'b'),
+        make_request('user/admin/stats', [], 'c'),
+        make_request('get', [3], 'd'),
+    ])
+    assert [r.get('result') for r in result] == ['user 1', 'invoice 2', 'stats', None], result
+    assert result[3]['error']['code'] == -32601, result
+    assert sorted(app.routes()) == ['billing/get', 'user/admin/stats', 'user/get'], app.routes()
+
+
+def test_registered_after_mount():
+    app, users, _ = _registrators()
+
+    @users.register
+    def delete(id):
+        return 'deleted'
+
+    result = app.dispatch(make_request('user/delete', [1], 'a'))
+    assert result['result'] == 'deleted', result
+
+
+def test_conflict_and_cycle():
+    app, users, billing = _registrators()
+    mounts = [
+        lambda: app.mount('billing/', billing),
+        lambda: users.mount('up/', app),
+        lambda: app.mount('self/', app),
+    ]
+    for mount in mounts:
+        try:
+            mount()
+        except ValueError:
+            pass
+        else:
+            assert False, 'mounted'
+
+
+def test_freeze():
+    app, users, _ = _registrators()
+    app.freeze()
+    try:
+        users.register(lambda: None)
+    except RuntimeError:
+        pass
+    else:
+        assert False, 'registered to the frozen registrator'
+
+
+def test_conflict_registered_after_mount():
+    app, users, _ = _registrators()
+
+    @app.register('user/delete')
+    def delete(id):
+        return 'app'
+
+    try:
+        @users.register('delete')
+        def delete_user(id):
+            return 'users'
+    except ValueError:
+        pass
+    else:
+        assert False, 'replaced the procedure of the parent'
+
+    assert 'delete' not in users.routes(), users.routes()
+    result = app.dispatch(make_request('user/delete', [1], 'a'))
+    assert result['result'] == 'app', result
+
+    # registering the same name again replaces it everywhere
+    @users.register('get')
+    def get_again(id):
+        return 'again'
+
+    result = app.dispatch(make_request('user/get', [1], 'a'))
+    assert result['result'] == 'again', result
+
+
+def test_mount_into_frozen():
+    app, _, _ = _registrators()
+    app.freeze()
+    late = Registrator()
+    try:
+        app.mount('late/', late)
+    except RuntimeError:
+        pass
+    else:
+        assert False, 'mounted into the frozen registrator'
+
+    @late.register
+    def later():
+        return 'later'
+
+    assert 'late/later' not in app.routes(), app.routes()
+
+
+def _max_running(app, child, name):
+    running = []
+    peak = []
+
+    @child.register(name)
+    async def work():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    run(lambda: app.dispatch_async([make_request('child/' + name, [], i) for i in range(3)]))
+    return max(peak)
+
+
+def test_options_of_mounted_procedure():
+    # the options compiled at the registration are of the registrator which the procedure was registered to
+    child = Registrator()
+    app = Registrator(concurrency=1, validate=True).mount('child/', child)
+    assert _max_running(app, child, 'unlimited') == 3
+
+    limited = Registrator(concurrency=1)
+    app = Registrator().mount('child/', limited)
+    assert _max_running(app, limited, 'limited') == 1
+
+    @child.register
+    def typed(x: int):
+        return x
+
+    app = Registrator(validate=True).mount('child/', child)
+    result = app.dispatch(make_request('child/typed', ['a'], 'a'))
+    assert result['result'] == 'a', result
+
+    # while the middlewares are of the registrator which dispatches
+    calls = []
+
+    @app.use
+    def record(call, call_next):
+        calls.append(call.method)
+        return call_next(call)
+
+    app.dispatch(make_request('child/typed', [1], 'a'))
+    assert calls == ['child/typed'], calls
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import urllib.request
+
+from json_rpc import Registrator
+from json_rpc.server.prefork import PreforkServer
+
+
+app = Registrator(metrics=True)
+
+
+@app.register
+def pid():
+    return os.getpid()
+
+
+@app.register
+def crash():
+    os._exit(1)
+
+
+@app.register
+def block(sec):
+    time.sleep(sec)
+
+
+@app.register
+async def sleep_then_pid(sec):
+    await asyncio.sleep(sec)
+    return os.getpid()
+
+
+def _start(**options):
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(128)
+    metrics = socket.socket()
+    metrics.bind(('127.0.0.1', 0))
+    metrics_port = metrics.getsockname()[1]
+    metrics.close()
+
+    server = PreforkServer(
+        app, sock=sock, workers=2, health_interval=0.05, shutdown_timeout=2.0, metrics_port=metrics_port, **options
+    )
+    process = multiprocessing.get_context('fork').Process(target=server.run)
+    process.start()
+    url = f'http://127.0.0.1:{sock.getsockname()[1]}'
+    sock.close()
+    return process, url, metrics_port
+
+
+def _call(url, method, *params):
+    body = json.dumps({'jsonrpc': '2.0', 'method': method, 'params': params, 'id': 1}).encode()
+    with urllib.request.urlopen(url, body, timeout=5) as response:
+        return json.loads(response.read())['result']
+
+
+def _wait(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            result = condition()
+        except OSError:
+            result = None
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError('timed out')
+
+
+def _stop(process):
+    os.kill(process.pid, signal.SIGTERM)
+    process.join(10)
+    assert process.exitcode == 0, process.exitcode
+
+
+def _worker_pids(url):
+    pids = set()
+
+    def two_workers():
+        pids.add(_call(url, 'pid'))
+        return len(pids) == 2
+
+    _wait(two_workers)
+    return pids
+
+
+def test_workers():
+    process, url, _ = _start()
+    try:
+        pids = _worker_pids(url)
+        assert process.pid not in pids, pids
+    finally:
+        _stop(process)
+
+
+def test_replace_crashed_worker():
+    process, url, _ = _start()
+    try:
+        old = _worker_pids(url)
+        try:
+            _call(url, 'crash')
+        except OSError:
+            pass
+
+        # the master forks another one while the other worker keeps serving
+        _wait(lambda: _call(url, 'pid') not in old)
+    finally:
+        _stop(process)
+
+
+def test_kill_blocked_worker():
+    process, url, _ = _start(health_timeout=0.5)
+    try:
+        old = _worker_pids(url)
+        try:
+            _call(url, 'block', 30)
+        except OSError:
+            pass
+        _wait(lambda: _call(url, 'pid') not in old)
+    finally:
+        _stop(process)
+
+
+def test_graceful_restart():
+    process, url, _ = _start()
+    try:
+        old = set(_wait(lambda: [_call(url, 'pid') for _ in range(20)]))
+        os.kill(process.pid, signal.SIGHUP)
+
+        def restarted():
+            return all(_call(url, 'pid') not in old for _ in range(20))
+
+        _wait(restarted)
+    finally:
+        _stop(process)
+
+
+def test_aggregated_metrics():
+    process, url, metrics_port = _start()
+    try:
+        _wait(lambda: _call(url, 'pid'))
+        for _ in range(9):
+            _call(url, 'pid')
+
+        def scraped():
+            with urllib.request.urlopen(f'http://127.0.0.1:{metrics_port}/metrics', timeout=5) as response:
+                return 'jsonrpc_calls_total{method="pid"} 10' in response.read().decode()
+
+        _wait(scraped)
+    finally:
+        _stop(process)
+
+
+def test_restart_responds_in_flight_requests():
+    process, url, _ = _start()
+    try:
+        _worker_pids(url)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(_call(url, 'sleep_then_pid', 0.5)))
+        thread.start()
+        time.sleep(0.1)
+        os.kill(process.pid, signal.SIGHUP)
+        thread.join()
+        assert len(results) == 1, results
+    finally:
+        _stop(process)
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+from json_rpc import Registrator, make_request
+from json_rpc.server.aio import serve
+
+from . import run, serving
+
+
+app = Registrator()
+
+
+@app.register
+async def sleep_then_echo(a, sec):
+    await asyncio.sleep(sec)
+    return a
+
+
+@app.register
+def plus(x, y):
+    return x + y
+
+
+def _post(body, path='/rpc', headers=b''):
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    return (
+        b'POST ' + path.encode() + b' HTTP/1.1\r\nHost: test\r\n' + headers +
+        b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body
+    )
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ')[1])
+    headers = dict(
+        (k.strip().lower(), v.strip())
+        for k, _, v in (line.partition(b':') for line in head.split(b'\r\n')[1:] if line)
+    )
+    body = await reader.readexactly(int(headers.get(b'content-length', 0)))
+    return status, headers, body
+
+
+def _run(scenario, **options):
+    async def main():
+        async with serving(serve, app, path='/rpc', **options) as port:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            try:
+                return await scenario(reader, writer)
+            finally:
+                writer.close()
+
+    return run(main)
+
+
+def test_keep_alive():
+    async def scenario(reader, writer):
+        results = []
+        for i in range(3):
+            writer.write(_post(make_request('plus', [i, 1], f'id{i}')))
+            status, _, body = await _read_response(reader)
+            results.append((status, json.loads(body)['result']))
+        return results
+
+    assert _run(scenario) == [(200, 1), (200, 2), (200, 3)]
+
+
+def test_pipelined_responses_keep_request_order():
+    async def scenario(reader, writer):
+        writer.write(
+            _post(make_request('sleep_then_echo', ['slow', 0.2], 'a')) +
+            _post(make_request('sleep_then_echo', ['fast', 0], 'b')) +
+            _post(make_request('plus', [1, 2], 'c'))
+        )
+        return [json.loads((await _read_response(reader))[2])['id'] for _ in range(3)]
+
+    assert _run(scenario) == ['a', 'b', 'c']
+
+
+def test_notification_and_connection_close():
+    async def scenario(reader, writer):
+        writer.write(_post({'jsonrpc': '2.0', 'method': 'plus', 'params': [1, 2]}, headers=b'Connection: close\r\n'))
+        status, headers, body = await _read_response(reader)
+        return status, headers.get(b'connection'), body, await reader.read()
+
+    assert _run(scenario) == (204, b'close', b'', b'')
+
+
+def test_body_size_limit():
+    async def scenario(reader, writer):
+        writer.write(_post(b'[' + b'1,' * 100 + b'1]'))
+        status, _, _ = await _read_response(reader)
+        return status, await reader.read()
+
+    assert _run(scenario, max_body_size=64) == (413, b'')
+
+
+def test_method_and_path():
+    async def scenario(reader, writer):
+        writer.write(b'GET /rpc HTTP/1.1\r\n\r\n' + _post(make_request('plus', [1, 2], 1), path='/other'))
+        return [(await _read_response(reader))[0] for _ in range(2)]
+
+    assert _run(scenario) == [405, 404]
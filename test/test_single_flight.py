@@ -0,0 +1,76 @@
+import asyncio
+
+from json_rpc import Registrator, make_request
+from json_rpc.variants import ErrorCode
+
+
+loop = asyncio.new_event_loop()
+app = Registrator(loop=loop, single_flight=True)
+calls = {'backend': 0, 'opted_out': 0, 'failing': 0}
+
+
+@app.register
+async def backend(key):
+    calls['backend'] += 1
+    await asyncio.sleep(0.05)
+    return f'{key} loaded'
+
+
+@app.register(single_flight=False)
+async def opted_out(key):
+    calls['opted_out'] += 1
+    return key
+
+
+@app.register
+async def failing(key):
+    calls['failing'] += 1
+    await asyncio.sleep(0.01)
+    raise ValueError(key)
+
+
+def test_identical_calls_in_batch_are_coalesced():
+    rpc_result = app.dispatch([make_request('backend', ['a'], i) for i in range(1, 6)] + [
+        make_request('backend', ['b'], 'other'),
+    ])
+
+    assert [r['id'] for r in rpc_result] == [1, 2, 3, 4, 5, 'other'], rpc_result
+    assert [r['result'] for r in rpc_result[:5]] == ['a loaded'] * 5, rpc_result
+    assert calls['backend'] == 2, calls
+    assert len(app.single_flight) == 0
+
+
+def test_concurrent_requests_are_coalesced():
+    async def concurrent():
+        return await asyncio.gather(*[
+            app.dispatch_async(make_request('backend', ['c'], i)) for i in range(1, 4)
+        ])
+
+    before = calls['backend']
+    rpc_result = loop.run_until_complete(concurrent())
+
+    assert [r['result'] for r in rpc_result] == ['c loaded'] * 3, rpc_result
+    assert calls['backend'] == before + 1, calls
+
+
+def test_completed_call_is_not_reused():
+    before = calls['backend']
+    app.dispatch(make_request('backend', ['d'], 1))
+    app.dispatch(make_request('backend', ['d'], 2))
+    assert calls['backend'] == before + 2, calls
+
+
+def test_failure_fans_out():
+    rpc_result = app.dispatch([make_request('failing', ['x'], i) for i in range(1, 4)])
+
+    assert all(r['error']['code'] == ErrorCode.UNEXPECTED_ERROR for r in rpc_result), rpc_result
+    assert calls['failing'] == 1, calls
+
+
+def test_opt_out():
+    app.dispatch([make_request('opted_out', ['x'], i) for i in range(1, 4)])
+    assert calls['opted_out'] == 3, calls
+
+
+def teardown_module():
+    loop.close()
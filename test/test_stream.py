@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from json_rpc import Registrator, make_request
+from json_rpc.stream import iter_json_array, aiter_json_array
+from json_rpc.server.http import create_handler
+
+from . import run
+
+
+app = Registrator()
+
+
+@app.register
+def plus(x, y):
+    return x + y
+
+
+@app.register
+async def slow(a):
+    await asyncio.sleep(a)
+    return a
+
+
+def test_dispatch_iter():
+    batch = [make_request('plus', [i, i], f'id{i}') for i in range(5)]
+    batch.append({'jsonrpc': '2.0', 'method': 'plus', 'params': [1, 1]})
+
+    responses = app.dispatch_iter(batch)
+    assert next(responses) == {'jsonrpc': '2.0', 'result': 0, 'id': 'id0'}
+    assert [r['result'] for r in responses] == [2, 4, 6, 8]
+
+
+def test_dispatch_aiter_yields_as_completed():
+    batch = [
+        make_request('slow', [0.2], 'slow'),
+        make_request('slow', [0.01], 'fast'),
+        make_request('plus', [1, 2], 'sync'),
+    ]
+
+    async def collect():
+        return [r['id'] async for r in app.dispatch_aiter(batch)]
+
+    assert run(collect) == ['sync', 'fast', 'slow']
+
+
+def test_dispatch_iter_stopped_early():
+    loop = asyncio.new_event_loop()
+    local_app = Registrator(loop=loop)
+    cancelled = []
+
+    @local_app.register
+    async def slow(a):
+        try:
+            await asyncio.sleep(a)
+        except asyncio.CancelledError:
+            cancelled.append(a)
+            raise
+        return a
+
+    @local_app.register
+    def plus(x, y):
+        return x + y
+
+    try:
+        batch = [make_request('slow', [10], 'slow'), make_request('plus', [1, 2], 'sync')]
+        responses = local_app.dispatch_iter(batch)
+        assert next(responses) == {'jsonrpc': '2.0', 'result': 3, 'id': 'sync'}
+        responses.close()
+        assert cancelled == [10], cancelled
+
+        responses = local_app.dispatch_iter([make_request('plus', [i, i], i) for i in range(2)])
+        next(responses)
+    finally:
+        loop.close()
+    # the results are left as they are after the loop is closed
+    responses.close()
+
+
+def test_iter_json_array():
+    items = [{'id': 1}, {'id': 2, 'result': [1, 2]}]
+    assert json.loads(b''.join(iter_json_array(items))) == items
+    assert b''.join(iter_json_array([])) == b'[]'
+
+
+def test_aiter_json_array():
+    async def items():
+        yield {'id': 1}
+        yield {'id': 2}
+
+    async def collect():
+        return b''.join([chunk async for chunk in aiter_json_array(items())])
+
+    assert json.loads(run(collect)) == [{'id': 1}, {'id': 2}]
+
+
+class StreamingHandlerTest(AsyncHTTPTestCase):
+
+    def get_app(self):
+        return tornado.web.Application([
+            (r'/rpc', create_handler(tornado.web.RequestHandler, app, flush_size=16)),
+        ])
+
+    def test_single(self):
+        response = self.fetch('/rpc', method='POST', body=json.dumps(make_request('plus', [1, 2], 1)))
+        assert json.loads(response.body) == {'jsonrpc': '2.0', 'result': 3, 'id': 1}, response.body
+
+    def test_batch(self):
+        batch = [make_request('plus', [i, 1], f'id{i}') for i in range(100)]
+        response = self.fetch('/rpc', method='POST', body=json.dumps(batch))
+
+        results = {r['id']: r['result'] for r in json.loads(response.body)}
+        assert results == {f'id{i}': i + 1 for i in range(100)}, response.body
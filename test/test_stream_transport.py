@@ -0,0 +1,92 @@
+import asyncio
+import os
+import tempfile
+
+from json_rpc import Registrator
+from json_rpc.client import RPCError
+from json_rpc.client.stream import StreamClient
+from json_rpc.server.stream import serve_tcp, serve_unix
+from json_rpc.variants import ErrorCode
+
+from . import run, serving
+
+
+app = Registrator()
+
+
+@app.register
+async def sleep_then_echo(a, sec):
+    await asyncio.sleep(sec)
+    return a
+
+
+@app.register
+def plus(x, y):
+    return x + y
+
+
+def test_tcp_out_of_order_multiplexing():
+    for framing in ('ndjson', 'length'):
+        async def main():
+            completed = []
+            async with serving(serve_tcp, app, framing=framing) as port:
+                async with await StreamClient.connect_tcp('127.0.0.1', port, framing=framing) as client:
+                    async def call(a, sec):
+                        result = await client.call('sleep_then_echo', [a, sec])
+                        completed.append(result)
+                        return result
+
+                    results = await asyncio.gather(
+                        call('slow', 0.2), call('fast', 0), client.call('plus', {'x': 1, 'y': 2}),
+                    )
+            return results, completed
+
+        results, completed = run(main)
+        assert results == ['slow', 'fast', 3], results
+        assert completed == ['fast', 'slow'], completed
+
+
+def test_unix_socket_and_errors():
+    path = os.path.join(tempfile.mkdtemp(), 'rpc.sock')
+
+    async def main():
+        server = await serve_unix(app, path, framing='length')
+        async with await StreamClient.connect_unix(path, framing='length') as client:
+            try:
+                await client.call('missing')
+            except RPCError as e:
+                error = e
+            await client.notify('plus', [1, 2])
+            result = await client.call('plus', [2, 3])
+
+        server.close()
+        await server.wait_closed()
+        return error, result
+
+    error, result = run(main)
+    assert error.code == ErrorCode.METHOD_NOT_FOUND, error
+    assert result == 5, result
+
+
+def test_many_concurrent_calls_with_backpressure():
+    async def main():
+        async with serving(serve_tcp, app, max_in_flight=8) as port:
+            async with await StreamClient.connect_tcp('127.0.0.1', port, max_in_flight=64) as client:
+                return await asyncio.gather(*[client.call('sleep_then_echo', [i, 0.001]) for i in range(500)])
+
+    assert run(main) == list(range(500))
+
+
+def test_timeout():
+    async def main():
+        async with serving(serve_tcp, app) as port:
+            async with await StreamClient.connect_tcp('127.0.0.1', port, timeout=0.05) as client:
+                try:
+                    await client.call('sleep_then_echo', ['late', 1])
+                except asyncio.TimeoutError:
+                    timed_out = True
+                else:
+                    timed_out = False
+                return timed_out, await client.call('plus', [1, 1])
+
+    assert run(main) == (True, 2)
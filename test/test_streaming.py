@@ -0,0 +1,168 @@
+import asyncio
+import http.client
+import json
+import tracemalloc
+
+from json_rpc import Registrator, make_request
+from json_rpc.client import RPCError
+from json_rpc.client.http import AsyncHTTPClient, HTTPClient
+from json_rpc.client.stream import StreamClient
+from json_rpc.server.aio import serve
+from json_rpc.server.stream import serve_tcp
+from json_rpc.variants import ErrorCode
+
+from . import run, serving
+
+
+app = Registrator(metrics=True)
+
+
+@app.register
+def rows(n):
+    for i in range(n):
+        yield {'id': i, 'name': f'row {i}'}
+
+
+@app.register
+async def arows(n):
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield i
+
+
+@app.register
+def broken(n):
+    for i in range(n):
+        yield i
+    raise ValueError('broken')
+
+
+def test_dispatch_collects_items():
+    response = app.dispatch(make_request('rows', [2], 1))
+    assert response['result'] == [{'id': 0, 'name': 'row 0'}, {'id': 1, 'name': 'row 1'}], response
+
+    response = app.dispatch(make_request('broken', [2], 1))
+    assert response['error']['code'] == ErrorCode.UNEXPECTED_ERROR, response
+
+    async def main():
+        return await app.dispatch_async([make_request('arows', [3], 1), make_request('rows', [1], 2)])
+
+    responses = run(main)
+    assert [r['result'] for r in responses] == [[0, 1, 2], [{'id': 0, 'name': 'row 0'}]], responses
+
+
+def test_dispatch_stream_async():
+    raw = json.dumps(make_request('arows', [1000], 1)).encode()
+
+    async def main():
+        small = await app.dispatch_stream_async(raw)
+        chunks = await app.dispatch_stream_async(raw, chunk_size=100)
+        return small, [chunk async for chunk in chunks]
+
+    small, chunks = run(main)
+    assert json.loads(small)['result'] == list(range(1000)), small[:100]
+    assert len(chunks) > 10 and all(len(chunk) >= 100 for chunk in chunks[:-1]), chunks
+    assert b''.join(chunks) == small, chunks[-1]
+
+
+def test_error_before_first_chunk():
+    raw = json.dumps(make_request('broken', [10], 1)).encode()
+    response = run(lambda: app.dispatch_stream_async(raw, chunk_size=1024))
+    assert json.loads(response)['error']['code'] == ErrorCode.UNEXPECTED_ERROR, response
+
+
+def test_generator_options():
+    for options in ({'execution': 'thread'}, {'cache': True}):
+        try:
+            app.register('invalid', **options)(rows)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f'generator function is accepted with {options}')
+
+
+def test_http_chunked():
+    async def main():
+        async with serving(serve, app, path='/rpc', chunk_size=1024) as port:
+            url = f'http://127.0.0.1:{port}/rpc'
+
+            def blocking():
+                connection = http.client.HTTPConnection('127.0.0.1', port)
+                connection.request('POST', '/rpc', json.dumps(make_request('rows', [10000], 1)))
+                response = connection.getresponse()
+                chunked = response.getheader('Transfer-Encoding')
+                rows = json.loads(response.read())['result']
+                connection.close()
+
+                client = HTTPClient(url)
+                try:
+                    return chunked, rows, client.call('rows', [1])
+                finally:
+                    client.close()
+
+            async with AsyncHTTPClient(url) as client:
+                # pipelined responses after the chunked one keep their order
+                results = await asyncio.gather(client.call('arows', [5000]), client.call('rows', [1]))
+            return results, await asyncio.get_event_loop().run_in_executor(None, blocking)
+
+    results, (chunked, rows, small) = run(main)
+    assert results[0] == list(range(5000)), results[0][:10]
+    assert results[1] == [{'id': 0, 'name': 'row 0'}], results[1]
+    assert chunked == 'chunked', chunked
+    assert len(rows) == 10000 and rows[-1] == {'id': 9999, 'name': 'row 9999'}, rows[-1]
+    assert small == [{'id': 0, 'name': 'row 0'}], small
+
+
+def test_http_broken_stream():
+    async def main():
+        async with serving(serve, app, path='/rpc', chunk_size=16) as port:
+            try:
+                async with AsyncHTTPClient(f'http://127.0.0.1:{port}/rpc', timeout=5) as client:
+                    await client.call('broken', [100])
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                return e
+
+    assert run(main) is not None
+
+
+def test_partial_results():
+    async def main():
+        async with serving(serve_tcp, app, partial_results=True) as port:
+            async with await StreamClient.connect_tcp('127.0.0.1', port) as client:
+                result = await client.call('arows', [20000])
+                streamed = [item async for item in client.stream('rows', [20000])]
+                try:
+                    await client.call('broken', [20000])
+                except RPCError as e:
+                    return result, streamed, e
+
+    result, streamed, error = run(main)
+    assert result == list(range(20000)), result[-10:]
+    assert len(streamed) == 20000 and streamed[-1] == {'id': 19999, 'name': 'row 19999'}, streamed[-1]
+    assert error.code == ErrorCode.UNEXPECTED_ERROR, error
+
+
+def test_memory_is_flat():
+    raw = json.dumps(make_request('rows', [200000], 1)).encode()
+
+    async def main():
+        size = 0
+        tracemalloc.start()
+        try:
+            async for chunk in await app.dispatch_stream_async(raw):
+                size += len(chunk)
+            return size, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    size, peak = run(main)
+    assert size > 5 * 1024 * 1024, size
+    assert peak < 1024 * 1024, peak
+
+
+def test_metrics():
+    calls = app.metrics.snapshot()['arows']['calls']
+    raw = json.dumps(make_request('arows', [10], 1)).encode()
+    run(lambda: app.dispatch_stream_async(raw))
+    snapshot = app.metrics.snapshot()['arows']
+    assert snapshot['calls'] == calls + 1, snapshot
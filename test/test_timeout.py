@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from json_rpc import Registrator, make_request
+
+from . import run
+
+
+app = Registrator()
+cancelled = []
+
+
+@app.register
+async def sleep_then_echo(a, sec):
+    try:
+        await asyncio.sleep(sec)
+    except asyncio.CancelledError:
+        cancelled.append(a)
+        raise
+    return a
+
+
+@app.register(timeout=0.05)
+async def hang(a):
+    await asyncio.sleep(10)
+    return a
+
+
+@app.register(execution='thread')
+def blocking_sleep(a, sec):
+    time.sleep(sec)
+    return a
+
+
+def test_method_timeout():
+    start = time.monotonic()
+    result = run(lambda: app.dispatch_async(make_request('hang', ['x'], 'hang')))
+    assert result['error']['code'] == -32002, result
+    assert time.monotonic() - start < 1, 'the call was not cancelled in time'
+
+
+def test_request_timeout():
+    start = time.monotonic()
+    result = run(lambda: app.dispatch_async([
+        make_request('sleep_then_echo', ['fast', 0], 'fast'),
+        make_request('sleep_then_echo', ['slow', 10], 'slow'),
+    ], timeout=0.05))
+    assert result[0]['result'] == 'fast', result
+    assert result[1]['error']['code'] == -32002, result
+    assert 'slow' in cancelled, cancelled
+    assert time.monotonic() - start < 1, 'the batch waited for the slowest entry'
+
+
+def test_request_timeout_of_pooled():
+    result = app.dispatch([
+        make_request('blocking_sleep', ['fast', 0], 'fast'),
+        make_request('blocking_sleep', ['slow', 0.5], 'slow'),
+    ], timeout=0.1)
+    assert result[0]['result'] == 'fast', result
+    assert result[1]['error']['code'] == -32002, result
+
+
+def test_timeout_is_only_for_coroutine():
+    try:
+        app.register(timeout=1)(lambda: None)
+    except ValueError:
+        pass
+    else:
+        assert False, 'timeout of a function is accepted'
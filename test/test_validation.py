@@ -0,0 +1,89 @@
+import sys
+from typing import Any, Dict, List, Optional, Union
+
+from json_rpc import Registrator, make_request
+from json_rpc.validation import compile_validator
+
+
+app = Registrator(validate=True)
+
+
+@app.register
+def plus(x: int, y: float=0.0) -> float:
+    return x + y
+
+
+@app.register
+def tag(name: str, labels: List[str], extra: Optional[Dict[str, int]]=None, *rest: int, note: Any=None):
+    return name
+
+
+@app.register(validate=False)
+def unchecked(x: int):
+    return x
+
+
+def _error(request):
+    result = app.dispatch(request)
+    return result.get('error', {}).get('code'), result.get('error', {}).get('message', '')
+
+
+def test_valid():
+    result = app.dispatch([
+        make_request('plus', [1, 2], 'a'),
+        make_request('plus', {'x': 1, 'y': 2.5}, 'b'),
+        make_request('tag', ['a', ['b'], {'c': 1}, 1, 2], 'c'),
+        make_request('tag', {'name': 'a', 'labels': [], 'extra': None, 'note': {'any': 'thing'}}, 'd'),
+    ])
+    assert [r['result'] for r in result] == [3, 3.5, 'a', 'a'], result
+
+
+def test_invalid():
+    code, message = _error(make_request('plus', ['1', 2], 'a'))
+    assert code == -32602 and 'x must be int' in message, message
+
+    code, message = _error(make_request('plus', [True], 'a'))
+    assert code == -32602, message
+
+    code, message = _error(make_request('plus', {'x': 1, 'y': 'a'}, 'a'))
+    assert code == -32602 and 'y must be float' in message, message
+
+    code, message = _error(make_request('tag', ['a', ['b', 1]], 'a'))
+    assert code == -32602 and 'labels' in message, message
+
+    code, message = _error(make_request('tag', ['a', [], {'c': 'd'}], 'a'))
+    assert code == -32602 and 'extra' in message, message
+
+    code, message = _error(make_request('tag', ['a', [], None, 1, 'x'], 'a'))
+    assert code == -32602 and 'rest' in message, message
+
+
+def test_opt_out():
+    result = app.dispatch(make_request('unchecked', ['1'], 'a'))
+    assert result['result'] == '1', result
+
+
+def test_no_annotation():
+    def plain(x, y):
+        pass
+
+    assert compile_validator(plain) is None
+    assert compile_validator(lambda x: x) is None
+
+    def union(x: Union[int, str]):
+        pass
+
+    validate = compile_validator(union)
+    assert validate([1], {}) is None and validate(['a'], {}) is None
+    assert validate([1.5], {}) is not None
+
+
+# PEP 604 unions are python 3.10 and later
+if sys.version_info >= (3, 10):
+    def test_pep604_union():
+        def union(x: 'int | None'):
+            pass
+
+        validate = compile_validator(union)
+        assert validate([1], {}) is None and validate([None], {}) is None
+        assert validate(['a'], {}) == 'x must be int | None', validate(['a'], {})
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import tornado.web
+import tornado.websocket
+from tornado.testing import AsyncHTTPTestCase, gen_test
+
+from json_rpc import Registrator, make_request
+from json_rpc.server.websocket import create_websocket_handler
+
+
+app = Registrator()
+RPCWebSocket = create_websocket_handler(tornado.websocket.WebSocketHandler, app)
+
+
+@app.register
+async def sleep_then_echo(a, sec):
+    await asyncio.sleep(sec)
+    return a
+
+
+@app.register
+def subscribe(topic):
+    for connection in RPCWebSocket.connections:
+        connection.notify('subscribed', [topic])
+    return 'ok'
+
+
+class WebSocketTest(AsyncHTTPTestCase):
+
+    def get_app(self):
+        return tornado.web.Application([(r'/ws', RPCWebSocket)])
+
+    async def _connect(self):
+        return await tornado.websocket.websocket_connect(f'ws://127.0.0.1:{self.get_http_port()}/ws')
+
+    @gen_test
+    async def test_concurrent_calls_complete_out_of_order(self):
+        connection = await self._connect()
+        connection.write_message(json.dumps(make_request('sleep_then_echo', ['slow', 0.2], 'slow')))
+        connection.write_message(json.dumps(make_request('sleep_then_echo', ['fast', 0], 'fast')))
+
+        first = json.loads(await connection.read_message())
+        second = json.loads(await connection.read_message())
+        assert (first['id'], second['id']) == ('fast', 'slow'), (first, second)
+        connection.close()
+
+    @gen_test
+    async def test_server_push(self):
+        connection = await self._connect()
+        connection.write_message(json.dumps(make_request('subscribe', ['news'], 1)))
+
+        messages = [json.loads(await connection.read_message()) for _ in range(2)]
+        notification = next(m for m in messages if 'method' in m)
+        response = next(m for m in messages if 'id' in m)
+        assert notification == {'jsonrpc': '2.0', 'method': 'subscribed', 'params': ['news']}, messages
+        assert response['result'] == 'ok', messages
+
+        await RPCWebSocket.broadcast('bye')
+        assert json.loads(await connection.read_message())['method'] == 'bye'
+        connection.close()